@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""Measures the per-call cost of the CPU bound steps of the library:
+building and signing requests, serializing and encrypting data, validating
+names, authenticating subscriptions and validating webhooks.
+
+    python -m benchmarks.bench_micro [--number N] [--filter TEXT] [--json PATH]
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+from pusher.authentication_client import AuthenticationClient
+from pusher.crypto import encrypt
+from pusher.http import GET, POST, Request
+from pusher.pusher_client import PusherClient
+from pusher.signature import sign
+from pusher.util import (
+    data_to_string, disable_validation_cache, enable_validation_cache,
+    validate_channel)
+
+from benchmarks.common import time_per_call, write_results
+
+APP_ID = u'4'
+KEY = u'key'
+SECRET = u'secret'
+MASTER_KEY = b'8tW5FQLniQ1sBQFwrw7t6TVEsJZd10yY'
+
+DATA = {u'message': u'hello world', u'user': {u'id': u'1234', u'name': u'Jane'}}
+USER = {u'id': u'1234', u'user_info': {u'name': u'Jane'}}
+
+
+@contextlib.contextmanager
+def validation_cache():
+    enable_validation_cache()
+    try:
+        yield
+
+    finally:
+        disable_validation_cache()
+
+
+@contextlib.contextmanager
+def no_context():
+    yield
+
+
+# The contexts some of the benchmarks are run in
+CONTEXTS = {
+    'validate_channel: cached': validation_cache,
+}
+
+
+def cases():
+    """Yields the name and the function of each microbenchmark."""
+    client = PusherClient(app_id=APP_ID, key=KEY, secret=SECRET, host=u'localhost')
+    auth_client = AuthenticationClient(app_id=APP_ID, key=KEY, secret=SECRET, host=u'localhost')
+
+    event = {
+        u'name': u'my-event',
+        u'channels': [u'my-channel'],
+        u'data': data_to_string(DATA, None)}
+    yield 'request: POST', lambda: Request(client, POST, u'/apps/4/events', event)
+    yield 'request: GET', lambda: Request(
+        client, GET, u'/apps/4/channels', {u'filter_by_prefix': u'presence-'})
+
+    yield 'data_to_string: dict', lambda: data_to_string(DATA, None, client.json_codec)
+    yield 'data_to_string: str', lambda: data_to_string(u'hello world', None, client.json_codec)
+
+    yield 'validate_channel', lambda: validate_channel(u'private-my-channel')
+    yield 'validate_channel: cached', lambda: validate_channel(u'private-my-channel')
+
+    text = data_to_string(DATA, None)
+    yield 'encrypt', lambda: encrypt(
+        u'private-encrypted-my-channel', text, MASTER_KEY, cache=client._secret_box_cache)
+
+    yield 'authenticate: private', lambda: auth_client.authenticate(
+        u'private-my-channel', u'1234.5678')
+    yield 'authenticate: presence', lambda: auth_client.authenticate(
+        u'presence-my-channel', u'1234.5678', {u'user_id': u'1234'})
+    yield 'authenticate_user', lambda: auth_client.authenticate_user(u'1234.5678', USER)
+
+    body = json.dumps({
+        u'time_ms': int(time.time() * 1000),
+        u'events': [{u'name': u'channel_occupied', u'channel': u'my-channel'}] * 5})
+    signature = sign(SECRET, body)
+    yield 'validate_webhook', lambda: auth_client.validate_webhook(KEY, signature, body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000, help='calls per run')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per benchmark')
+    parser.add_argument('--filter', default='', help='only run the benchmarks containing TEXT')
+    parser.add_argument('--json', metavar='PATH', help="write the results to PATH, '-' for stdout")
+    args = parser.parse_args()
+
+    results = []
+    for name, func in cases():
+        if args.filter not in name:
+            continue
+
+        with CONTEXTS.get(name, no_context)():
+            best, median = time_per_call(func, args.number, args.repeat)
+
+        results.append({
+            'name': name,
+            'unit': 'us',
+            'best': best * 1e6,
+            'median': median * 1e6,
+            'number': args.number,
+            'repeat': args.repeat})
+
+    # keep stdout for the JSON when it is written there
+    out = sys.stderr if args.json == '-' else sys.stdout
+    for result in results:
+        print('%-28s %9.3f us/call (median %.3f)' % (
+            result['name'], result['best'], result['median']), file=out)
+
+    if args.json:
+        write_results('micro', results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Compares the per-event cost of drawing nonces and encrypting events with
+the default nacl.utils.random path and a BufferedNonceSource.
+
+    python -m benchmarks.bench_nonce [--number N] [--json PATH]
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import argparse
+import sys
+
+import nacl.secret
+import nacl.utils
+
+from pusher.crypto import BufferedNonceSource, SecretBoxCache, encrypt
+
+from benchmarks.common import time_per_call, write_results
+
+KEY = b'8tW5FQLniQ1sBQFwrw7t6TVEsJZd10yY'
+CHANNEL = u'private-encrypted-bench'
+DATA = u'{"message": "hello world"}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=200000)
+    parser.add_argument('--json', metavar='PATH', help="write the results to PATH, '-' for stdout")
+    args = parser.parse_args()
+
+    size = nacl.secret.SecretBox.NONCE_SIZE
+    source = BufferedNonceSource()
+    cache = SecretBoxCache()
+
+    number = args.number
+    results = []
+
+    def report(name, func, number):
+        best, median = time_per_call(func, number, repeat=3)
+        results.append({
+            'name': name,
+            'unit': 'us',
+            'best': best * 1e6,
+            'median': median * 1e6,
+            'number': number,
+            'repeat': 3})
+
+    report('nonce: nacl.utils.random', lambda: nacl.utils.random(size), number)
+    report('nonce: BufferedNonceSource', source, number)
+
+    number = args.number // 10
+    report('encrypt: default', lambda: encrypt(CHANNEL, DATA, KEY, cache=cache), number)
+    report('encrypt: nonce_source', lambda: encrypt(
+        CHANNEL, DATA, KEY, cache=cache, nonce_source=source), number)
+
+    # keep stdout for the JSON when it is written there
+    out = sys.stderr if args.json == '-' else sys.stdout
+    for result in results:
+        print('%-28s %8.3f us/event' % (result['name'], result['best']), file=out)
+
+    if args.json:
+        write_results('nonce', results, args.json)
+
+if __name__ == '__main__':
+    main()
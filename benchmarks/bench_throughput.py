@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""Measures the end-to-end throughput and latency percentiles of trigger
+and trigger_batch with each backend, against a local stand-in server.
+
+    python -m benchmarks.bench_throughput [--backend NAME] [--requests N]
+        [--concurrency N] [--latency SECONDS] [--url URL] [--json PATH]
+
+The pusher.testing stand-in server runs in a subprocess so that it doesn't
+compete with the client for the GIL, and checks that every request is
+signed correctly. Pass --url to benchmark against another server.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import argparse
+import asyncio
+import importlib
+import subprocess
+import sys
+import threading
+import time
+
+from urllib.parse import urlsplit
+
+from pusher.pusher_client import PusherClient
+
+from benchmarks.common import percentile, run, write_results
+
+# name: (module, backend class, whether send_request returns an awaitable)
+BACKENDS = {
+    'requests': ('pusher.requests', 'RequestsBackend', False),
+    'httpx': ('pusher.httpx', 'HttpxBackend', False),
+    'aiohttp': ('pusher.aiohttp', 'AsyncIOBackend', True),
+    'httpx-async': ('pusher.httpx', 'AsyncHttpxBackend', True),
+    'tornado': ('pusher.tornado', 'TornadoBackend', True),
+}
+
+OPERATIONS = ('trigger', 'trigger_batch')
+
+DATA = {u'message': u'hello world', u'user': {u'id': u'1234', u'name': u'Jane'}}
+
+
+def start_server(latency=0, error_rate=0, seed=None):
+    """Starts a pusher.testing stand-in server in a subprocess, returning
+    it and the port it listens on."""
+    command = [
+        sys.executable, '-m', 'pusher.testing', '--app-id', '4', '--no-record',
+        '--latency', str(latency), '--error-rate', str(error_rate)]
+    if seed is not None:
+        command.extend(['--seed', str(seed)])
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, universal_newlines=True)
+    return process, int(process.stdout.readline())
+
+
+def load_backend(name):
+    module, cls, is_async = BACKENDS[name]
+    return getattr(importlib.import_module(module), cls), is_async
+
+
+def make_call(client, operation):
+    if operation == 'trigger':
+        return lambda: client.trigger(u'my-channel', u'my-event', DATA)
+
+    batch = [
+        {u'channel': u'my-channel-%d' % i, u'name': u'my-event', u'data': DATA}
+        for i in range(10)]
+    return lambda: client.trigger_batch(batch)
+
+
+def run_sync(call, requests, concurrency):
+    """Makes requests calls from concurrency threads, returning the
+    latencies of the successful ones, the number of errors and the
+    elapsed time."""
+    latencies = []
+    errors = [0]
+    remaining = [requests]
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+
+                remaining[0] -= 1
+
+            started = time.perf_counter()
+            try:
+                call()
+
+            except Exception:
+                with lock:
+                    errors[0] += 1
+
+            else:
+                latency = time.perf_counter() - started
+                with lock:
+                    latencies.append(latency)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    return latencies, errors[0], time.perf_counter() - started
+
+
+async def run_async(call, requests, concurrency):
+    """Makes requests calls from concurrency tasks, returning the latencies
+    of the successful ones, the number of errors and the elapsed time."""
+    latencies = []
+    errors = [0]
+    remaining = [requests]
+
+    async def worker():
+        while remaining[0]:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                await call()
+
+            except Exception:
+                errors[0] += 1
+
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, errors[0], time.perf_counter() - started
+
+
+async def _close(backend):
+    for name in ('aclose', 'close'):
+        close = getattr(backend, name, None)
+        if close is not None:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+
+            return
+
+
+def benchmark(name, url, operation, requests, concurrency, warmup):
+    backend, is_async = load_backend(name)
+    parts = urlsplit(url)
+
+    def client():
+        return PusherClient(
+            app_id=u'4', key=u'key', secret=u'secret',
+            ssl=parts.scheme == 'https', host=parts.hostname, port=parts.port,
+            backend=backend)
+
+    if not is_async:
+        pusher_client = client()
+        call = make_call(pusher_client, operation)
+        run_sync(call, warmup, concurrency)
+        result = run_sync(call, requests, concurrency)
+        run(_close(pusher_client.http))
+        return result
+
+    async def run_async_benchmark():
+        if name == 'tornado':
+            import tornado.httpclient
+            tornado.httpclient.AsyncHTTPClient.configure(None, max_clients=concurrency)
+
+        # created on the running loop, which the tornado client binds to
+        pusher_client = client()
+        call = make_call(pusher_client, operation)
+        try:
+            await run_async(call, warmup, concurrency)
+            return await run_async(call, requests, concurrency)
+
+        finally:
+            await _close(pusher_client.http)
+
+    return run(run_async_benchmark())
+
+
+def summarize(backend, operation, concurrency, latencies, errors, elapsed):
+    latencies.sort()
+    milliseconds = lambda seconds: None if seconds is None else seconds * 1e3
+    return {
+        'name': '%s: %s' % (backend, operation),
+        'backend': backend,
+        'operation': operation,
+        'concurrency': concurrency,
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'seconds': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'p50': milliseconds(percentile(latencies, 50)),
+            'p90': milliseconds(percentile(latencies, 90)),
+            'p99': milliseconds(percentile(latencies, 99)),
+            'max': milliseconds(latencies[-1] if latencies else None)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--backend', action='append', choices=sorted(BACKENDS),
+        help='the backends to benchmark, all the installed ones by default')
+    parser.add_argument('--operation', action='append', choices=OPERATIONS)
+    parser.add_argument('--requests', type=int, default=2000, help='requests per run')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=100, help='requests before measuring')
+    parser.add_argument('--latency', type=float, default=0, help='seconds the stand-in server adds to each request')
+    parser.add_argument('--error-rate', type=float, default=0, help='probability for a request to fail with a 500')
+    parser.add_argument('--seed', type=int, help='the seed of the errors of the stand-in server')
+    parser.add_argument('--url', help='the server to benchmark against, a stand-in server by default')
+    parser.add_argument('--json', metavar='PATH', help="write the results to PATH, '-' for stdout")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server, port = start_server(args.latency, args.error_rate, args.seed)
+        url = 'http://127.0.0.1:%d' % port
+
+    # keep stdout for the JSON when it is written there
+    out = sys.stderr if args.json == '-' else sys.stdout
+    results = []
+    try:
+        for backend in args.backend or sorted(BACKENDS):
+            try:
+                load_backend(backend)
+
+            except ImportError as e:
+                print('%-28s skipped: %s' % (backend, e), file=out)
+                continue
+
+            for operation in args.operation or OPERATIONS:
+                result = summarize(
+                    backend, operation, args.concurrency,
+                    *benchmark(backend, url, operation, args.requests, args.concurrency, args.warmup))
+                results.append(result)
+                print('%-28s %8.0f req/s  p50 %6.2f  p90 %6.2f  p99 %6.2f ms  %d errors' % (
+                    result['name'], result['throughput'], result['latency_ms']['p50'] or 0,
+                    result['latency_ms']['p90'] or 0, result['latency_ms']['p99'] or 0,
+                    result['errors']), file=out)
+
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        write_results('throughput', results, args.json)
+
+
+if __name__ == '__main__':
+    main()
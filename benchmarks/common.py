@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Helpers shared by the benchmarks: timing, percentiles and the JSON
+result files compared between releases by benchmarks.compare.
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import asyncio
+import json
+import platform
+import sys
+import time
+import timeit
+
+from pusher.version import VERSION
+
+# Bumped when the layout of the result files changes
+FORMAT_VERSION = 1
+
+
+def environment():
+    return {
+        'pusher': VERSION,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def run(coroutine):
+    """Runs a coroutine on a new event loop and returns its result, like
+    asyncio.run which is only available from Python 3.7."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+
+    finally:
+        loop.close()
+
+
+def time_per_call(func, number, repeat=5):
+    """Returns the best and the median number of seconds per call of func,
+    over repeat runs of number calls."""
+    runs = sorted(t / number for t in timeit.repeat(func, number=number, repeat=repeat))
+    return runs[0], runs[len(runs) // 2]
+
+
+def percentile(ordered, q):
+    """Returns the q-th percentile (0 to 100) of a sorted list, by the
+    nearest-rank method."""
+    if not ordered:
+        return None
+
+    rank = max(int(-(-q * len(ordered) // 100)), 1)
+    return ordered[rank - 1]
+
+
+def write_results(benchmark, results, path):
+    """Writes the results to path as JSON, '-' for stdout."""
+    document = {
+        'format': FORMAT_VERSION,
+        'benchmark': benchmark,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'environment': environment(),
+        'results': results,
+    }
+
+    if path == '-':
+        json.dump(document, sys.stdout, indent=2, sort_keys=True)
+        print()
+        return
+
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write('\n')
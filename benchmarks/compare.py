@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Compares two result files written by the benchmarks, e.g. of the last
+release and of the working tree, and exits with status 1 when a result
+regressed by more than the threshold.
+
+    python -m benchmarks.compare BASELINE.json CURRENT.json [--threshold PERCENT]
+"""
+
+from __future__ import print_function, absolute_import, division
+
+import argparse
+import json
+import sys
+
+# benchmark: [(metric, whether higher is better)]
+METRICS = {
+    'micro': [('best', False)],
+    'nonce': [('best', False)],
+    'throughput': [('throughput', True), ('latency_ms.p99', False)],
+}
+
+
+def metric(result, path):
+    for key in path.split('.'):
+        result = result.get(key) if result is not None else None
+
+    return result
+
+
+def compare(baseline, current, threshold):
+    """Yields the name, the metric, the baseline and current values, the
+    relative change and whether it is a regression, for every result found
+    in both documents."""
+    if baseline['benchmark'] != current['benchmark']:
+        raise ValueError("Can't compare %s results with %s results" % (
+            baseline['benchmark'], current['benchmark']))
+
+    previous = dict((result['name'], result) for result in baseline['results'])
+    for result in current['results']:
+        old = previous.get(result['name'])
+        if old is None:
+            continue
+
+        for path, higher_is_better in METRICS[current['benchmark']]:
+            before, after = metric(old, path), metric(result, path)
+            if not before or after is None:
+                continue
+
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            yield result['name'], path, before, after, change, worse * 100 > threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=10, help='the tolerated regression in percent')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    with open(args.current) as f:
+        current = json.load(f)
+
+    regressed = False
+    for name, path, before, after, change, regression in compare(baseline, current, args.threshold):
+        regressed = regressed or regression
+        print('%-28s %-16s %12.3f -> %12.3f  %+7.1f%%%s' % (
+            name, path, before, after, change * 100, '  REGRESSION' if regression else ''))
+
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,34 +10,86 @@ import aiohttp
 import asyncio
 
 from pusher.http import process_response
+from pusher.util import LoopBound
 
 
 class AsyncIOBackend:
-    def __init__(self, client):
-        """Adapter for the requests module.
+    """Adapter for the aiohttp module.
 
-        :param client:  pusher.Client object
-        """
+    A single aiohttp.ClientSession is created on first use and kept open so
+    connections are reused between requests. Call ``aclose()``, or use the
+    backend as an async context manager, to release it.
+
+    :param client:            pusher.Client object
+    :param limit:             maximum number of simultaneous connections
+    :param limit_per_host:    maximum number of simultaneous connections to
+      the same endpoint, 0 for no limit
+    :param keepalive_timeout: seconds an idle connection is kept open
+    :param ttl_dns_cache:     seconds a DNS lookup is cached, None to cache
+      forever
+    :param options:           key-value passed into session.request
+    """
+    connection_errors = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+    is_async = True
+
+    def __init__(
+            self,
+            client,
+            limit=100,
+            limit_per_host=0,
+            keepalive_timeout=15,
+            ttl_dns_cache=10,
+            **options):
         self.client = client
+        self.options = options
+        self._connector_options = {
+            'limit': limit,
+            'limit_per_host': limit_per_host,
+            'keepalive_timeout': keepalive_timeout,
+            'ttl_dns_cache': ttl_dns_cache}
+        self._sessions = LoopBound(
+            self._create_session, lambda session: session.closed,
+            lambda session: session.close())
+
+
+    async def __aenter__(self):
+        return self
+
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
 
 
-    @asyncio.coroutine
-    def send_request(self, request):
-        session = response = None
-        try:
-            session = aiohttp.ClientSession()
-            response = yield from session.request(
+    @property
+    def session(self):
+        """The shared session, created for the running event loop on first
+        access. A session can't be shared between event loops, so a new one
+        is created when the running loop changes, and the previous one is
+        closed.
+        """
+        return self._sessions.get()
+
+
+    def _create_session(self):
+        connector = aiohttp.TCPConnector(**self._connector_options)
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.client.timeout))
+
+
+    async def send_request(self, request):
+        async with self.session.request(
                 request.method,
                 "%s%s" % (request.base_url, request.path),
                 params=request.query_params,
                 data=request.body,
                 headers=request.headers,
-                timeout=self.client.timeout
-            )
-            body = yield from response.text('utf-8')
-            return process_response(response.status, body)
-        finally:
-            if response is not None:
-                response.close()
-            if session is not None:
-                yield from session.close()
+                **self.options) as response:
+            body = await response.text('utf-8')
+            return process_response(
+                response.status, body, response.headers, self.client.json_codec)
+
+
+    async def aclose(self):
+        """Closes the shared session and its connections."""
+        await self._sessions.aclose()
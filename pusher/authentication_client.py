@@ -19,15 +19,19 @@ from pusher.util import (
     ensure_text,
     ensure_binary,
     validate_channel,
+    validate_channels,
     validate_socket_id,
     validate_user_data,
-    channel_name_re
+    channel_name_re,
+    SERVER_TO_USER_PREFIX
 )
 
+from pusher import instrumentation
+from pusher.cache import TTLCache
 from pusher.client import Client
 from pusher.http import GET, POST, Request, request_method
-from pusher.signature import sign, verify
 from pusher.crypto import *
+from pusher.webhooks import WebhookDispatcher, WebhookVerifier, is_fresh
 
 
 class AuthenticationClient(Client):
@@ -46,6 +50,14 @@ class AuthenticationClient(Client):
         json_encoder=None,
         json_decoder=None,
         backend=None,
+        retry=None,
+        circuit_breaker=None,
+        json_codec=None,
+        encryption_cache_size=1024,
+        nonce_source=None,
+        auth_cache_size=0,
+        auth_cache_ttl=60,
+        webhook_replay_store=None,
         **backend_options):
 
         super(AuthenticationClient, self).__init__(
@@ -62,8 +74,32 @@ class AuthenticationClient(Client):
             json_encoder,
             json_decoder,
             backend,
+            retry=retry,
+            circuit_breaker=circuit_breaker,
+            json_codec=json_codec,
+            encryption_cache_size=encryption_cache_size,
+            nonce_source=nonce_source,
             **backend_options)
 
+        self._webhook_dispatcher = WebhookDispatcher()
+        self._webhook_replay_store = webhook_replay_store
+
+        self._auth_cache = None
+        if auth_cache_size:
+            self._auth_cache = TTLCache(auth_cache_size, auth_cache_ttl)
+
+    @property
+    def auth_cache(self):
+        return self._auth_cache
+
+    @property
+    def webhook_dispatcher(self):
+        return self._webhook_dispatcher
+
+    @property
+    def webhook_replay_store(self):
+        return self._webhook_replay_store
+
     def authenticate(self, channel, socket_id, custom_data=None):
         """Used to generate delegated client subscription token.
 
@@ -71,55 +107,142 @@ class AuthenticationClient(Client):
         :param socket_id: id of the socket that requires authorization
         :param custom_data: used on presence channels to provide user info
         """
-        channel = validate_channel(channel)
+        if instrumentation.enabled:
+            return instrumentation.instrument(
+                'authenticate', lambda: self._authenticate(channel, socket_id, custom_data))
 
-        if not channel_name_re.match(channel):
-            raise ValueError('Channel should be a valid channel, got: %s' % channel)
+        return self._authenticate(channel, socket_id, custom_data)
 
+    def _authenticate(self, channel, socket_id, custom_data):
+        channel = self._validate_auth_channel(channel)
         socket_id = validate_socket_id(socket_id)
 
         if custom_data:
-            custom_data = json.dumps(custom_data, cls=self._json_encoder)
+            custom_data = self._json_codec.dumps(custom_data)
+
+        if self._auth_cache is not None:
+            cache_key = ("channel", socket_id, channel, custom_data or None)
+            cached = self._auth_cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
 
         string_to_sign = "%s:%s" % (socket_id, channel)
 
         if custom_data:
             string_to_sign += ":%s" % custom_data
 
-        signature = sign(self.secret, string_to_sign)
+        signature = self.signer.sign(string_to_sign)
 
         auth = "%s:%s" % (self.key, signature)
         response_payload = {"auth": auth}
 
         if is_encrypted_channel(channel):
-            shared_secret = generate_shared_secret(
-                ensure_binary(channel, "channel"), self._encryption_master_key)
+            shared_secret = self._shared_secret(channel)
             shared_secret_b64 = base64.b64encode(shared_secret)
             response_payload["shared_secret"] = shared_secret_b64
 
         if custom_data:
             response_payload['channel_data'] = custom_data
 
+        if self._auth_cache is not None:
+            self._auth_cache.put(cache_key, dict(response_payload))
+
         return response_payload
 
+    def authenticate_many(self, socket_id, channels, custom_data=None):
+        """Generates the subscription tokens of one socket for several
+        channels at once, returning a dict of channel name to the payload
+        authenticate would return for it.
+
+        :param socket_id: id of the socket that requires authorization
+        :param channels: names of the channels to authorize subscription to
+        :param custom_data: used on presence channels to provide user info
+        """
+        if isinstance(channels, six.string_types):
+            channels = [channels]
+
+        socket_id = validate_socket_id(socket_id)
+        channels = validate_channels(channels)
+        for channel in channels:
+            if channel.startswith(SERVER_TO_USER_PREFIX):
+                raise ValueError('Channel should be a valid channel, got: %s' % channel)
+
+        suffix = ""
+        if custom_data:
+            custom_data = self._json_codec.dumps(custom_data)
+            suffix = ":%s" % custom_data
+
+        signatures = self.signer.sign_many(
+            (channel + suffix for channel in channels), prefix="%s:" % socket_id)
+
+        payloads = {}
+        for channel, signature in zip(channels, signatures):
+            response_payload = {"auth": "%s:%s" % (self.key, signature)}
+
+            if is_encrypted_channel(channel):
+                shared_secret = self._shared_secret(channel)
+                response_payload["shared_secret"] = base64.b64encode(shared_secret)
+
+            if custom_data:
+                response_payload['channel_data'] = custom_data
+
+            payloads[channel] = response_payload
+
+        return payloads
+
+    def _validate_auth_channel(self, channel):
+        channel = validate_channel(channel)
+
+        # validate_channel only lets server to user channels through besides
+        # the channels matching channel_name_re
+        if channel.startswith(SERVER_TO_USER_PREFIX):
+            raise ValueError('Channel should be a valid channel, got: %s' % channel)
+
+        return channel
+
+    def _shared_secret(self, channel):
+        channel = ensure_binary(channel, "channel")
+        if self._secret_box_cache is None:
+            return generate_shared_secret(channel, self._encryption_master_key)
+
+        shared_secret, _ = self._secret_box_cache.get(
+            channel, self._encryption_master_key)
+        return shared_secret
+
     def authenticate_user(self, socket_id, user_data=None):
         """Creates a user authentication signature.
 
         :param socket_id: id of the socket that requires authorization
         :param user_data: used to provide user info
         """
+        if instrumentation.enabled:
+            return instrumentation.instrument(
+                'authenticate_user', lambda: self._authenticate_user(socket_id, user_data))
+
+        return self._authenticate_user(socket_id, user_data)
+
+    def _authenticate_user(self, socket_id, user_data):
         validate_user_data(user_data)
         socket_id = validate_socket_id(socket_id)
 
-        user_data_encoded = json.dumps(user_data, cls=self._json_encoder)
+        user_data_encoded = self._json_codec.dumps(user_data)
+
+        if self._auth_cache is not None:
+            cache_key = ("user", socket_id, user_data_encoded)
+            cached = self._auth_cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
 
         string_to_sign = "%s::user::%s" % (socket_id, user_data_encoded)
 
-        signature = sign(self.secret, string_to_sign)
+        signature = self.signer.sign(string_to_sign)
 
         auth_response = "%s:%s" % (self.key, signature)
         response_payload = {"auth": auth_response, 'user_data': user_data_encoded}
 
+        if self._auth_cache is not None:
+            self._auth_cache.put(cache_key, dict(response_payload))
+
         return response_payload
 
     def validate_webhook(self, key, signature, body):
@@ -128,30 +251,98 @@ class AuthenticationClient(Client):
 
         :param key: key used to sign the body
         :param signature: signature that was given with the body
-        :param body: content that needs to be verified
+        :param body: content that needs to be verified, either text or the
+          raw bytes, bytearray or memoryview, which are verified and parsed
+          without being decoded first
+
+        When the client has a webhook_replay_store, the returned body has a
+        'duplicate' key set to True if the webhook was seen before.
         """
+        if instrumentation.enabled:
+            return instrumentation.instrument(
+                'validate_webhook', lambda: self._validate_webhook(key, signature, body))
+
+        return self._validate_webhook(key, signature, body)
+
+    def _validate_webhook(self, key, signature, body):
         key = ensure_text(key, "key")
         signature = ensure_text(signature, "signature")
-        body = ensure_text(body, "body")
+        if not isinstance(body, (bytes, bytearray, memoryview)):
+            body = ensure_text(body, "body")
 
         if key != self.key:
             return None
 
-        if not verify(self.secret, body, signature):
+        verify = self.signer.verify
+        loads = self._json_codec.loads
+        record = instrumentation.current() if instrumentation.enabled else None
+        if record is not None:
+            record.request_bytes = len(body)
+            verify = instrumentation.timed(verify, 'verify')
+            loads = instrumentation.timed(loads, 'parse')
+
+        if not verify(body, signature):
             return None
 
         try:
-            body_data = json.loads(body, cls=self._json_decoder)
+            body_data = loads(body)
 
         except ValueError:
             return None
 
-        time_ms = body_data.get('time_ms')
-        if not time_ms:
+        if not is_fresh(body_data.get('time_ms')):
             return None
 
-        if abs(time.time() * 1000 - time_ms) > 300000:
-            return None
+        if self._webhook_replay_store is not None:
+            body_data['duplicate'] = not self._webhook_replay_store.add(signature)
+
+        return body_data
+
+    def on_webhook(self, event_name, handler=None, channel_prefix=''):
+        """Registers a handler for the webhook events of a given name, and
+        optionally whose channel starts with channel_prefix, called by
+        handle_webhook. Used without a handler, returns a decorator.
+
+        :param event_name: e.g. 'channel_occupied', 'member_added', or None
+          for all events
+        :param handler: a callable taking the event dict
+        :param channel_prefix: e.g. 'presence-'
+        """
+        return self._webhook_dispatcher.on(event_name, handler, channel_prefix)
+
+    def handle_webhook(self, key, signature, body, executor=None, max_concurrency=None):
+        """Validates a webhook like validate_webhook, then calls the handlers
+        registered with on_webhook for each of its events, unless it is a
+        duplicate. Returns the validated body, or None if it isn't valid.
+
+        :param executor: a concurrent.futures.Executor to run the handlers on
+        :param max_concurrency: the maximum number of handlers in flight
+        """
+        body_data = self.validate_webhook(key, signature, body)
+        if body_data is not None and not body_data.get('duplicate'):
+            self._webhook_dispatcher.dispatch(
+                body_data.get('events', ()), executor, max_concurrency)
+
+        return body_data
+
+    async def handle_webhook_async(self, key, signature, body, max_concurrency=None):
+        """Same as handle_webhook, running the handlers concurrently on the
+        running event loop and awaiting the coroutine ones.
+        """
+        body_data = self.validate_webhook(key, signature, body)
+        if body_data is not None and not body_data.get('duplicate'):
+            await self._webhook_dispatcher.dispatch_async(
+                body_data.get('events', ()), max_concurrency)
 
         return body_data
 
+    def webhook_verifier(self, key, signature, max_size=None):
+        """Returns a WebhookVerifier to validate a webhook whose body is
+        received in chunks, and to iterate over its events.
+
+        :param key: key used to sign the body
+        :param signature: signature that was given with the body
+        :param max_size: the maximum size of the body in bytes
+        """
+        return WebhookVerifier(self, key, signature, max_size)
+
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import collections
+import threading
+import time
+
+
+class LRUCache(object):
+    """A thread-safe mapping keeping at most maxsize entries, evicting the
+    least recently used one first, and counting hits and misses.
+
+    :param maxsize: the maximum number of entries
+    """
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError("maxsize should be at least 1")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def __len__(self):
+        return len(self._data)
+
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+    def stats(self):
+        """Returns the hits, misses and current size of the cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'maxsize': self.maxsize}
+
+
+class TTLCache(LRUCache):
+    """An LRUCache whose entries also expire ttl seconds after they were
+    put, counting evictions and expirations on top of hits and misses.
+
+    :param maxsize: the maximum number of entries
+    :param ttl: the number of seconds an entry is kept for
+    :param clock: a callable returning the current time in seconds
+    """
+    def __init__(self, maxsize=1024, ttl=60, clock=time.monotonic):
+        super(TTLCache, self).__init__(maxsize)
+
+        if ttl <= 0:
+            raise ValueError("ttl should be positive")
+
+        self.ttl = ttl
+        self.evictions = 0
+        self.expirations = 0
+        self._clock = clock
+
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+
+    def stats(self):
+        """Returns the hits, misses, evictions, expirations and current size
+        of the cache."""
+        stats = super(TTLCache, self).stats()
+        with self._lock:
+            stats.update({
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'ttl': self.ttl})
+
+        return stats
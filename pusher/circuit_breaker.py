@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import collections
+import inspect
+import threading
+import time
+
+from pusher.errors import PusherCircuitOpen
+from pusher.retry import is_transient_error
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitBreaker(object):
+    """Fails fast with PusherCircuitOpen while the API host is unhealthy.
+
+    The breaker trips open when, over the last ``window`` seconds, at least
+    ``min_calls`` calls were made and the share of them that failed with a
+    transient error (5xx, 429, connection error) or took longer than
+    ``slow_call_duration`` reaches ``failure_rate``. After ``reset_timeout``
+    seconds it lets ``half_open_max_calls`` probe calls through: the breaker
+    closes again if they all succeed and reopens as soon as one fails. A
+    cancelled probe frees its slot, and probes neither succeeding nor
+    failing within ``reset_timeout``, like responses never awaited, are
+    replaced by new ones.
+
+    Use ``CircuitBreaker.for_host`` to share one breaker between all the
+    clients talking to the same host and port.
+
+    :param failure_rate:        the share of failed calls tripping the breaker
+    :param min_calls:           the number of calls in the window needed
+      before the breaker may trip
+    :param window:              seconds of history taken into account
+    :param slow_call_duration:  seconds after which a call counts as failed,
+      None to ignore latency
+    :param reset_timeout:       seconds to stay open before probing
+    :param half_open_max_calls: the number of probe calls while half open
+    """
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(
+            self,
+            failure_rate=0.5,
+            min_calls=20,
+            window=10,
+            slow_call_duration=None,
+            reset_timeout=30,
+            half_open_max_calls=1):
+        if not 0 < failure_rate <= 1:
+            raise ValueError("failure_rate should be between 0 and 1")
+
+        if half_open_max_calls < 1:
+            raise ValueError("half_open_max_calls should be at least 1")
+
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.slow_call_duration = slow_call_duration
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._calls = collections.deque()
+        self._failures = 0
+        self._state = CLOSED
+        self._opened_at = None
+        self._half_opened_at = None
+        self._probes = 0
+        self._probe_successes = 0
+
+
+    @classmethod
+    def for_host(cls, host, port, **options):
+        """Returns the breaker shared by every client of the given host and
+        port, creating it with the given options on first use.
+        """
+        with cls._registry_lock:
+            breaker = cls._registry.get((host, port))
+            if breaker is None:
+                breaker = cls._registry[(host, port)] = cls(**options)
+
+            return breaker
+
+
+    @property
+    def state(self):
+        """One of 'closed', 'open' or 'half_open'."""
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+
+    def stats(self):
+        """Returns the state and the calls and failures in the window, for
+        health checks.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            return {
+                'state': self._current_state(now),
+                'calls': len(self._calls),
+                'failures': self._failures}
+
+
+    def wrap(self, send, backend=None):
+        """Returns send guarded by the breaker. Awaitable responses are
+        recorded once awaited.
+
+        :param send: a function sending a request, like a backend's
+          send_request
+        :param backend: the backend whose connection errors count as failures
+        """
+        def guarded_send(request):
+            probe = self._acquire()
+            started = time.monotonic()
+
+            try:
+                response = send(request)
+
+            except Exception as e:
+                self._record(started, e, backend)
+                raise
+
+            except BaseException:
+                self._release(probe)
+                raise
+
+            if inspect.isawaitable(response):
+                return self._await(response, started, backend, probe)
+
+            self._record(started, None, backend)
+            return response
+
+        return guarded_send
+
+
+    def reset(self):
+        """Closes the breaker and forgets the recorded calls."""
+        with self._lock:
+            self._close()
+
+
+    async def _await(self, response, started, backend, probe):
+        try:
+            result = await response
+
+        except Exception as e:
+            self._record(started, e, backend)
+            raise
+
+        except BaseException:
+            # cancelled, which says nothing about the health of the host
+            self._release(probe)
+            raise
+
+        self._record(started, None, backend)
+        return result
+
+
+    def _current_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._half_open(now)
+
+        elif self._state == HALF_OPEN and self._probes >= self.half_open_max_calls \
+                and now - self._half_opened_at >= self.reset_timeout:
+            # the probes never completed, let new ones through
+            self._half_open(now)
+
+        return self._state
+
+
+    def _acquire(self):
+        """Raises PusherCircuitOpen unless a call may be made. Returns the
+        half open window the call probes, or None when closed."""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+
+            if state == OPEN:
+                raise PusherCircuitOpen("The circuit breaker is open")
+
+            if state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    raise PusherCircuitOpen("The circuit breaker is half open")
+
+                self._probes += 1
+                return self._half_opened_at
+
+            return None
+
+
+    def _release(self, probe):
+        """Frees the probe slot of a call which didn't complete."""
+        with self._lock:
+            if probe is not None and self._state == HALF_OPEN and probe == self._half_opened_at:
+                self._probes -= 1
+
+
+    def _record(self, started, error, backend):
+        now = time.monotonic()
+        failed = error is not None and is_transient_error(error, backend)
+        if self.slow_call_duration is not None and now - started > self.slow_call_duration:
+            failed = True
+
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if failed:
+                    self._open(now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_max_calls:
+                        self._close()
+
+                return
+
+            if self._state == OPEN:
+                return
+
+            self._calls.append((now, failed))
+            self._failures += failed
+            self._trim(now)
+
+            calls = len(self._calls)
+            if calls >= self.min_calls and self._failures >= self.failure_rate * calls:
+                self._open(now)
+
+
+    def _trim(self, now):
+        while self._calls and now - self._calls[0][0] > self.window:
+            _, failed = self._calls.popleft()
+            self._failures -= failed
+
+
+    def _half_open(self, now):
+        self._state = HALF_OPEN
+        self._half_opened_at = now
+        self._probes = 0
+        self._probe_successes = 0
+
+
+    def _open(self, now):
+        self._state = OPEN
+        self._opened_at = now
+        self._calls.clear()
+        self._failures = 0
+
+
+    def _close(self):
+        self._state = CLOSED
+        self._opened_at = None
+        self._calls.clear()
+        self._failures = 0
@@ -9,7 +9,11 @@ from __future__ import (
 import six
 
 from pusher.util import ensure_text, ensure_binary, app_id_re
-from pusher.crypto import parse_master_key
+from pusher.crypto import parse_master_key, BufferedNonceSource, SecretBoxCache
+from pusher.response_cache import ResponseCache
+from pusher.circuit_breaker import CircuitBreaker
+from pusher.codec import get_codec
+from pusher.signature import Signer
 
 
 class Client(object):
@@ -28,6 +32,12 @@ class Client(object):
             json_encoder=None,
             json_decoder=None,
             backend=None,
+            retry=None,
+            circuit_breaker=None,
+            json_codec=None,
+            encryption_cache_size=1024,
+            nonce_source=None,
+            response_cache=None,
             **backend_options):
 
         if backend is None:
@@ -40,6 +50,7 @@ class Client(object):
 
         self._key = ensure_text(key, "key")
         self._secret = ensure_text(secret, "secret")
+        self._signer = Signer(self._secret)
 
         if not isinstance(ssl, bool):
               raise TypeError("SSL should be a boolean")
@@ -66,8 +77,28 @@ class Client(object):
         self._timeout = timeout
         self._json_encoder = json_encoder
         self._json_decoder = json_decoder
+        self._json_codec = get_codec(json_codec, json_encoder, json_decoder)
+        self._retry = retry
+
+        if circuit_breaker is True:
+            circuit_breaker = CircuitBreaker.for_host(self._host, self._port)
+
+        self._circuit_breaker = circuit_breaker or None
 
         self._encryption_master_key = parse_master_key(encryption_master_key, encryption_master_key_base64)
+        self._secret_box_cache = None
+        if encryption_cache_size:
+            self._secret_box_cache = SecretBoxCache(encryption_cache_size)
+
+        if nonce_source is True:
+            nonce_source = BufferedNonceSource()
+
+        self._nonce_source = nonce_source or None
+
+        if response_cache is True:
+            response_cache = ResponseCache()
+
+        self._response_cache = response_cache or None
 
         self.http = backend(self, **backend_options)
 
@@ -84,6 +115,10 @@ class Client(object):
     def secret(self):
         return self._secret
 
+    @property
+    def signer(self):
+        return self._signer
+
     @property
     def host(self):
         return self._host
@@ -100,6 +135,30 @@ class Client(object):
     def ssl(self):
         return self._ssl
 
+    @property
+    def json_codec(self):
+        return self._json_codec
+
+    @property
+    def secret_box_cache(self):
+        return self._secret_box_cache
+
+    @property
+    def nonce_source(self):
+        return self._nonce_source
+
+    @property
+    def response_cache(self):
+        return self._response_cache
+
+    @property
+    def retry(self):
+        return self._retry
+
+    @property
+    def circuit_breaker(self):
+        return self._circuit_breaker
+
     @property
     def scheme(self):
         return 'https' if self.ssl else 'http'
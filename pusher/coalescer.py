@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import six
+import threading
+import time
+
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from pusher.http import is_async_backend
+from pusher.util import validate_socket_id
+
+
+class TriggerCoalescer(object):
+    """Buffers single channel triggers and sends them as batch events.
+
+    Pending events are flushed through ``trigger_batch`` as soon as
+    ``max_batch_size`` of them are waiting, or ``linger`` seconds after the
+    first of them was buffered. Each call to ``trigger`` returns a
+    ``concurrent.futures.Future`` resolving to the API response for that
+    event. Triggers to several channels at once are not coalesced and are
+    sent on their own. Only synchronous backends are supported, TypeError
+    is raised with the others.
+
+    :param client: a pusher.PusherClient instance
+    :param max_batch_size: maximum number of events sent in one batch
+    :param linger: seconds to wait for a batch to fill up before sending
+    :param max_in_flight: number of batches which may be sent concurrently
+    """
+    def __init__(self, client, max_batch_size=10, linger=0.005, max_in_flight=4):
+        if not isinstance(max_batch_size, six.integer_types) or max_batch_size < 1:
+            raise ValueError("max_batch_size should be a positive integer")
+
+        if linger < 0:
+            raise ValueError("linger should not be negative")
+
+        if is_async_backend(client.http):
+            raise TypeError("TriggerCoalescer only supports synchronous backends")
+
+        self._client = client
+        self._max_batch_size = max_batch_size
+        self._linger = linger
+        # (event, future, deadline) in the order they were triggered
+        self._pending = []
+        self._flush_count = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._flusher = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+    def trigger(self, channels, event_name, data, socket_id=None):
+        """Queues an event for the next batch, see PusherClient.trigger.
+
+        Invalid arguments raise immediately; errors from the API are set on
+        the returned future.
+        """
+        if isinstance(channels, six.string_types):
+            channels = [channels]
+
+        if not isinstance(channels, list) or len(channels) != 1:
+            return self._submit(
+                self._client.trigger, channels, event_name, data, socket_id)
+
+        event = {'channel': channels[0], 'name': event_name, 'data': data}
+        if socket_id:
+            event['socket_id'] = validate_socket_id(socket_id)
+
+        event = self._client._encode_batch_event(event)
+
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The coalescer has been closed")
+
+            self._pending.append((event, future, time.monotonic() + self._linger))
+            self._start_flusher()
+            self._condition.notify()
+
+        return future
+
+
+    def flush(self):
+        """Sends the pending events without waiting for the linger deadline."""
+        with self._condition:
+            self._flush_count = len(self._pending)
+            self._condition.notify()
+
+
+    def close(self, wait=True):
+        """Sends the pending events and stops accepting new ones.
+
+        :param wait: block until every pending batch has been sent,
+          otherwise they are sent in the background
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            flusher = self._flusher
+
+        if flusher is None:
+            self._executor.shutdown(wait=wait)
+
+        elif wait:
+            # the flusher shuts the executor down once it has submitted the
+            # last batch
+            flusher.join()
+            self._executor.shutdown(wait=True)
+
+
+    def _submit(self, fn, *args):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The coalescer has been closed")
+
+            return self._executor.submit(fn, *args)
+
+
+    def _start_flusher(self):
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._run, name="pusher-coalescer")
+            self._flusher.daemon = True
+            self._flusher.start()
+
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+
+                if not self._pending:
+                    break
+
+                # wait until the oldest pending event reaches its deadline
+                while len(self._pending) < self._max_batch_size and \
+                        not self._closed and not self._flush_count:
+                    remaining = self._pending[0][2] - time.monotonic()
+                    if remaining <= 0:
+                        break
+
+                    self._condition.wait(remaining)
+
+                batch = self._pending[:self._max_batch_size]
+                self._pending = self._pending[self._max_batch_size:]
+                self._flush_count = max(self._flush_count - len(batch), 0)
+
+            self._executor.submit(self._send, batch)
+
+        self._executor.shutdown(wait=False)
+
+
+    def _send(self, batch):
+        batch = [
+            (event, future) for event, future, _ in batch
+            if future.set_running_or_notify_cancel()]
+
+        if not batch:
+            return
+
+        try:
+            response = self._client.trigger_batch(
+                [event for event, _ in batch], already_encoded=True)
+
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+
+            return
+
+        results = None
+        if isinstance(response, dict):
+            results = response.get('batch')
+
+        if not isinstance(results, list) or len(results) != len(batch):
+            results = [response] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
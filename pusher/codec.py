@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import json
+
+
+class JSONCodec(object):
+    """Encodes and decodes JSON with the standard library json module.
+
+    This is the default codec. Subclasses use faster libraries, and fall
+    back to this implementation where they can't honour the custom encoder
+    or decoder classes.
+
+    :param json_encoder: a json.JSONEncoder subclass, or None
+    :param json_decoder: a json.JSONDecoder subclass, or None
+    """
+    name = 'json'
+
+    def __init__(self, json_encoder=None, json_decoder=None):
+        self.json_encoder = json_encoder
+        self.json_decoder = json_decoder
+
+
+    def dumps(self, obj, ensure_ascii=True):
+        """Serialises obj to text with the custom encoder."""
+        if ensure_ascii:
+            return json.dumps(obj, cls=self.json_encoder)
+
+        return json.dumps(obj, cls=self.json_encoder, ensure_ascii=False)
+
+
+    def dumpb(self, obj):
+        """Serialises obj, made of plain JSON types, to UTF-8 bytes."""
+        return json.dumps(obj).encode('utf8')
+
+
+    def loads(self, s):
+        """Parses a str, or a UTF-8 bytes, bytearray or memoryview document
+        with the custom decoder."""
+        if isinstance(s, memoryview):
+            s = s.tobytes()
+
+        return json.loads(s, cls=self.json_decoder)
+
+
+    def _default(self):
+        if self.json_encoder is None:
+            return None
+
+        return self.json_encoder().default
+
+
+class OrjsonCodec(JSONCodec):
+    """Encodes and decodes JSON with orjson. Non ASCII characters are never
+    escaped, and objects with integers beyond 64 bits are encoded with the
+    standard library. Unlike the standard library, NaN and infinities are
+    encoded as null, integers beyond 64 bits are decoded as floats, and NaN
+    and Infinity literals are rejected, so this codec isn't picked by 'auto'.
+    """
+    name = 'orjson'
+
+    def __init__(self, json_encoder=None, json_decoder=None):
+        super(OrjsonCodec, self).__init__(json_encoder, json_decoder)
+        import orjson
+        self._orjson = orjson
+        self._default_hook = self._default()
+
+
+    def dumps(self, obj, ensure_ascii=True):
+        return self.dumpb(obj).decode('utf8')
+
+
+    def dumpb(self, obj):
+        try:
+            return self._orjson.dumps(
+                obj, default=self._default_hook, option=self._orjson.OPT_NON_STR_KEYS)
+
+        except self._orjson.JSONEncodeError:
+            # raised for integers beyond 64 bits, as well as for objects the
+            # standard library rejects too
+            return super(OrjsonCodec, self).dumps(obj, ensure_ascii=False).encode('utf8')
+
+
+    def loads(self, s):
+        if self.json_decoder is not None:
+            return super(OrjsonCodec, self).loads(s)
+
+        return self._orjson.loads(s)
+
+
+class MsgspecCodec(JSONCodec):
+    """Encodes and decodes JSON with msgspec. Non ASCII characters are never
+    escaped. Unlike the standard library, NaN and infinities are encoded as
+    null, and NaN and Infinity literals are rejected, so this codec isn't
+    picked by 'auto'.
+    """
+    name = 'msgspec'
+
+    def __init__(self, json_encoder=None, json_decoder=None):
+        super(MsgspecCodec, self).__init__(json_encoder, json_decoder)
+        import msgspec.json
+        self._encoder = msgspec.json.Encoder(enc_hook=self._default())
+        self._decoder = msgspec.json.Decoder()
+
+
+    def dumps(self, obj, ensure_ascii=True):
+        return self._encoder.encode(obj).decode('utf8')
+
+
+    def dumpb(self, obj):
+        return self._encoder.encode(obj)
+
+
+    def loads(self, s):
+        if self.json_decoder is not None:
+            return super(MsgspecCodec, self).loads(s)
+
+        return self._decoder.decode(s)
+
+
+class UjsonCodec(JSONCodec):
+    """Encodes and decodes JSON with ujson. ujson serialises some types, like
+    Decimal, natively, so the standard library is used when a custom encoder
+    is set.
+    """
+    name = 'ujson'
+
+    def __init__(self, json_encoder=None, json_decoder=None):
+        super(UjsonCodec, self).__init__(json_encoder, json_decoder)
+        import ujson
+        self._ujson = ujson
+
+
+    def dumps(self, obj, ensure_ascii=True):
+        if self.json_encoder is not None:
+            return super(UjsonCodec, self).dumps(obj, ensure_ascii)
+
+        return self._ujson.dumps(
+            obj, ensure_ascii=ensure_ascii, escape_forward_slashes=False)
+
+
+    def dumpb(self, obj):
+        return self.dumps(obj, ensure_ascii=False).encode('utf8')
+
+
+    def loads(self, s):
+        if self.json_decoder is not None:
+            return super(UjsonCodec, self).loads(s)
+
+        if isinstance(s, memoryview):
+            s = s.tobytes()
+
+        return self._ujson.loads(s)
+
+
+CODECS = {
+    codec.name: codec
+    for codec in (JSONCodec, OrjsonCodec, MsgspecCodec, UjsonCodec)}
+
+# Codecs tried, in order, by get_codec('auto'): those encoding every value
+# like the standard library
+AUTO_ORDER = ('ujson', 'json')
+
+
+def get_codec(codec=None, json_encoder=None, json_decoder=None):
+    """Returns a codec instance.
+
+    :param codec: None or 'json' for the standard library, 'orjson',
+      'msgspec' or 'ujson', 'auto' for ujson when it is installed, or a
+      JSONCodec instance which is returned as is
+    :param json_encoder: a json.JSONEncoder subclass, or None
+    :param json_decoder: a json.JSONDecoder subclass, or None
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+
+    if codec is None:
+        codec = 'json'
+
+    if codec == 'auto':
+        for name in AUTO_ORDER:
+            try:
+                return CODECS[name](json_encoder, json_decoder)
+
+            except ImportError:
+                continue
+
+    if codec not in CODECS:
+        raise ValueError(
+            "json_codec should be one of %s" % ', '.join(sorted(CODECS) + ['auto']))
+
+    return CODECS[codec](json_encoder, json_decoder)
@@ -8,6 +8,9 @@ from __future__ import (
 
 import hashlib
 import nacl
+import os
+import threading
+import weakref
 import base64
 import binascii
 import warnings
@@ -21,6 +24,9 @@ from pusher.util import (
 import nacl.secret
 import nacl.utils
 
+from pusher import instrumentation
+from pusher.cache import LRUCache
+
 # The prefix any e2e channel must have
 ENCRYPTED_PREFIX = 'private-encrypted-'
 
@@ -73,16 +79,128 @@ def generate_shared_secret(channel, encryption_master_key):
     hashable = channel + encryption_master_key
     return hashlib.sha256(hashable).digest()
 
-def encrypt(channel, data, encryption_master_key, nonce=None):
+class SecretBoxCache(object):
+    """
+    SecretBoxCache keeps the shared secrets and the SecretBox objects derived
+    for the most recently used encrypted channels. The cache is emptied
+    whenever it is used with a different master key.
+    """
+    def __init__(self, maxsize=1024):
+        self._cache = LRUCache(maxsize)
+        self._lock = threading.Lock()
+        self._encryption_master_key = None
+
+    def get(self, channel, encryption_master_key):
+        """
+        get() returns the shared secret and the SecretBox of a
+        six.binary_type channel name, deriving them on a miss
+        """
+        with self._lock:
+            if encryption_master_key != self._encryption_master_key:
+                self._cache.clear()
+                self._encryption_master_key = encryption_master_key
+
+        key = (channel, encryption_master_key)
+        entry = self._cache.get(key)
+        if entry is None:
+            shared_secret = generate_shared_secret(channel, encryption_master_key)
+            entry = (shared_secret, nacl.secret.SecretBox(shared_secret))
+            self._cache.put(key, entry)
+
+        return entry
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+class BufferedNonceSource(object):
+    """
+    BufferedNonceSource returns unique random nonces sliced from large blocks
+    of OS randomness, saving a syscall per encrypted message. The buffer is
+    discarded in forked child processes so that a parent and its children
+    never hand out the same nonce.
     """
-    encrypt() encrypts the provided payload specified in the 'data' parameter
+    _instances = weakref.WeakSet()
+
+    def __init__(self, block_size=1024):
+        """
+        block_size is the number of nonces drawn from the OS at once
+        """
+        if block_size < 1:
+            raise ValueError("block_size should be at least 1")
+
+        self.block_size = block_size
+        self._reseed()
+        BufferedNonceSource._instances.add(self)
+
+    def _reseed(self):
+        self._lock = threading.Lock()
+        self._nonces = []
+        self._pid = os.getpid()
+
+    def _refill(self):
+        size = nacl.secret.SecretBox.NONCE_SIZE
+        with self._lock:
+            if self._pid != os.getpid():
+                self._nonces = []
+                self._pid = os.getpid()
+
+            if not self._nonces:
+                block = nacl.utils.random(size * self.block_size)
+                self._nonces = [block[i:i + size] for i in range(0, len(block), size)]
+
+    def __call__(self):
+        """
+        returns the next six.binary_type nonce of NONCE_SIZE bytes
+        """
+        # list.pop is atomic, so the lock is only taken to refill the buffer
+        while True:
+            try:
+                if _has_register_at_fork or self._pid == os.getpid():
+                    return self._nonces.pop()
+
+            except IndexError:
+                pass
+
+            self._refill()
+
+    @classmethod
+    def _after_fork_in_child(cls):
+        # the lock may have been held by another thread of the parent
+        for source in list(cls._instances):
+            source._reseed()
+
+_has_register_at_fork = hasattr(os, "register_at_fork")
+if _has_register_at_fork:
+    os.register_at_fork(after_in_child=BufferedNonceSource._after_fork_in_child)
+
+def encrypt(channel, data, encryption_master_key, nonce=None, cache=None, nonce_source=None):
     """
+    encrypt() encrypts the provided payload specified in the 'data' parameter,
+    taking the SecretBox from the SecretBoxCache if one is given and the
+    nonce from nonce_source, a callable such as a BufferedNonceSource, if
+    no nonce is given
+    """
+    if instrumentation.enabled:
+        with instrumentation.phase('encrypt'):
+            return _encrypt(channel, data, encryption_master_key, nonce, cache, nonce_source)
+
+    return _encrypt(channel, data, encryption_master_key, nonce, cache, nonce_source)
+
+def _encrypt(channel, data, encryption_master_key, nonce, cache, nonce_source):
     channel = ensure_binary(channel, "channel")
-    shared_secret = generate_shared_secret(channel, encryption_master_key)
-    # the box setup to seal/unseal data payload
-    box = nacl.secret.SecretBox(shared_secret)
+    if cache is not None:
+        shared_secret, box = cache.get(channel, encryption_master_key)
+    else:
+        shared_secret = generate_shared_secret(channel, encryption_master_key)
+        # the box setup to seal/unseal data payload
+        box = nacl.secret.SecretBox(shared_secret)
 
-    if nonce is None:
+    if nonce is None and nonce_source is not None:
+        nonce = nonce_source()
+    elif nonce is None:
         nonce = nacl.utils.random(nacl.secret.SecretBox.NONCE_SIZE)
     else:
         nonce = ensure_binary(nonce, "nonce")
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import collections
+import threading
+import time
+
+from concurrent.futures import Future
+
+from pusher.errors import PusherQueueFull, PusherEventDropped
+from pusher.http import is_async_backend
+
+# What to do when an event is dispatched while the queue is full
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+RAISE = 'raise'
+
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST, RAISE)
+
+
+class BackgroundDispatcher(object):
+    """Sends triggers from a bounded in-memory queue drained by worker
+    threads, so callers don't wait for the HTTP API.
+
+    Each call returns a ``concurrent.futures.Future`` resolving to the API
+    response. Only synchronous backends are supported, TypeError is raised
+    with the others.
+
+    :param client:         a pusher.PusherClient instance
+    :param workers:        number of worker threads sending requests
+    :param max_queue_size: maximum number of calls waiting to be sent
+    :param overflow:       what to do when the queue is full: BLOCK the
+      caller, DROP_OLDEST or DROP_NEWEST call, or RAISE PusherQueueFull
+    :param block_timeout:  with BLOCK, seconds to wait for room in the queue
+      before raising PusherQueueFull, None to wait forever
+    """
+    def __init__(
+            self,
+            client,
+            workers=4,
+            max_queue_size=1000,
+            overflow=BLOCK,
+            block_timeout=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError("overflow should be one of %s" % ', '.join(OVERFLOW_POLICIES))
+
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size should be at least 1")
+
+        if is_async_backend(client.http):
+            raise TypeError("BackgroundDispatcher only supports synchronous backends")
+
+        self._client = client
+        self._max_queue_size = max_queue_size
+        self._overflow = overflow
+        self._block_timeout = block_timeout
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._counters = {'queued': 0, 'sent': 0, 'dropped': 0, 'failed': 0}
+        self._workers = []
+
+        for i in range(workers):
+            worker = threading.Thread(
+                target=self._run, name="pusher-dispatcher-%d" % i)
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+    def trigger(self, channels, event_name, data, socket_id=None):
+        """Queues a call to PusherClient.trigger and returns its future."""
+        return self._dispatch(
+            self._client.trigger, (channels, event_name, data, socket_id))
+
+
+    def trigger_batch(self, batch=[], already_encoded=False):
+        """Queues a call to PusherClient.trigger_batch and returns its future."""
+        return self._dispatch(
+            self._client.trigger_batch, (batch, already_encoded))
+
+
+    def stats(self):
+        """Returns the number of calls queued, sent, dropped and failed since
+        the dispatcher was created, and the number currently pending.
+        """
+        with self._condition:
+            stats = dict(self._counters)
+            stats['pending'] = len(self._queue)
+
+        return stats
+
+
+    def close(self, drain=True, timeout=None):
+        """Stops accepting calls and waits for the workers to exit.
+
+        :param drain:   send the pending calls first, otherwise they are
+          dropped
+        :param timeout: seconds to wait for each worker
+        """
+        with self._condition:
+            self._closed = True
+            if not drain:
+                while self._queue:
+                    self._drop(self._queue.popleft())
+
+            self._condition.notify_all()
+
+        for worker in self._workers:
+            worker.join(timeout)
+
+
+    def _dispatch(self, method, args):
+        future = Future()
+        item = (future, method, args)
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The dispatcher has been closed")
+
+            if len(self._queue) >= self._max_queue_size:
+                if self._overflow == RAISE:
+                    raise PusherQueueFull("The dispatch queue is full")
+
+                elif self._overflow == DROP_NEWEST:
+                    self._drop(item)
+                    return future
+
+                elif self._overflow == DROP_OLDEST:
+                    self._drop(self._queue.popleft())
+
+                else:
+                    self._wait_for_room()
+
+            self._queue.append(item)
+            self._counters['queued'] += 1
+            self._condition.notify_all()
+
+        return future
+
+
+    def _wait_for_room(self):
+        deadline = None
+        if self._block_timeout is not None:
+            deadline = time.monotonic() + self._block_timeout
+
+        while len(self._queue) >= self._max_queue_size:
+            if self._closed:
+                raise RuntimeError("The dispatcher has been closed")
+
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PusherQueueFull("The dispatch queue is full")
+
+            self._condition.wait(remaining)
+
+
+    def _drop(self, item):
+        future = item[0]
+        self._counters['dropped'] += 1
+        if future.set_running_or_notify_cancel():
+            future.set_exception(PusherEventDropped("The event was dropped"))
+
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+
+                if not self._queue:
+                    return
+
+                future, method, args = self._queue.popleft()
+                self._condition.notify_all()
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                result = method(*args)
+
+            except Exception as e:
+                self._count('failed')
+                future.set_exception(e)
+
+            else:
+                self._count('sent')
+                future.set_result(result)
+
+
+    def _count(self, name):
+        with self._condition:
+            self._counters[name] += 1
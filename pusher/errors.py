@@ -24,4 +24,19 @@ class PusherForbidden(PusherError):
 
 
 class PusherBadStatus(PusherError):
+    def __init__(self, message, status=None, retry_after=None):
+        super(PusherBadStatus, self).__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class PusherQueueFull(PusherError):
+    pass
+
+
+class PusherEventDropped(PusherError):
+    pass
+
+
+class PusherCircuitOpen(PusherError):
     pass
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import collections
+
+from concurrent.futures import ThreadPoolExecutor
+
+# The maximum number of channels accepted by a single trigger call
+MAX_CHANNELS_PER_TRIGGER = 100
+
+# The maximum number of events accepted by a single trigger_batch call on
+# multi-tenant clusters
+MAX_EVENTS_PER_BATCH = 10
+
+
+class FanoutFailure(collections.namedtuple('FanoutFailure', ['channels', 'error'])):
+    """A chunk of a fan-out which could not be delivered.
+
+    :param channels: the channels of the failed chunk
+    :param error: the exception raised while sending the chunk
+    """
+    __slots__ = ()
+
+
+class FanoutResult(collections.namedtuple('FanoutResult', ['responses', 'failures'])):
+    """Aggregated outcome of a fan-out.
+
+    :param responses: the API responses of the chunks that were delivered
+    :param failures: a list of FanoutFailure for the chunks that were not
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return not self.failures
+
+
+def chunked(items, size):
+    """Splits a list into lists of at most size items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def send_chunks(chunks, send, max_parallel):
+    """Calls send for every chunk with at most max_parallel calls in flight
+    and collects the outcome into a FanoutResult.
+
+    :param chunks: a list of chunks, each reported back on failure
+    :param send: a callable sending a single chunk and returning the response
+    :param max_parallel: the maximum number of concurrent calls
+    """
+    if max_parallel < 1:
+        raise ValueError("max_parallel should be at least 1")
+
+    responses = []
+    failures = []
+
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(chunks) or 1)) as executor:
+        futures = [executor.submit(send, chunk) for chunk in chunks]
+
+        for chunk, future in zip(chunks, futures):
+            try:
+                responses.append(future.result())
+
+            except Exception as e:
+                failures.append(FanoutFailure(chunk, e))
+
+    return FanoutResult(responses, failures)
@@ -16,6 +16,8 @@ class GAEBackend(object):
     Adapter for the URLFetch Module. Necessary for using this library with
     Google App Engine
     """
+    connection_errors = (urlfetch.DownloadError,)
+
     def __init__(self, client, **options):
         self.client = client
         self.options = options
@@ -30,4 +32,5 @@ class GAEBackend(object):
             deadline=self.client.timeout,
             **self.options)
 
-        return process_response(resp.status_code, resp.content)
+        return process_response(
+            resp.status_code, resp.content, resp.headers, self.client.json_codec)
@@ -6,15 +6,16 @@ from __future__ import (
     absolute_import,
     division)
 
-import copy
+import bisect
 import hashlib
+import inspect
 import json
 import six
 import time
 
+from pusher import instrumentation
 from pusher.util import doc_string
 from pusher.errors import *
-from pusher.signature import sign
 from pusher.version import VERSION
 
 
@@ -28,13 +29,79 @@ class RequestMethod(object):
 
 
     def __call__(self, *args, **kwargs):
-        return self.client.http.send_request(self.make_request(*args, **kwargs))
+        if instrumentation.enabled:
+            return instrumentation.instrument(
+                self.f.__name__, lambda: self._call(args, kwargs))
+
+        return self._call(args, kwargs)
+
+
+    def _call(self, args, kwargs):
+        cache = self.client.response_cache
+        if cache is not None and cache.caches(self.f.__name__):
+            return cache.fetch(
+                self.f.__name__, self.cache_key(args, kwargs),
+                lambda: self.send(args, kwargs), is_async_backend(self.client.http))
+
+        return self.send(args, kwargs)
+
+
+    def cache_key(self, args, kwargs):
+        """Returns the response cache key of a call: the method name and its
+        arguments, with the defaults applied, which determine the path and
+        the params of the request without building and signing it."""
+        signature = _signatures.get(self.f)
+        if signature is None:
+            signature = _signatures[self.f] = inspect.signature(self.f)
+
+        bound = signature.bind(self.client, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = list(bound.arguments.items())[1:]
+        return (self.f.__name__,) + tuple(
+            (name, _freeze(value)) for name, value in arguments)
+
+
+    def send(self, args, kwargs):
+        send = self.client.http.send_request
+        if instrumentation.enabled:
+            send = instrumentation.timed_send(send)
+
+        if self.client.circuit_breaker is not None:
+            send = self.client.circuit_breaker.wrap(send, self.client.http)
+
+        request = self.make_request(*args, **kwargs)
+
+        if self.client.retry is not None:
+            return self.client.retry.send(self.client.http, request, send)
+
+        return send(request)
 
 
     def make_request(self, *args, **kwargs):
+        if instrumentation.enabled:
+            with instrumentation.phase('request'):
+                return self.f(self.client, *args, **kwargs)
+
         return self.f(self.client, *args, **kwargs)
 
 
+# The signatures of the request methods, by function
+_signatures = {}
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+
+    return value
+
+
 def request_method(f):
     @property
     @doc_string(f.__doc__)
@@ -44,12 +111,35 @@ def request_method(f):
     return wrapped
 
 
+def is_async_backend(backend):
+    """Whether the backend's send_request returns awaitables, as declared
+    by its is_async attribute or by being a coroutine function."""
+    return bool(getattr(backend, 'is_async', False)) or \
+        inspect.iscoroutinefunction(backend.send_request)
+
+
 def make_query_string(params):
     return '&'.join(map('='.join, sorted(params.items(), key=lambda x: x[0])))
 
 
-def process_response(status, body):
+def process_response(status, body, headers=None, codec=None):
+    if instrumentation.enabled:
+        record = instrumentation.current()
+        if record is not None:
+            record.status = status
+            record.response_bytes = len(body)
+
+        with instrumentation.phase('process_response'):
+            return _process_response(status, body, headers, codec)
+
+    return _process_response(status, body, headers, codec)
+
+
+def _process_response(status, body, headers, codec):
     if status == 200 or status == 202:
+        if codec is not None:
+            return codec.loads(body)
+
         return json.loads(body)
 
     elif status == 400:
@@ -62,20 +152,35 @@ def process_response(status, body):
         raise PusherForbidden(body)
 
     else:
-        raise PusherBadStatus("%s: %s" % (status, body))
+        retry_after = headers.get('Retry-After') if headers else None
+        raise PusherBadStatus("%s: %s" % (status, body), status, retry_after)
+
+
+LIBRARY_HEADERS = {"X-Pusher-Library": "pusher-http-python " + VERSION}
+JSON_HEADERS = dict(LIBRARY_HEADERS, **{"Content-Type": "application/json"})
+
+EMPTY_BODY = bytes()
+EMPTY_BODY_MD5 = six.text_type(hashlib.md5(EMPTY_BODY).hexdigest())
 
 
 class Request(object):
     """Represents the request to be made to the Pusher API.
 
     An instance of that object is passed to the backend's send_request method
-    for each request.
+    for each request. The body, the signed query string, the url and the
+    headers are all computed once when the request is built. The headers
+    dict is shared between requests and must not be modified.
 
     :param client: an instance of pusher.Client
     :param method: HTTP method as a string
     :param path: The target path on the destination host
     :param params: Query params or body depending on the method
     """
+    __slots__ = (
+        'client', 'method', 'path', 'params', 'body', 'body_md5',
+        'query_params', 'query_string', 'signed_path', 'base_url', 'url',
+        'headers')
+
     def __init__(self, client, method, path, params=None):
         if params is None:
             params = {}
@@ -83,64 +188,63 @@ class Request(object):
         self.client = client
         self.method = method
         self.path = path
-        self.params = copy.copy(params)
+        self.params = params
         if method == POST:
-            self.body = six.text_type(json.dumps(params)).encode('utf8')
+            self.body = self.client.json_codec.dumpb(params)
+            self.body_md5 = six.text_type(hashlib.md5(self.body).hexdigest())
             self.query_params = {}
+            self.headers = JSON_HEADERS
 
         elif method == GET:
-            self.body = bytes()
-            self.query_params = params
+            self.body = EMPTY_BODY
+            self.body_md5 = EMPTY_BODY_MD5
+            self.query_params = dict(params)
+            self.headers = LIBRARY_HEADERS
 
         else:
             raise NotImplementedError("Only GET and POST supported")
 
-        self._generate_auth()
-
-
-    def _generate_auth(self):
-        self.body_md5 = hashlib.md5(self.body).hexdigest()
-        self.query_params.update({
-            'auth_key': self.client.key,
-            'body_md5': six.text_type(self.body_md5),
-            'auth_version': '1.0',
-            'auth_timestamp': '%.0f' % time.time()})
-
-        auth_string = '\n'.join([
-            self.method,
-            self.path,
-            make_query_string(self.query_params)])
-
-        self.query_params['auth_signature'] = sign(
-            self.client.secret, auth_string)
-
-
-    @property
-    def query_string(self):
-        return make_query_string(self.query_params)
+        self.base_url = (
+            "%s://%s:%s" %
+            (self.client.scheme, self.client.host, self.client.port))
+        self._sign()
 
 
-    @property
-    def signed_path(self):
-        return "%s?%s" % (self.path, self.query_string)
+    def resigned(self):
+        """Returns a copy of the request signed with the current time, for
+        sending it again. The body is reused as it is."""
+        request = Request.__new__(Request)
+        for name in self.__slots__:
+            setattr(request, name, getattr(self, name))
 
-
-    @property
-    def url(self):
-        return "%s%s" % (self.base_url, self.signed_path)
+        request.query_params = dict(self.query_params)
+        del request.query_params['auth_signature']
+        request._sign()
+        return request
 
 
-    @property
-    def base_url(self):
-        return (
-            "%s://%s:%s" %
-            (self.client.scheme, self.client.host, self.client.port))
-
+    def _sign(self):
+        self._generate_auth()
+        self.signed_path = "%s?%s" % (self.path, self.query_string)
+        self.url = "%s%s" % (self.base_url, self.signed_path)
 
-    @property
-    def headers(self):
-        hdrs = {"X-Pusher-Library": "pusher-http-python " + VERSION}
-        if self.method == POST:
-            hdrs["Content-Type"] = "application/json"
 
-        return hdrs
+    def _generate_auth(self):
+        query_params = self.query_params
+        query_params['auth_key'] = self.client.key
+        query_params['body_md5'] = self.body_md5
+        query_params['auth_version'] = '1.0'
+        query_params['auth_timestamp'] = '%.0f' % time.time()
+
+        keys = sorted(query_params)
+        pairs = ['%s=%s' % (k, query_params[k]) for k in keys]
+
+        auth_string = '\n'.join([self.method, self.path, '&'.join(pairs)])
+        signature = self.client.signer.sign(auth_string)
+        query_params['auth_signature'] = signature
+
+        # keep the query string sorted, as make_query_string would
+        pairs.insert(
+            bisect.bisect(keys, 'auth_signature'),
+            'auth_signature=%s' % signature)
+        self.query_string = '&'.join(pairs)
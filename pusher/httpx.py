@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import httpx
+import os
+import ssl
+
+from pusher.http import process_response
+from pusher.util import LoopBound
+
+
+CERT_PATH = os.path.dirname(os.path.abspath(__file__)) + '/cacert.pem'
+
+
+def _client_options(client, http2, max_connections, max_keepalive_connections, options):
+    client_options = {
+        'http2': http2,
+        'timeout': client.timeout,
+        'limits': httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections)}
+
+    if client.ssl:
+        client_options['verify'] = ssl.create_default_context(cafile=CERT_PATH)
+
+    client_options.update(options)
+    return client_options
+
+
+class HttpxBackend(object):
+    """Adapter for the httpx module.
+
+    With HTTP/2 enabled, concurrent requests from several threads are
+    multiplexed over a single connection to the API host. Call ``close()``,
+    or use the backend as a context manager, to release the connections.
+
+    :param client:   pusher.Client object
+    :param http2:    negotiate HTTP/2 with the server (requires the h2 package)
+    :param max_connections: maximum number of simultaneous connections
+    :param max_keepalive_connections: maximum number of idle connections kept
+    :param options:  key-value passed into the httpx.Client constructor
+    """
+    connection_errors = (httpx.TransportError,)
+
+    def __init__(
+            self,
+            client,
+            http2=True,
+            max_connections=10,
+            max_keepalive_connections=10,
+            **options):
+        self.client = client
+        self.session = httpx.Client(**_client_options(
+            client, http2, max_connections, max_keepalive_connections, options))
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+    def send_request(self, request):
+        resp = self.session.request(
+            request.method,
+            request.url,
+            headers=request.headers,
+            content=request.body)
+
+        return process_response(
+            resp.status_code, resp.text, resp.headers, self.client.json_codec)
+
+
+    def close(self):
+        """Closes the connections of the underlying httpx.Client."""
+        self.session.close()
+
+
+class AsyncHttpxBackend(object):
+    """Asyncio adapter for the httpx module.
+
+    A single httpx.AsyncClient is created on first use, so all the triggers
+    sent from an event loop share one multiplexed connection when HTTP/2 is
+    enabled. Call ``aclose()``, or use the backend as an async context
+    manager, to release it.
+
+    :param client:   pusher.Client object
+    :param http2:    negotiate HTTP/2 with the server (requires the h2 package)
+    :param max_connections: maximum number of simultaneous connections
+    :param max_keepalive_connections: maximum number of idle connections kept
+    :param options:  key-value passed into the httpx.AsyncClient constructor
+    """
+    connection_errors = (httpx.TransportError,)
+    is_async = True
+
+    def __init__(
+            self,
+            client,
+            http2=True,
+            max_connections=10,
+            max_keepalive_connections=10,
+            **options):
+        self.client = client
+        self._client_options = _client_options(
+            client, http2, max_connections, max_keepalive_connections, options)
+        self._sessions = LoopBound(
+            lambda: httpx.AsyncClient(**self._client_options),
+            lambda session: session.is_closed, lambda session: session.aclose())
+
+
+    async def __aenter__(self):
+        return self
+
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+    @property
+    def session(self):
+        """The shared httpx.AsyncClient, created for the running event loop
+        on first access. A new one is created when the running loop changes,
+        and the previous one is closed.
+        """
+        return self._sessions.get()
+
+
+    async def send_request(self, request):
+        resp = await self.session.request(
+            request.method,
+            request.url,
+            headers=request.headers,
+            content=request.body)
+
+        return process_response(
+            resp.status_code, resp.text, resp.headers, self.client.json_codec)
+
+
+    async def aclose(self):
+        """Closes the shared httpx.AsyncClient and its connections."""
+        await self._sessions.aclose()
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import bisect
+import contextlib
+import inspect
+import threading
+import time
+
+try:
+    import contextvars
+
+except ImportError:
+    # Python 3.6: the record is kept per thread, so coroutines interleaved
+    # on an event loop may report their phases to each other's record
+    contextvars = None
+
+# Whether any listener is registered. Instrumented code checks it first so
+# that nothing is measured, or allocated, when it is False.
+enabled = False
+
+_listeners = []
+
+
+class _ThreadLocalVar(threading.local):
+    """The subset of contextvars.ContextVar used here, per thread."""
+    value = None
+
+    def get(self):
+        return self.value
+
+
+    def set(self, value):
+        token, self.value = self.value, value
+        return token
+
+
+    def reset(self, token):
+        self.value = token
+
+
+if contextvars is not None:
+    _current = contextvars.ContextVar('pusher_instrumentation_record', default=None)
+
+else:
+    _current = _ThreadLocalVar()
+
+# Phases measured including the phases nested in them, and those nested
+_NESTED_PHASES = (
+    ('request', ('serialize', 'encrypt')),
+    ('send', ('process_response',)),
+)
+
+
+class Record(object):
+    """The measurements of one operation, passed to the listeners once it
+    completes.
+
+    :param operation: the name of the client method, e.g. 'trigger'
+    :param phases: a dict of phase name to the seconds spent in it. The
+      phases are 'serialize' (data_to_string), 'encrypt', 'request' (building
+      and signing the Request), 'send' (the backend, excluding
+      'process_response') and 'process_response' for API calls, and
+      'verify' and 'parse' for validate_webhook.
+    :param duration: the total number of seconds of the operation
+    :param request_bytes: the size of the last request body sent
+    :param response_bytes: the size of the last response body received
+    :param status: the HTTP status of the last response
+    :param attempts: the number of requests sent, retries included
+    :param error: the exception raised by the operation, if any
+    """
+    __slots__ = (
+        'operation', 'phases', 'duration', 'request_bytes', 'response_bytes',
+        'status', 'attempts', 'error', '_started')
+
+    def __init__(self, operation):
+        self.operation = operation
+        self.phases = {}
+        self.duration = None
+        self.request_bytes = None
+        self.response_bytes = None
+        self.status = None
+        self.attempts = 0
+        self.error = None
+        self._started = time.perf_counter()
+
+
+    @property
+    def retries(self):
+        return max(self.attempts - 1, 0)
+
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0) + seconds
+
+
+def add_listener(listener):
+    """Registers a callable receiving a Record after every instrumented
+    operation, enabling the instrumentation."""
+    global enabled
+    _listeners.append(listener)
+    enabled = True
+
+
+def remove_listener(listener):
+    global enabled
+    _listeners.remove(listener)
+    enabled = bool(_listeners)
+
+
+def current():
+    """Returns the Record of the operation in progress, if any."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def phase(name):
+    """Adds the time spent in the block to a phase of the current record."""
+    record = _current.get()
+    started = time.perf_counter()
+    try:
+        yield record
+
+    finally:
+        if record is not None:
+            record.add(name, time.perf_counter() - started)
+
+
+def timed(func, name):
+    """Wraps func to add the time spent in it to a phase of the current
+    record."""
+    def wrapper(*args, **kwargs):
+        with phase(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def instrument(operation, call):
+    """Runs call() as an operation, reporting a Record to the listeners
+    when it completes. An awaitable result is wrapped so that the record
+    is reported once it has been awaited."""
+    record = Record(operation)
+    token = _current.set(record)
+    try:
+        result = call()
+
+    except BaseException as e:
+        _finish(record, e)
+        raise
+
+    finally:
+        _current.reset(token)
+
+    if inspect.isawaitable(result):
+        return _instrument_async(record, result)
+
+    _finish(record)
+    return result
+
+
+async def _instrument_async(record, awaitable):
+    token = _current.set(record)
+    started = time.perf_counter()
+    try:
+        result = await awaitable
+
+    except BaseException as e:
+        record.add('send', time.perf_counter() - started)
+        _finish(record, e)
+        raise
+
+    finally:
+        _current.reset(token)
+
+    record.add('send', time.perf_counter() - started)
+    _finish(record)
+    return result
+
+
+def timed_send(send):
+    """Wraps a backend's send_request to count the attempts and time them."""
+    def timed(request):
+        record = _current.get()
+        if record is None:
+            return send(request)
+
+        record.attempts += 1
+        record.request_bytes = len(request.body)
+        started = time.perf_counter()
+        try:
+            return send(request)
+
+        finally:
+            record.add('send', time.perf_counter() - started)
+
+    return timed
+
+
+def _finish(record, error=None):
+    record.duration = time.perf_counter() - record._started
+    record.error = error
+
+    phases = record.phases
+    for outer, nested in _NESTED_PHASES:
+        if outer in phases:
+            phases[outer] = max(
+                phases[outer] - sum(phases.get(name, 0) for name in nested), 0)
+
+    for listener in list(_listeners):
+        listener(record)
+
+
+class HistogramRecorder(object):
+    """A listener aggregating the durations of each operation and of its
+    phases into in-process histograms with exponential buckets, along with
+    the statuses, retries and errors.
+
+        recorder = HistogramRecorder()
+        pusher.instrumentation.add_listener(recorder)
+        ...
+        recorder.snapshot()
+
+    :param bounds: the increasing upper bounds of the buckets, in seconds
+    """
+    DEFAULT_BOUNDS = tuple(0.000001 * 2 ** i for i in range(25))
+
+    def __init__(self, bounds=DEFAULT_BOUNDS):
+        self.bounds = tuple(bounds)
+        self._operations = {}
+        self._lock = threading.Lock()
+
+
+    def __call__(self, record):
+        with self._lock:
+            stats = self._operations.get(record.operation)
+            if stats is None:
+                stats = self._operations[record.operation] = {
+                    'histograms': {}, 'statuses': {}, 'retries': 0, 'errors': 0}
+
+            self._observe(stats['histograms'], 'total', record.duration)
+            for name, seconds in record.phases.items():
+                self._observe(stats['histograms'], name, seconds)
+
+            if record.status is not None:
+                stats['statuses'][record.status] = stats['statuses'].get(record.status, 0) + 1
+
+            stats['retries'] += record.retries
+            if record.error is not None:
+                stats['errors'] += 1
+
+
+    def _observe(self, histograms, name, seconds):
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = {
+                'count': 0, 'sum': 0.0, 'buckets': [0] * (len(self.bounds) + 1)}
+
+        histogram['count'] += 1
+        histogram['sum'] += seconds
+        histogram['buckets'][bisect.bisect_left(self.bounds, seconds)] += 1
+
+
+    def percentile(self, operation, name, q):
+        """Returns the upper bound of the bucket holding the q-th percentile
+        (0 to 100) of a phase, 'total' for the whole operation, or None."""
+        with self._lock:
+            histogram = self._operations.get(operation, {}).get('histograms', {}).get(name)
+            if not histogram:
+                return None
+
+            rank = q / 100 * histogram['count']
+            seen = 0
+            for i, count in enumerate(histogram['buckets']):
+                seen += count
+                if count and seen >= rank:
+                    return self.bounds[i] if i < len(self.bounds) else float('inf')
+
+
+    def snapshot(self):
+        """Returns a copy of the aggregated statistics, by operation."""
+        with self._lock:
+            return dict(
+                (operation, {
+                    'histograms': dict(
+                        (name, dict(histogram, buckets=list(histogram['buckets'])))
+                        for name, histogram in stats['histograms'].items()),
+                    'statuses': dict(stats['statuses']),
+                    'retries': stats['retries'],
+                    'errors': stats['errors']})
+                for operation, stats in self._operations.items())
+
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import bisect
+import threading
+
+PRESENCE_PREFIX = 'presence-'
+
+# The webhook events the index is updated from
+OCCUPANCY_EVENTS = ('channel_occupied', 'channel_vacated', 'member_added', 'member_removed')
+
+
+def _prefix_end(prefix):
+    """Returns the smallest string greater than all those starting with
+    prefix, or None if there is none."""
+    while prefix:
+        last = ord(prefix[-1])
+        if last < 0x10ffff:
+            return prefix[:-1] + chr(last + 1)
+
+        prefix = prefix[:-1]
+
+    return None
+
+
+class OccupancyIndex(object):
+    """An in-process index of the occupied channels and of the members of
+    presence channels, kept up to date from webhook events.
+
+    The occupied channels are kept in a sorted list, so that the channels
+    starting with a prefix are found with two binary searches.
+
+        index = OccupancyIndex()
+        index.register(pusher_client)
+        ...
+        pusher_client.handle_webhook(key, signature, body)
+        index.channels(prefix='presence-room-')
+    """
+    def __init__(self):
+        self._channels = []
+        self._members = {}
+        self._lock = threading.Lock()
+
+
+    def register(self, client):
+        """Updates the index from the webhooks handled by client, a Pusher
+        or AuthenticationClient instance."""
+        for event_name in OCCUPANCY_EVENTS:
+            client.on_webhook(event_name, self.apply)
+
+
+    def apply(self, event):
+        """Updates the index from a single webhook event."""
+        name = event.get('name')
+        channel = event.get('channel')
+        if not channel:
+            return
+
+        with self._lock:
+            if name == 'channel_occupied':
+                self._add_channel(channel)
+
+            elif name == 'channel_vacated':
+                self._remove_channel(channel)
+
+            elif name == 'member_added':
+                self._add_channel(channel)
+                self._members.setdefault(channel, set()).add(event.get('user_id'))
+
+            elif name == 'member_removed':
+                members = self._members.get(channel)
+                if members is not None:
+                    members.discard(event.get('user_id'))
+
+
+    def is_occupied(self, channel):
+        with self._lock:
+            i = bisect.bisect_left(self._channels, channel)
+            return i < len(self._channels) and self._channels[i] == channel
+
+
+    def channels(self, prefix=''):
+        """Returns the sorted occupied channels starting with prefix."""
+        with self._lock:
+            lo, hi = self._bounds(prefix)
+            return self._channels[lo:hi]
+
+
+    def members(self, channel):
+        """Returns the user ids subscribed to a presence channel."""
+        with self._lock:
+            return frozenset(self._members.get(channel, ()))
+
+
+    def user_count(self, channel):
+        with self._lock:
+            return len(self._members.get(channel, ()))
+
+
+    def reconcile(self, client, prefix=''):
+        """Replaces the channels starting with prefix, and the members of
+        the presence channels among them, with the state of the HTTP API.
+
+        :param client: a Pusher or PusherClient instance with a synchronous
+          backend
+        """
+        kwargs = {'prefix_filter': prefix} if prefix else {}
+        channels = sorted(client.channels_info(**kwargs).get('channels', {}))
+
+        members = {}
+        for channel in channels:
+            if channel.startswith(PRESENCE_PREFIX):
+                users = client.users_info(channel).get('users', [])
+                members[channel] = set(user['id'] for user in users)
+
+        with self._lock:
+            lo, hi = self._bounds(prefix)
+            for channel in self._channels[lo:hi]:
+                self._members.pop(channel, None)
+
+            self._channels[lo:hi] = channels
+            self._members.update(members)
+
+
+    def _add_channel(self, channel):
+        i = bisect.bisect_left(self._channels, channel)
+        if i == len(self._channels) or self._channels[i] != channel:
+            self._channels.insert(i, channel)
+
+
+    def _remove_channel(self, channel):
+        i = bisect.bisect_left(self._channels, channel)
+        if i < len(self._channels) and self._channels[i] == channel:
+            del self._channels[i]
+
+        self._members.pop(channel, None)
+
+
+    def _bounds(self, prefix):
+        lo = bisect.bisect_left(self._channels, prefix)
+        end = _prefix_end(prefix)
+        if end is None:
+            return lo, len(self._channels)
+
+        return lo, bisect.bisect_left(self._channels, end, lo)
+
+
+class OccupancyReconciler(object):
+    """Reconciles an OccupancyIndex with the HTTP API every interval
+    seconds on a background thread, correcting the webhooks which were
+    missed. Failures are counted, the last one is kept in last_error, and
+    reconciling is tried again at the next interval.
+
+    :param index: an OccupancyIndex
+    :param client: a Pusher or PusherClient instance with a synchronous
+      backend
+    :param interval: the number of seconds between reconciliations
+    :param prefix: only reconcile the channels starting with prefix
+    """
+    def __init__(self, index, client, interval=60, prefix=''):
+        if interval <= 0:
+            raise ValueError("interval should be positive")
+
+        self._index = index
+        self._client = client
+        self._interval = interval
+        self._prefix = prefix
+        self.reconciliations = 0
+        self.failures = 0
+        self.last_error = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="pusher-occupancy-reconciler")
+        self._thread.daemon = True
+        self._thread.start()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self._index.reconcile(self._client, self._prefix)
+                self.reconciliations += 1
+
+            except Exception as e:
+                self.failures += 1
+                self.last_error = e
+
+            self._stopped.wait(self._interval)
+
+
+    def close(self):
+        """Stops reconciling and waits for the thread to exit."""
+        self._stopped.set()
+        self._thread.join()
@@ -20,6 +20,7 @@ from pusher.util import (
 
 from pusher.pusher_client import PusherClient
 from pusher.authentication_client import AuthenticationClient
+from pusher.crypto import BufferedNonceSource
 
 
 class Pusher(object):
@@ -42,6 +43,24 @@ class Pusher(object):
       Eg: 'eu' will resolve to the api-eu.pusherapp.com host
     :param backend: an http adapter class (AsyncIOBackend, RequestsBackend,
       SynchronousBackend, TornadoBackend)
+    :param retry: a pusher.retry.RetryPolicy used to retry failed requests
+    :param circuit_breaker: a pusher.circuit_breaker.CircuitBreaker, or True
+      to share one with the other clients of the same host and port
+    :param json_codec: the JSON library to use: 'json' (default), 'orjson',
+      'msgspec', 'ujson', 'auto' for ujson when it is installed, or a
+      pusher.codec.JSONCodec instance
+    :param encryption_cache_size: the number of encrypted channels whose
+      derived secrets are cached, 0 to disable the cache
+    :param nonce_source: a callable returning encryption nonces, or True to
+      use a pusher.crypto.BufferedNonceSource
+    :param auth_cache_size: the number of authenticate and authenticate_user
+      results cached, 0 (default) to disable the cache
+    :param auth_cache_ttl: the number of seconds the results are cached for
+    :param webhook_replay_store: a pusher.replay.MemoryReplayStore or
+      SQLiteReplayStore flagging the webhooks received more than once
+    :param response_cache: a pusher.response_cache.ResponseCache, or True
+      for the default one, caching the channel_info, channels_info and
+      users_info responses
     :param backend_options: additional backend
     """
     def __init__(
@@ -59,8 +78,20 @@ class Pusher(object):
         json_encoder=None,
         json_decoder=None,
         backend=None,
+        retry=None,
+        circuit_breaker=None,
+        json_codec=None,
+        encryption_cache_size=1024,
+        nonce_source=None,
+        auth_cache_size=0,
+        auth_cache_ttl=60,
+        webhook_replay_store=None,
+        response_cache=None,
         **backend_options):
 
+        if nonce_source is True:
+            nonce_source = BufferedNonceSource()
+
         self._pusher_client = PusherClient(
             app_id,
             key,
@@ -75,6 +106,12 @@ class Pusher(object):
             json_encoder,
             json_decoder,
             backend,
+            retry=retry,
+            circuit_breaker=circuit_breaker,
+            json_codec=json_codec,
+            encryption_cache_size=encryption_cache_size,
+            nonce_source=nonce_source,
+            response_cache=response_cache,
             **backend_options)
 
         self._authentication_client = AuthenticationClient(
@@ -91,8 +128,21 @@ class Pusher(object):
             json_encoder,
             json_decoder,
             backend,
+            retry=retry,
+            circuit_breaker=circuit_breaker,
+            json_codec=json_codec,
+            encryption_cache_size=encryption_cache_size,
+            nonce_source=nonce_source,
+            auth_cache_size=auth_cache_size,
+            auth_cache_ttl=auth_cache_ttl,
+            webhook_replay_store=webhook_replay_store,
             **backend_options)
 
+    @property
+    def http(self):
+        """The backend instance used to send requests to the HTTP API."""
+        return self._pusher_client.http
+
     @classmethod
     def from_url(cls, url, **options):
         """Alternative constructor that extracts the information from a URL.
@@ -146,6 +196,19 @@ class Pusher(object):
         return self._pusher_client.trigger(
             channels, event_name, data, socket_id)
 
+    @doc_string(PusherClient.trigger_fanout.__doc__)
+    def trigger_fanout(self, channels, event_name, data, socket_id=None, max_parallel=4):
+        return self._pusher_client.trigger_fanout(
+            channels, event_name, data, socket_id, max_parallel)
+
+    @doc_string(PusherClient.trigger_encrypted_fanout.__doc__)
+    def trigger_encrypted_fanout(
+            self, channels, event_name, data, socket_id=None, max_parallel=4,
+            max_workers=None, batch_size=10):
+        return self._pusher_client.trigger_encrypted_fanout(
+            channels, event_name, data, socket_id, max_parallel, max_workers,
+            batch_size)
+
     @doc_string(PusherClient.trigger.__doc__)
     def send_to_user(self, user_id, event_name, data):
         validate_user_id(user_id)
@@ -156,6 +219,16 @@ class Pusher(object):
     def trigger_batch(self, batch=[], already_encoded=False):
         return self._pusher_client.trigger_batch(batch, already_encoded)
 
+    @doc_string(PusherClient.coalesce.__doc__)
+    def coalesce(self, max_batch_size=10, linger=0.005, max_in_flight=4):
+        return self._pusher_client.coalesce(
+            max_batch_size, linger, max_in_flight)
+
+    @doc_string(PusherClient.dispatcher.__doc__)
+    def dispatcher(self, workers=4, max_queue_size=1000, overflow='block', block_timeout=None):
+        return self._pusher_client.dispatcher(
+            workers, max_queue_size, overflow, block_timeout)
+
     @doc_string(PusherClient.channels_info.__doc__)
     def channels_info(self, prefix_filter=None, attributes=[]):
         return self._pusher_client.channels_info(prefix_filter, attributes)
@@ -177,6 +250,11 @@ class Pusher(object):
         return self._authentication_client.authenticate(
             channel, socket_id, custom_data)
 
+    @doc_string(AuthenticationClient.authenticate_many.__doc__)
+    def authenticate_many(self, socket_id, channels, custom_data=None):
+        return self._authentication_client.authenticate_many(
+            socket_id, channels, custom_data)
+
     @doc_string(AuthenticationClient.authenticate_user.__doc__)
     def authenticate_user(self, socket_id, user_data=None):
         return self._authentication_client.authenticate_user(
@@ -187,3 +265,23 @@ class Pusher(object):
     def validate_webhook(self, key, signature, body):
         return self._authentication_client.validate_webhook(
             key, signature, body)
+
+    @doc_string(AuthenticationClient.on_webhook.__doc__)
+    def on_webhook(self, event_name, handler=None, channel_prefix=''):
+        return self._authentication_client.on_webhook(
+            event_name, handler, channel_prefix)
+
+    @doc_string(AuthenticationClient.handle_webhook.__doc__)
+    def handle_webhook(self, key, signature, body, executor=None, max_concurrency=None):
+        return self._authentication_client.handle_webhook(
+            key, signature, body, executor, max_concurrency)
+
+    @doc_string(AuthenticationClient.handle_webhook_async.__doc__)
+    def handle_webhook_async(self, key, signature, body, max_concurrency=None):
+        return self._authentication_client.handle_webhook_async(
+            key, signature, body, max_concurrency)
+
+    @doc_string(AuthenticationClient.webhook_verifier.__doc__)
+    def webhook_verifier(self, key, signature, max_size=None):
+        return self._authentication_client.webhook_verifier(
+            key, signature, max_size)
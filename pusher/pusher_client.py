@@ -21,16 +21,23 @@ import time
 import json
 import string
 
+from concurrent.futures import ThreadPoolExecutor
+
 from pusher.util import (
     ensure_text,
     validate_channel,
+    validate_channels,
     validate_socket_id,
     validate_user_id,
     join_attributes,
     data_to_string)
 
 from pusher.client import Client
-from pusher.http import GET, POST, Request, request_method
+from pusher.coalescer import TriggerCoalescer
+from pusher.dispatcher import BackgroundDispatcher, BLOCK
+from pusher.fanout import (
+    MAX_CHANNELS_PER_TRIGGER, MAX_EVENTS_PER_BATCH, chunked, send_chunks)
+from pusher.http import GET, POST, Request, is_async_backend, request_method
 from pusher.crypto import *
 import random
 from datetime import datetime
@@ -52,6 +59,12 @@ class PusherClient(Client):
         json_encoder=None,
         json_decoder=None,
         backend=None,
+        retry=None,
+        circuit_breaker=None,
+        json_codec=None,
+        encryption_cache_size=1024,
+        nonce_source=None,
+        response_cache=None,
         **backend_options):
 
         super(PusherClient, self).__init__(
@@ -68,6 +81,12 @@ class PusherClient(Client):
             json_encoder,
             json_decoder,
             backend,
+            retry=retry,
+            circuit_breaker=circuit_breaker,
+            json_codec=json_codec,
+            encryption_cache_size=encryption_cache_size,
+            nonce_source=nonce_source,
+            response_cache=response_cache,
             **backend_options)
 
     @request_method
@@ -83,18 +102,18 @@ class PusherClient(Client):
             channels, (collections.Sized, collections.Iterable)):
             raise TypeError("Expected a single or a list of channels")
 
-        if len(channels) > 100:
+        if len(channels) > MAX_CHANNELS_PER_TRIGGER:
             raise ValueError("Too many channels")
 
         event_name = ensure_text(event_name, "event_name")
         if len(event_name) > 200:
             raise ValueError("event_name too long")
 
-        data = data_to_string(data, self._json_encoder)
+        data = data_to_string(data, self._json_encoder, self._json_codec)
         if sys.getsizeof(data) > 30720:
             raise ValueError("Too much data")
 
-        channels = list(map(validate_channel, channels))
+        channels = validate_channels(channels)
 
         if len(channels) > 1:
             for chan in channels:
@@ -102,7 +121,7 @@ class PusherClient(Client):
                     raise ValueError("You cannot trigger to multiple channels when using encrypted channels")
 
         if is_encrypted_channel(channels[0]):
-            data = json.dumps(encrypt(channels[0], data, self._encryption_master_key), ensure_ascii=False)
+            data = self._json_codec.dumps(encrypt(channels[0], data, self._encryption_master_key, cache=self._secret_box_cache, nonce_source=self._nonce_source), ensure_ascii=False)
 
         params = {
             'name': event_name,
@@ -114,6 +133,125 @@ class PusherClient(Client):
 
         return Request(self, POST, "/apps/%s/events" % self.app_id, params)
 
+    def trigger_fanout(self, channels, event_name, data, socket_id=None, max_parallel=4):
+        """Trigger an event on any number of channels. The channels are split
+        into chunks of 100 which are sent concurrently, and a FanoutResult
+        with the responses and the failed chunks is returned.
+
+        Only synchronous backends are supported, TypeError is raised with
+        the others.
+
+        :param max_parallel: the maximum number of chunks sent concurrently
+        """
+        if is_async_backend(self.http):
+            raise TypeError("trigger_fanout only supports synchronous backends")
+
+        if isinstance(channels, six.string_types):
+            channels = [channels]
+
+        if isinstance(channels, dict) or not isinstance(
+            channels, (collections.Sized, collections.Iterable)):
+            raise TypeError("Expected a single or a list of channels")
+
+        channels = validate_channels(channels)
+        if not channels:
+            raise ValueError("Expected at least one channel")
+
+        for chan in channels:
+            if is_encrypted_channel(chan):
+                raise ValueError("You cannot fan out to encrypted channels")
+
+        event_name = ensure_text(event_name, "event_name")
+        if len(event_name) > 200:
+            raise ValueError("event_name too long")
+
+        data = data_to_string(data, self._json_encoder, self._json_codec)
+        if sys.getsizeof(data) > 30720:
+            raise ValueError("Too much data")
+
+        if socket_id:
+            socket_id = validate_socket_id(socket_id)
+
+        def send(chunk):
+            return self.trigger(chunk, event_name, data, socket_id)
+
+        return send_chunks(
+            chunked(channels, MAX_CHANNELS_PER_TRIGGER), send, max_parallel)
+
+    def trigger_encrypted_fanout(
+            self, channels, event_name, data, socket_id=None, max_parallel=4,
+            max_workers=None, batch_size=MAX_EVENTS_PER_BATCH):
+        """Trigger an event on any number of encrypted channels. The payload is
+        serialised once and encrypted for every channel on a thread pool, then
+        the events are sent concurrently in batches, and a FanoutResult with
+        the responses and the channels of the failed batches is returned.
+
+        Only synchronous backends are supported, TypeError is raised with
+        the others.
+
+        :param max_parallel: the maximum number of batches sent concurrently
+        :param max_workers: the number of threads encrypting the payload,
+          defaults to the number of CPUs
+        :param batch_size: the number of events sent in each batch
+        """
+        if is_async_backend(self.http):
+            raise TypeError("trigger_encrypted_fanout only supports synchronous backends")
+
+        if isinstance(channels, six.string_types):
+            channels = [channels]
+
+        if isinstance(channels, dict) or not isinstance(
+            channels, (collections.Sized, collections.Iterable)):
+            raise TypeError("Expected a single or a list of channels")
+
+        channels = validate_channels(channels)
+        if not channels:
+            raise ValueError("Expected at least one channel")
+
+        for chan in channels:
+            if not is_encrypted_channel(chan):
+                raise ValueError("Expected only encrypted channels, got: %s" % chan)
+
+        event_name = ensure_text(event_name, "event_name")
+        if len(event_name) > 200:
+            raise ValueError("event_name too long")
+
+        data = data_to_string(data, self._json_encoder, self._json_codec)
+        if sys.getsizeof(data) > 10240:
+            raise ValueError("Too much data")
+
+        if socket_id:
+            socket_id = validate_socket_id(socket_id)
+
+        def encrypt_all(chunk):
+            return [
+                self._json_codec.dumps(encrypt(
+                    chan, data, self._encryption_master_key,
+                    cache=self._secret_box_cache, nonce_source=self._nonce_source), ensure_ascii=False)
+                for chan in chunk]
+
+        max_workers = max_workers or os.cpu_count() or 1
+        chunk_size = -(-len(channels) // max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            ciphertexts = [
+                ciphertext
+                for ciphertexts in executor.map(encrypt_all, chunked(channels, chunk_size))
+                for ciphertext in ciphertexts]
+
+        encrypted = dict(zip(channels, ciphertexts))
+
+        def send(chunk):
+            batch = []
+            for chan in chunk:
+                event = {'channel': chan, 'name': event_name, 'data': encrypted[chan]}
+                if socket_id:
+                    event['socket_id'] = socket_id
+                batch.append(event)
+
+            return self.trigger_batch(batch, already_encoded=True)
+
+        return send_chunks(chunked(channels, batch_size), send, max_parallel)
+
     @request_method
     def trigger_batch(self, batch=[], already_encoded=False):
         """Trigger multiple events with a single HTTP call.
@@ -121,20 +259,8 @@ class PusherClient(Client):
         http://pusher.com/docs/rest_api#method-post-batch-events
         """
         if not already_encoded:
-            for event in batch:
-                validate_channel(event['channel'])
-
-                event_name = ensure_text(event['name'], "event_name")
-                if len(event['name']) > 200:
-                    raise ValueError("event_name too long")
-
-                event['data'] = data_to_string(event['data'], self._json_encoder)
-
-                if sys.getsizeof(event['data']) > 10240:
-                    raise ValueError("Too much data")
-
-                if is_encrypted_channel(event['channel']):
-                    event['data'] = json.dumps(encrypt(event['channel'], event['data'], self._encryption_master_key), ensure_ascii=False)
+            validate_channels([event['channel'] for event in batch])
+            batch = [self._encode_batch_event(event, validate=False) for event in batch]
 
         params = {
             'batch': batch}
@@ -142,6 +268,51 @@ class PusherClient(Client):
         return Request(
             self, POST, "/apps/%s/batch_events" % self.app_id, params)
 
+    def _encode_batch_event(self, event, validate=True):
+        """Validates a single batch event and returns a copy of it with its
+        data encoded, leaving the caller's event unchanged."""
+        event = dict(event)
+        if validate:
+            validate_channel(event['channel'])
+
+        event_name = ensure_text(event['name'], "event_name")
+        if len(event['name']) > 200:
+            raise ValueError("event_name too long")
+
+        event['data'] = data_to_string(event['data'], self._json_encoder, self._json_codec)
+
+        if sys.getsizeof(event['data']) > 10240:
+            raise ValueError("Too much data")
+
+        if is_encrypted_channel(event['channel']):
+            event['data'] = self._json_codec.dumps(encrypt(event['channel'], event['data'], self._encryption_master_key, cache=self._secret_box_cache, nonce_source=self._nonce_source), ensure_ascii=False)
+
+        return event
+
+    def coalesce(self, max_batch_size=10, linger=0.005, max_in_flight=4):
+        """Returns a TriggerCoalescer which buffers single channel triggers
+        and sends them through trigger_batch.
+
+        :param max_batch_size: maximum number of events sent in one batch
+        :param linger: seconds to wait for a batch to fill up before sending
+        :param max_in_flight: number of batches which may be sent concurrently
+        """
+        return TriggerCoalescer(self, max_batch_size, linger, max_in_flight)
+
+    def dispatcher(self, workers=4, max_queue_size=1000, overflow=BLOCK, block_timeout=None):
+        """Returns a BackgroundDispatcher which queues trigger and
+        trigger_batch calls and sends them from worker threads.
+
+        :param workers: number of worker threads sending requests
+        :param max_queue_size: maximum number of calls waiting to be sent
+        :param overflow: what to do when the queue is full, one of 'block',
+          'drop_oldest', 'drop_newest' or 'raise'
+        :param block_timeout: with 'block', seconds to wait for room in the
+          queue before raising PusherQueueFull
+        """
+        return BackgroundDispatcher(
+            self, workers, max_queue_size, overflow, block_timeout)
+
     @request_method
     def channels_info(self, prefix_filter=None, attributes=[]):
         """Get information on multiple channels, see:
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import sqlite3
+import threading
+import time
+
+# Webhooks are accepted up to 300 seconds before or after their time_ms, so
+# a replayed webhook must be remembered for 600 seconds
+DEFAULT_WINDOW = 600
+
+
+class MemoryReplayStore(object):
+    """Remembers the webhooks seen in the last window seconds in a ring of
+    time buckets, dropping a whole bucket at a time as it expires.
+
+    Membership is checked in every bucket, a constant number of lookups.
+    When max_entries are stored the oldest bucket is dropped early, which
+    keeps memory bounded under floods at the cost of forgetting the oldest
+    webhooks.
+
+    :param window: the number of seconds a webhook is remembered for
+    :param buckets: the number of buckets the window is divided into
+    :param max_entries: the maximum number of webhooks remembered
+    :param clock: a callable returning the current time in seconds
+    """
+    def __init__(self, window=DEFAULT_WINDOW, buckets=10, max_entries=100000, clock=time.monotonic):
+        if window <= 0:
+            raise ValueError("window should be positive")
+
+        if buckets < 1:
+            raise ValueError("buckets should be at least 1")
+
+        if max_entries < 1:
+            raise ValueError("max_entries should be at least 1")
+
+        self.window = window
+        self.max_entries = max_entries
+        self.duplicates = 0
+        self.dropped = 0
+        self._span = window / buckets
+        # one more bucket than the window needs, as the current one is
+        # only partly elapsed
+        self._ring = [set() for _ in range(buckets + 1)]
+        self._size = 0
+        self._epoch = None
+        self._clock = clock
+        self._lock = threading.Lock()
+
+
+    def __len__(self):
+        return self._size
+
+
+    def add(self, key):
+        """Records a webhook, returning False if it was already seen."""
+        with self._lock:
+            current = self._advance()
+
+            for bucket in self._ring:
+                if key in bucket:
+                    self.duplicates += 1
+                    return False
+
+            if self._size >= self.max_entries:
+                self._drop_oldest()
+
+            current.add(key)
+            self._size += 1
+            return True
+
+
+    def _advance(self):
+        epoch = int(self._clock() // self._span)
+        if self._epoch is None:
+            self._epoch = epoch
+
+        # clear the buckets which expired since the last call
+        for expired in range(max(self._epoch + 1, epoch - len(self._ring) + 1), epoch + 1):
+            bucket = self._ring[expired % len(self._ring)]
+            self._size -= len(bucket)
+            bucket.clear()
+
+        self._epoch = max(self._epoch, epoch)
+        return self._ring[self._epoch % len(self._ring)]
+
+
+    def _drop_oldest(self):
+        for offset in range(1, len(self._ring) + 1):
+            bucket = self._ring[(self._epoch + offset) % len(self._ring)]
+            if bucket:
+                self._size -= len(bucket)
+                self.dropped += len(bucket)
+                bucket.clear()
+                return
+
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self._size,
+                'max_entries': self.max_entries,
+                'duplicates': self.duplicates,
+                'dropped': self.dropped}
+
+
+class SQLiteReplayStore(object):
+    """Remembers the webhooks seen in the last window seconds in a SQLite
+    database, which can be shared by several worker processes on a host.
+
+    Expired rows are purged every purge_interval additions.
+
+    :param path: the path of the database file
+    :param window: the number of seconds a webhook is remembered for
+    :param purge_interval: the number of additions between purges
+    :param timeout: the number of seconds to wait for a locked database
+    """
+    def __init__(self, path, window=DEFAULT_WINDOW, purge_interval=1000, timeout=5):
+        if window <= 0:
+            raise ValueError("window should be positive")
+
+        self.path = path
+        self.window = window
+        self.purge_interval = purge_interval
+        self.timeout = timeout
+        self._additions = 0
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS pusher_webhooks "
+            "(key TEXT PRIMARY KEY, expires REAL NOT NULL)")
+
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+
+        return connection
+
+
+    def add(self, key):
+        """Records a webhook, returning False if it was already seen."""
+        connection = self._connection()
+        now = time.time()
+
+        connection.execute(
+            "DELETE FROM pusher_webhooks WHERE key = ? AND expires <= ?", (key, now))
+        cursor = connection.execute(
+            "INSERT OR IGNORE INTO pusher_webhooks (key, expires) VALUES (?, ?)",
+            (key, now + self.window))
+
+        self._additions += 1
+        if self._additions % self.purge_interval == 0:
+            self.purge(now)
+
+        return cursor.rowcount == 1
+
+
+    def purge(self, now=None):
+        """Deletes the expired rows."""
+        if now is None:
+            now = time.time()
+
+        self._connection().execute(
+            "DELETE FROM pusher_webhooks WHERE expires <= ?", (now,))
+
+
+    def __len__(self):
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM pusher_webhooks WHERE expires > ?", (time.time(),)).fetchone()[0]
+
+
+    def close(self):
+        """Closes the connection of the calling thread."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -26,6 +26,9 @@ class RequestsBackend(object):
     :param client:  pusher.Client object
     :param options: key-value passed into the requests.request constructor
     """
+    connection_errors = (
+        requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
     def __init__(self, client, **options):
         self.client = client
         self.options = options
@@ -43,4 +46,5 @@ class RequestsBackend(object):
             timeout=self.client.timeout,
             **self.options)
 
-        return process_response(resp.status_code, resp.text)
+        return process_response(
+            resp.status_code, resp.text, resp.headers, self.client.json_codec)
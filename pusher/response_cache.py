@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import asyncio
+import threading
+import time
+
+from concurrent.futures import Future
+
+from pusher.cache import LRUCache
+
+# The number of seconds the responses of each cacheable method are kept for
+DEFAULT_TTLS = {
+    'channel_info': 1.0,
+    'channels_info': 1.0,
+    'users_info': 1.0,
+}
+
+# Returned by _get for the keys not cached or expired
+_MISSING = object()
+
+
+class ResponseCache(object):
+    """A read-through cache of the responses of the channel_info,
+    channels_info and users_info calls of a client, keyed by method name and
+    arguments.
+
+    Concurrent calls missing the same key are coalesced into a single
+    request: threads wait for the request of the first one, and coroutines
+    await a task shared on their event loop when the backend is
+    asynchronous. The cached
+    responses are shared by all the callers and shouldn't be modified.
+
+    :param ttls: a dict of method name to the number of seconds its
+      responses are cached for, merged into DEFAULT_TTLS. A ttl of 0
+      disables the cache for that method.
+    :param maxsize: the maximum number of responses cached
+    :param clock: a callable returning the current time in seconds
+    """
+    def __init__(self, ttls=None, maxsize=1024, clock=time.monotonic):
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._cache = LRUCache(maxsize)
+        self._inflight = {}
+        self._tasks = {}
+        self._clock = clock
+        self._lock = threading.Lock()
+
+
+    def caches(self, method_name):
+        return self.ttls.get(method_name, 0) > 0
+
+
+    def fetch(self, method_name, key, load, is_async=False):
+        """Returns the cached response for key, or calls load to fetch it.
+
+        When is_async is true, load returns an awaitable and a coroutine is
+        returned, which looks the response up once it is awaited.
+        """
+        if is_async:
+            return self._fetch_async(method_name, key, load)
+
+        value = self._get(key)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+
+            else:
+                self.coalesced += 1
+
+        if inflight is not None:
+            return inflight.result()
+
+        try:
+            response = load()
+
+        except BaseException as e:
+            self._done(key, future, exception=e)
+            raise
+
+        self._store(method_name, key, response)
+        self._done(key, future, response)
+        return response
+
+
+    async def _fetch_async(self, method_name, key, load):
+        value = self._get(key)
+        if value is not _MISSING:
+            return value
+
+        # tasks are shared by the callers of the same event loop only
+        loop = asyncio.get_event_loop()
+        with self._lock:
+            task = self._tasks.get((loop, key))
+            if task is None:
+                self.misses += 1
+                task = self._tasks[loop, key] = loop.create_task(
+                    self._load_async(method_name, key, load, loop))
+
+            else:
+                self.coalesced += 1
+
+        # shielded so that a cancelled caller doesn't cancel the others
+        return await asyncio.shield(task)
+
+
+    async def _load_async(self, method_name, key, load, loop):
+        try:
+            response = await load()
+            self._store(method_name, key, response)
+            return response
+
+        finally:
+            with self._lock:
+                del self._tasks[loop, key]
+
+
+    def _get(self, key):
+        entry = self._cache.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires > self._clock():
+                with self._lock:
+                    self.hits += 1
+
+                return value
+
+        return _MISSING
+
+
+    def _store(self, method_name, key, response):
+        self._cache.put(key, (self._clock() + self.ttls[method_name], response))
+
+
+    def _done(self, key, future, response=None, exception=None):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+        if exception is not None:
+            future.set_exception(exception)
+
+        else:
+            future.set_result(response)
+
+
+    def clear(self):
+        self._cache.clear()
+
+
+    def stats(self):
+        """Returns the hits, the misses, which sent a request, the calls
+        coalesced with another one in flight, and the size of the cache."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'size': len(self._cache),
+            'maxsize': self._cache.maxsize}
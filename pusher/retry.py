@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import asyncio
+import email.utils
+import inspect
+import random
+import time
+
+from pusher.errors import PusherBadStatus
+
+
+def parse_retry_after(value):
+    """Returns the number of seconds to wait given the value of a
+    Retry-After header, either a number of seconds or an HTTP date.
+    """
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+
+    except (TypeError, ValueError, IndexError):
+        return None
+
+    if retry_at is None:
+        return None
+
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def is_transient_error(error, backend):
+    """Whether the error is a 5xx or 429 status or a connection error of the
+    backend, which a later attempt may not run into.
+    """
+    if isinstance(error, PusherBadStatus):
+        return error.status is not None and (
+            error.status == 429 or error.status >= 500)
+
+    return isinstance(
+        error, (OSError,) + tuple(getattr(backend, 'connection_errors', ())))
+
+
+class RetryPolicy(object):
+    """Retries requests failing with a 5xx or 429 status or a connection
+    error, waiting a capped exponential backoff with full jitter between
+    attempts. A Retry-After header sent with the error is honoured. The
+    request is signed again for every attempt, keeping its body.
+
+    Works with synchronous backends as well as with backends returning
+    awaitables (AsyncIOBackend, TornadoBackend), in which case a coroutine
+    is returned.
+
+    :param max_attempts: the maximum number of attempts, including the first
+    :param base_delay:   seconds to wait before the first retry
+    :param max_delay:    the maximum backoff between two attempts, a
+      Retry-After header may ask for a longer wait
+    :param deadline:     the maximum number of seconds spent on all the
+      attempts, None for no limit
+    """
+    def __init__(self, max_attempts=3, base_delay=0.1, max_delay=5, deadline=30):
+        if max_attempts < 1:
+            raise ValueError("max_attempts should be at least 1")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+
+    def is_retryable(self, error, backend):
+        return is_transient_error(error, backend)
+
+
+    def backoff(self, attempt):
+        """Returns a random delay before the given retry, starting at 1."""
+        cap = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+
+
+    def next_delay(self, error, backend, attempt, started):
+        """Returns the seconds to wait before retrying after the given failed
+        attempt, or None if the error should be raised.
+        """
+        if attempt >= self.max_attempts or not self.is_retryable(error, backend):
+            return None
+
+        delay = self.backoff(attempt)
+
+        retry_after = parse_retry_after(getattr(error, 'retry_after', None))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        if self.deadline is not None:
+            if time.monotonic() - started + delay > self.deadline:
+                return None
+
+        return delay
+
+
+    def send(self, backend, request, send=None):
+        """Sends the request through the backend until an attempt succeeds or
+        the error can't be retried.
+
+        :param send: the function sending a request, defaults to the
+          backend's send_request
+        """
+        if send is None:
+            send = backend.send_request
+
+        started = time.monotonic()
+        attempt = 1
+
+        while True:
+            try:
+                response = send(request)
+
+            except Exception as e:
+                delay = self.next_delay(e, backend, attempt, started)
+                if delay is None:
+                    raise
+
+                time.sleep(delay)
+                attempt += 1
+                request = request.resigned()
+                continue
+
+            if inspect.isawaitable(response):
+                return self._send_async(
+                    backend, request, send, response, started)
+
+            return response
+
+
+    async def _send_async(self, backend, request, send, response, started):
+        attempt = 1
+
+        while True:
+            try:
+                return await response
+
+            except Exception as e:
+                delay = self.next_delay(e, backend, attempt, started)
+                if delay is None:
+                    raise
+
+            await asyncio.sleep(delay)
+            attempt += 1
+            request = request.resigned()
+            response = send(request)
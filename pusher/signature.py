@@ -24,6 +24,67 @@ except AttributeError:
             lambda x, y: x | y, [ord(x) ^ ord(y) for x, y in zip(a, b)]) == 0
 
 
+class Signer(object):
+    """Signs strings with HMAC-SHA256 keyed with a secret.
+
+    The secret is encoded and the keyed HMAC state computed once, then
+    copied for every signature.
+
+    :param secret: the secret to sign with
+    """
+    def __init__(self, secret):
+        self._hmac = hmac.new(secret.encode('utf8'), digestmod=hashlib.sha256)
+
+
+    def sign(self, string_to_sign):
+        mac = self._hmac.copy()
+        mac.update(string_to_sign.encode('utf8'))
+        return six.text_type(mac.hexdigest())
+
+
+    def sign_many(self, strings_to_sign, prefix=''):
+        """Returns the signatures of the given strings, in order.
+
+        :param prefix: a string prepended to every string to sign, hashed
+          only once
+        """
+        copy = self._hmac.copy
+        if prefix:
+            prefixed = copy()
+            prefixed.update(prefix.encode('utf8'))
+            copy = prefixed.copy
+
+        signatures = []
+
+        for string_to_sign in strings_to_sign:
+            mac = copy()
+            mac.update(string_to_sign.encode('utf8'))
+            signatures.append(six.text_type(mac.hexdigest()))
+
+        return signatures
+
+
+    def hmac(self):
+        """Returns a new HMAC object keyed with the secret, to be fed
+        incrementally."""
+        return self._hmac.copy()
+
+
+    def sign_bytes(self, data):
+        """Signs a bytes, bytearray or memoryview buffer without copying it."""
+        mac = self._hmac.copy()
+        mac.update(data)
+        return six.text_type(mac.hexdigest())
+
+
+    def verify(self, string_to_sign, signature):
+        """Checks the signature of a string, or of a bytes-like buffer."""
+        if isinstance(string_to_sign, six.text_type):
+            return compare_digest(signature, self.sign(string_to_sign))
+
+        return compare_digest(signature, self.sign_bytes(string_to_sign))
+
+
 def sign(secret, string_to_sign):
     return six.text_type(
         hmac.new(
@@ -0,0 +1,551 @@
+# -*- coding: utf-8 -*-
+"""A local stand-in for the Channels HTTP API, to test and load-test
+applications without sending requests to Pusher.
+
+    with StandInServer(app_id='4', key='key', secret='secret') as server:
+        pusher_client = pusher.Pusher(**server.client_options())
+        pusher_client.trigger('my-channel', 'my-event', {'message': 'hi'})
+        server.events
+
+It can also be run in a subprocess, printing the port it listens on:
+
+    python -m pusher.testing --app-id 4 --key key --secret secret [--port PORT]
+"""
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import argparse
+import collections
+import hashlib
+import json
+import random
+import re
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from pusher.signature import Signer, compare_digest
+
+# Pass to inject or in errors to close the connection without a response
+RESET = 'reset'
+
+# The number of seconds the auth_timestamp of a request may be off by
+MAX_CLOCK_SKEW = 600
+
+
+class RecordedRequest(collections.namedtuple(
+        'RecordedRequest', ['method', 'path', 'params', 'body', 'status'])):
+    """A request received by a StandInServer.
+
+    :param params: the decoded query parameters
+    :param body: the raw body
+    :param status: the status answered, or RESET
+    """
+    __slots__ = ()
+
+
+class RecordedEvent(collections.namedtuple(
+        'RecordedEvent', ['channel', 'name', 'data', 'socket_id'])):
+    """An event triggered on a StandInServer, once per channel."""
+    __slots__ = ()
+
+
+class StandInServer(object):
+    """An HTTP server implementing the endpoints of the Channels HTTP API
+    used by the library, on a background thread.
+
+    Requests are authenticated like the API does: the auth_key, the
+    auth_timestamp, the body_md5 of the body and the auth_signature of the
+    query are all checked, and a 401 is answered when one is wrong.
+    Triggered events are recorded, and the channels reported as occupied
+    are set with occupy and vacate.
+
+    Latency is added to every request, and errors are injected either on
+    the next requests with inject, or randomly with error_rate. Pass a
+    seed to make the random latency and errors reproducible.
+
+    :param app_id: the id of the application served
+    :param key: the key of the application
+    :param secret: the secret of the application
+    :param host: the address to listen on
+    :param port: the port to listen on, 0 for any free port
+    :param latency: the number of seconds every request is delayed by
+    :param jitter: the maximum number of seconds randomly added to latency
+    :param error_rate: the probability for a request to fail
+    :param errors: the statuses, or RESET, randomly failed requests fail
+      with
+    :param seed: the seed of the random latency and errors
+    :param record: whether to keep the requests and the events received,
+      which should be False under sustained load to bound memory
+    :param clock: a callable returning the current unix time in seconds
+    """
+    def __init__(
+            self,
+            app_id='1',
+            key='key',
+            secret='secret',
+            host='127.0.0.1',
+            port=0,
+            latency=0,
+            jitter=0,
+            error_rate=0,
+            errors=(500,),
+            seed=None,
+            record=True,
+            clock=time.time):
+        if not 0 <= error_rate <= 1:
+            raise ValueError("error_rate should be between 0 and 1")
+
+        self.app_id = app_id
+        self.key = key
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.errors = tuple(errors)
+        self.record = record
+        self.requests = []
+        self.events = []
+        self.statuses = {}
+        self._event_count = 0
+        self._signer = Signer(secret)
+        self._secret = secret
+        self._address = (host, port)
+        self._clock = clock
+        self._random = random.Random(seed)
+        self._faults = collections.deque()
+        self._channels = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+
+    def __enter__(self):
+        return self.start()
+
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+    def start(self):
+        """Starts listening and serving on a background thread."""
+        self._server = _ThreadingHTTPServer(self._address, _Handler)
+        self._server.stand_in = self
+        # polled more often than by default so that stop returns quickly
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05},
+            name="pusher-stand-in-server")
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = self._thread = None
+
+
+    @property
+    def host(self):
+        return self._server.server_address[0] if self._server else self._address[0]
+
+
+    @property
+    def port(self):
+        return self._server.server_address[1] if self._server else self._address[1]
+
+
+    @property
+    def url(self):
+        return 'http://%s:%d' % (self.host, self.port)
+
+
+    def client_options(self):
+        """Returns the arguments of a client sending its requests to the
+        server."""
+        return {
+            'app_id': self.app_id,
+            'key': self.key,
+            'secret': self._secret,
+            'host': self.host,
+            'port': self.port,
+            'ssl': False}
+
+
+    def inject(self, fault, times=1, retry_after=None):
+        """Fails the next requests, before checking them.
+
+        :param fault: the status to answer, or RESET to close the connection
+        :param times: the number of requests to fail
+        :param retry_after: the value of the Retry-After header answered
+        """
+        with self._lock:
+            self._faults.extend([(fault, retry_after)] * times)
+
+
+    def occupy(self, channel, user_ids=(), subscription_count=None):
+        """Reports a channel as occupied, with the given users for presence
+        channels."""
+        user_ids = list(user_ids)
+        if subscription_count is None:
+            subscription_count = max(len(user_ids), 1)
+
+        with self._lock:
+            self._channels[channel] = (user_ids, subscription_count)
+
+
+    def vacate(self, channel):
+        with self._lock:
+            self._channels.pop(channel, None)
+
+
+    def clear(self):
+        """Forgets the requests, the events and the statuses recorded."""
+        with self._lock:
+            del self.requests[:]
+            del self.events[:]
+            self.statuses.clear()
+            self._event_count = 0
+
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': sum(self.statuses.values()),
+                'statuses': dict(self.statuses),
+                'events': self._event_count}
+
+
+    def handle(self, method, target, body=b''):
+        """Answers a request, returning its status, or RESET, the body and
+        the headers of the response.
+
+        :param method: the HTTP method
+        :param target: the path and the query string of the request
+        :param body: the raw body
+        """
+        parts = urlsplit(target)
+        path = unquote(parts.path)
+        params = dict(parse_qsl(parts.query, keep_blank_values=True))
+
+        delay = self.latency
+        with self._lock:
+            if self.jitter:
+                delay += self._random.uniform(0, self.jitter)
+
+            if self._faults:
+                fault = self._faults.popleft()
+
+            elif self.error_rate and self._random.random() < self.error_rate:
+                fault = (self._random.choice(self.errors), None)
+
+            else:
+                fault = None
+
+        if delay:
+            time.sleep(delay)
+
+        if fault is not None:
+            status, retry_after = fault
+            headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+            response = status, 'Injected error', headers
+
+        else:
+            response = self._answer(method, path, params, body)
+
+        self._record(RecordedRequest(method, path, params, body, response[0]))
+        return response
+
+
+    def _answer(self, method, path, params, body):
+        for route_method, pattern, name in _ROUTES:
+            match = pattern.match(path)
+            if match is not None and route_method == method:
+                break
+
+        else:
+            return 404, 'Not found', {}
+
+        arguments = match.groupdict()
+        app_id = arguments.pop('app_id', None)
+        if app_id is not None and app_id != self.app_id:
+            return 404, 'Unknown app', {}
+
+        error = self._authenticate(method, path, params, body)
+        if error is not None:
+            return 401, error, {}
+
+        try:
+            data = json.loads(body.decode('utf8')) if body else {}
+
+        except ValueError:
+            return 400, 'Request body is not valid JSON', {}
+
+        status, payload = getattr(self, name)(params, data, **arguments)
+        if status != 200:
+            return status, payload, {}
+
+        return 200, json.dumps(payload), {'Content-Type': 'application/json'}
+
+
+    def _authenticate(self, method, path, params, body):
+        """Returns why a request isn't authenticated, or None."""
+        params = dict(params)
+        signature = params.pop('auth_signature', '')
+
+        if params.get('auth_key') != self.key:
+            return 'Unknown auth_key'
+
+        if params.get('auth_version') != '1.0':
+            return 'Unsupported auth_version'
+
+        try:
+            timestamp = int(params.get('auth_timestamp'))
+
+        except (TypeError, ValueError):
+            return 'Missing auth_timestamp'
+
+        if abs(self._clock() - timestamp) > MAX_CLOCK_SKEW:
+            return 'Timestamp expired: given %d, current %d' % (timestamp, self._clock())
+
+        if (body or 'body_md5' in params) and \
+                params.get('body_md5') != hashlib.md5(body).hexdigest():
+            return 'body_md5 does not match the body'
+
+        string_to_sign = '\n'.join([
+            method, path,
+            '&'.join('%s=%s' % (k, params[k]) for k in sorted(params))])
+        if not compare_digest(signature, self._signer.sign(string_to_sign)):
+            return 'Invalid signature: expected HMAC SHA256 hex digest of %r' % string_to_sign
+
+        return None
+
+
+    def _record(self, request):
+        with self._lock:
+            self.statuses[request.status] = self.statuses.get(request.status, 0) + 1
+            if self.record:
+                self.requests.append(request)
+
+
+    def _record_events(self, events):
+        with self._lock:
+            self._event_count += len(events)
+            if self.record:
+                self.events.extend(events)
+
+
+    def _parse_event(self, event, channels_key):
+        if not isinstance(event, dict):
+            return None, 'An event should be an object'
+
+        name, data = event.get('name'), event.get('data')
+        if not isinstance(name, str) or not name or len(name) > 200:
+            return None, 'Invalid event name'
+
+        if not isinstance(data, str):
+            return None, 'The event data should be a string'
+
+        if channels_key == 'channels' and 'channels' in event:
+            channels = event['channels']
+
+        else:
+            channels = [event.get('channel')]
+
+        if not isinstance(channels, list) or not 0 < len(channels) <= 100 or \
+                not all(isinstance(channel, str) and channel for channel in channels):
+            return None, 'Invalid channels'
+
+        socket_id = event.get('socket_id')
+        return [RecordedEvent(c, name, data, socket_id) for c in channels], None
+
+
+    def trigger(self, params, data):
+        events, error = self._parse_event(data, 'channels')
+        if error is not None:
+            return 400, error
+
+        self._record_events(events)
+        return 200, {}
+
+
+    def trigger_batch(self, params, data):
+        batch = data.get('batch') if isinstance(data, dict) else None
+        if not isinstance(batch, list):
+            return 400, 'The batch should be a list of events'
+
+        recorded = []
+        for event in batch:
+            events, error = self._parse_event(event, 'channel')
+            if error is not None:
+                return 400, error
+
+            recorded.extend(events)
+
+        self._record_events(recorded)
+        return 200, {}
+
+
+    def channels_info(self, params, data):
+        prefix = params.get('filter_by_prefix', '')
+        attributes = _attributes(params)
+        if 'user_count' in attributes and not prefix.startswith('presence-'):
+            return 400, 'user_count may only be requested for presence channels'
+
+        with self._lock:
+            channels = dict(
+                (channel, {'user_count': len(users)} if 'user_count' in attributes else {})
+                for channel, (users, _) in self._channels.items()
+                if channel.startswith(prefix))
+
+        return 200, {'channels': channels}
+
+
+    def channel_info(self, params, data, channel):
+        attributes = _attributes(params)
+        if 'user_count' in attributes and not channel.startswith('presence-'):
+            return 400, 'user_count may only be requested for presence channels'
+
+        with self._lock:
+            users, subscription_count = self._channels.get(channel, ([], 0))
+            occupied = channel in self._channels
+
+        info = {'occupied': occupied}
+        if 'user_count' in attributes:
+            info['user_count'] = len(users)
+
+        if 'subscription_count' in attributes:
+            info['subscription_count'] = subscription_count
+
+        return 200, info
+
+
+    def users_info(self, params, data, channel):
+        if not channel.startswith('presence-'):
+            return 400, 'Users may only be requested for presence channels'
+
+        with self._lock:
+            users, _ = self._channels.get(channel, ([], 0))
+
+        return 200, {'users': [{'id': user_id} for user_id in users]}
+
+
+    def terminate_user_connections(self, params, data, user_id):
+        return 200, {}
+
+
+def _attributes(params):
+    return set(filter(None, params.get('info', '').split(',')))
+
+
+_ROUTES = [
+    ('POST', re.compile(r'^/apps/(?P<app_id>[^/]+)/events$'), 'trigger'),
+    ('POST', re.compile(r'^/apps/(?P<app_id>[^/]+)/batch_events$'), 'trigger_batch'),
+    ('GET', re.compile(r'^/apps/(?P<app_id>[^/]+)/channels$'), 'channels_info'),
+    ('GET', re.compile(r'^/apps/(?P<app_id>[^/]+)/channels/(?P<channel>[^/]+)$'), 'channel_info'),
+    ('GET', re.compile(r'^/apps/(?P<app_id>[^/]+)/channels/(?P<channel>[^/]+)/users$'), 'users_info'),
+    ('POST', re.compile(
+        r'^(?:/apps/(?P<app_id>[^/]+))?/users/(?P<user_id>[^/]+)/terminate_connections$'),
+        'terminate_user_connections'),
+]
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer, which is only available from Python 3.7
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # the headers and the body are written separately
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._respond()
+
+
+    def do_POST(self):
+        self._respond()
+
+
+    def _respond(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        status, payload, headers = self.server.stand_in.handle(self.command, self.path, body)
+
+        if status == RESET:
+            # close with a RST rather than a FIN
+            self.connection.setsockopt(
+                socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.close_connection = True
+            return
+
+        payload = payload.encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', headers.pop('Content-Type', 'text/plain'))
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _fault(value):
+    return RESET if value == RESET else int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app-id', default='1')
+    parser.add_argument('--key', default='key')
+    parser.add_argument('--secret', default='secret')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0, help='seconds added to every request')
+    parser.add_argument('--jitter', type=float, default=0, help='maximum random seconds added')
+    parser.add_argument('--error-rate', type=float, default=0, help='probability for a request to fail')
+    parser.add_argument(
+        '--error', type=_fault, action='append',
+        help="a status, or 'reset', failed requests fail with (500 by default)")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--no-record', action='store_true', help="don't keep the requests and events")
+    args = parser.parse_args()
+
+    server = StandInServer(
+        args.app_id, args.key, args.secret, args.host, args.port,
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        errors=args.error or (500,), seed=args.seed, record=not args.no_record)
+    server.start()
+    print(server.port)
+    sys.stdout.flush()
+
+    try:
+        while True:
+            time.sleep(3600)
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -21,6 +21,9 @@ class TornadoBackend(object):
     :param client:   pusher.Client object
     :param options:  options for the httpclient.HTTPClient constructor
     """
+    connection_errors = (tornado.httpclient.HTTPClientError,)
+    is_async = True
+
     def __init__(self, client, **options):
         self.client = client
         self.options = options
@@ -41,7 +44,12 @@ class TornadoBackend(object):
                 result = response.result()
                 code = result.code
                 body = (result.body or b'').decode('utf8')
-                future.set_result(process_response(code, body))
+                try:
+                    future.set_result(process_response(
+                        code, body, result.headers, self.client.json_codec))
+
+                except Exception as e:
+                    future.set_exception(e)
 
         request = tornado.httpclient.HTTPRequest(
             request.url,
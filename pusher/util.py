@@ -6,11 +6,15 @@ from __future__ import (
     absolute_import,
     division)
 
+import asyncio
 import json
 import re
 import six
 import sys
 import base64
+
+from pusher import instrumentation
+
 SERVER_TO_USER_PREFIX = "#server-to-user-"
 
 channel_name_re = re.compile(r'\A[-a-zA-Z0-9_=@,.;]+\Z')
@@ -70,7 +74,56 @@ def is_base64(s):
         return False
 
 
+class ValidatedNameCache(object):
+    """Remembers names which passed validation, so that validating them
+    again is a set lookup instead of a regex match. Each kind of name is
+    kept in its own set of at most maxsize names, which is emptied when
+    full. Only valid names are ever added.
+
+    :param maxsize: the maximum number of names of each kind
+    """
+    def __init__(self, maxsize=4096):
+        if maxsize < 1:
+            raise ValueError("maxsize should be at least 1")
+
+        self.maxsize = maxsize
+        self.channels = set()
+        self.user_ids = set()
+        self.socket_ids = set()
+
+    def add(self, names, name):
+        if len(names) >= self.maxsize:
+            names.clear()
+
+        names.add(name)
+
+    def clear(self):
+        self.channels.clear()
+        self.user_ids.clear()
+        self.socket_ids.clear()
+
+
+_name_cache = None
+
+
+def enable_validation_cache(maxsize=4096):
+    """Caches the channels, user ids and socket ids which passed validation,
+    for all the clients of the process."""
+    global _name_cache
+    _name_cache = ValidatedNameCache(maxsize)
+    return _name_cache
+
+
+def disable_validation_cache():
+    global _name_cache
+    _name_cache = None
+
+
 def validate_user_id(user_id):
+    cache = _name_cache
+    if cache is not None and type(user_id) is six.text_type and user_id in cache.user_ids:
+        return user_id
+
     user_id = ensure_text(user_id, "user_id")
 
     length = len(user_id)
@@ -83,10 +136,17 @@ def validate_user_id(user_id):
     if not channel_name_re.match(user_id):
         raise ValueError("Invalid user id: '{}'".format(user_id))
 
+    if cache is not None:
+        cache.add(cache.user_ids, user_id)
+
     return user_id
 
 
 def validate_channel(channel):
+    cache = _name_cache
+    if cache is not None and type(channel) is six.text_type and channel in cache.channels:
+        return channel
+
     channel = ensure_text(channel, "channel")
 
     if len(channel) > 200:
@@ -98,15 +158,44 @@ def validate_channel(channel):
     elif not channel_name_re.match(channel):
         raise ValueError("Invalid Channel: %s" % channel)
 
+    if cache is not None:
+        cache.add(cache.channels, channel)
+
     return channel
 
 
+def validate_channels(channels):
+    """Validates a list of channels, returning them as text. A single
+    ValueError reports all the invalid channels."""
+    validated = []
+    errors = []
+
+    for channel in channels:
+        try:
+            validated.append(validate_channel(channel))
+
+        except ValueError as e:
+            errors.append(str(e))
+
+    if errors:
+        raise ValueError("; ".join(errors))
+
+    return validated
+
+
 def validate_socket_id(socket_id):
+    cache = _name_cache
+    if cache is not None and type(socket_id) is six.text_type and socket_id in cache.socket_ids:
+        return socket_id
+
     socket_id = ensure_text(socket_id, "socket_id")
 
     if not socket_id_re.match(socket_id):
         raise ValueError("Invalid socket ID: %s" % socket_id)
 
+    if cache is not None:
+        cache.add(cache.socket_ids, socket_id)
+
     return socket_id
 
 
@@ -122,10 +211,21 @@ def join_attributes(attributes):
     return six.text_type(',').join(attributes)
 
 
-def data_to_string(data, json_encoder):
+def data_to_string(data, json_encoder, codec=None):
+    if instrumentation.enabled:
+        with instrumentation.phase('serialize'):
+            return _data_to_string(data, json_encoder, codec)
+
+    return _data_to_string(data, json_encoder, codec)
+
+
+def _data_to_string(data, json_encoder, codec):
     if isinstance(data, six.string_types):
         return ensure_text(data, "data")
 
+    elif codec is not None:
+        return codec.dumps(data, ensure_ascii=False)
+
     else:
         return json.dumps(data, cls=json_encoder, ensure_ascii=False)
 
@@ -136,3 +236,50 @@ def doc_string(doc):
         return f
 
     return decorator
+
+
+class LoopBound(object):
+    """Holds an object, like an HTTP session, which can only be used from
+    the event loop it was created on. It is created for the running loop
+    on first access, and created again when the running loop changes, in
+    which case the previous one is closed.
+
+    :param create: a callable returning a new object
+    :param is_closed: a callable returning whether an object is closed
+    :param close: a callable returning a coroutine closing an object
+    """
+    def __init__(self, create, is_closed, close):
+        self._create = create
+        self._is_closed = is_closed
+        self._close = close
+        self._value = None
+        self._loop = None
+
+
+    def get(self):
+        loop = asyncio.get_event_loop()
+        if self._value is None or self._is_closed(self._value) or self._loop is not loop:
+            if self._value is not None and not self._is_closed(self._value):
+                _close_later(self._close(self._value), self._loop)
+
+            self._value = self._create()
+            self._loop = loop
+
+        return self._value
+
+
+    async def aclose(self):
+        """Closes the current object, if any."""
+        value, self._value, self._loop = self._value, None, None
+        if value is not None and not self._is_closed(value):
+            await self._close(value)
+
+
+def _close_later(close, loop):
+    # A loop running on another thread owns the connections, but one which
+    # isn't running might never run again
+    if loop.is_running():
+        asyncio.run_coroutine_threadsafe(close, loop)
+
+    else:
+        asyncio.ensure_future(close)
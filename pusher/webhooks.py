@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (
+    print_function,
+    unicode_literals,
+    absolute_import,
+    division)
+
+import asyncio
+import inspect
+import json
+import re
+import threading
+import time
+
+from concurrent.futures import wait
+
+from pusher.signature import compare_digest
+from pusher.util import ensure_text
+
+# Webhooks older, or newer, than this are rejected
+MAX_WEBHOOK_AGE_MS = 300000
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def is_fresh(time_ms):
+    """Checks the time_ms of a webhook body is close enough to now."""
+    if not time_ms:
+        return False
+
+    return abs(time.time() * 1000 - time_ms) <= MAX_WEBHOOK_AGE_MS
+
+
+async def _call(handler, event):
+    result = handler(event)
+    if inspect.isawaitable(result):
+        result = await result
+
+    return result
+
+
+class WebhookVerifier(object):
+    """Verifies a webhook body fed in chunks as they are received, then
+    yields its events one at a time.
+
+    The HMAC is updated with every chunk so that nothing is left to hash
+    once the body is complete. The raw body is kept until it is verified,
+    as events can't be trusted before, but it is only decoded and parsed
+    event by event as they are consumed.
+
+        verifier = client.webhook_verifier(key, signature)
+        for chunk in chunks:
+            verifier.update(chunk)
+
+        if verifier.finalize():
+            for event in verifier.events():
+                ...
+
+    :param client: a pusher.AuthenticationClient instance
+    :param key: the X-Pusher-Key header of the request
+    :param signature: the X-Pusher-Signature header of the request
+    :param max_size: the maximum size of the body in bytes, None for no
+      limit. Larger bodies are not buffered and fail verification.
+
+    When the client has a webhook_replay_store, duplicate is set after a
+    successful verification to whether the webhook was seen before.
+    """
+    def __init__(self, client, key, signature, max_size=None):
+        self._key_matches = ensure_text(key, "key") == client.key
+        self._signature = ensure_text(signature, "signature")
+        self._mac = client.signer.hmac()
+        self._replay_store = client.webhook_replay_store
+        self._decoder = (client.json_codec.json_decoder or json.JSONDecoder)()
+        self._max_size = max_size
+        self._buffer = bytearray()
+        self._too_large = False
+        self._text = None
+        self._events_pos = None
+        self._fields = None
+        self._verified = None
+        self.duplicate = None
+
+
+    def update(self, chunk):
+        """Feeds the next chunk of the body."""
+        if self._verified is not None:
+            raise ValueError("The webhook has already been finalized")
+
+        if self._too_large:
+            return
+
+        if self._max_size is not None and len(self._buffer) + len(chunk) > self._max_size:
+            self._too_large = True
+            self._buffer = bytearray()
+            return
+
+        self._mac.update(chunk)
+        self._buffer += chunk
+
+
+    def finalize(self):
+        """Checks the key, the signature and the time of the webhook once the
+        whole body has been fed, returning whether it is valid.
+        """
+        if self._verified is None:
+            self._verified = self._verify()
+
+        return self._verified
+
+
+    @property
+    def time_ms(self):
+        return self._fields.get('time_ms') if self._verified else None
+
+
+    def events(self):
+        """Yields the events of a verified webhook, parsing them lazily.
+
+        A ValueError is raised if the webhook has not been verified, or when
+        reaching an event that is not valid JSON.
+        """
+        if not self._verified:
+            raise ValueError("The webhook has not been verified")
+
+        if self._events_pos is None:
+            return iter(())
+
+        return (event for event, _ in self._iter_array(self._events_pos))
+
+
+    def _verify(self):
+        if not self._key_matches or self._too_large:
+            return False
+
+        if not compare_digest(self._signature, self._mac.hexdigest()):
+            return False
+
+        try:
+            self._text = self._buffer.decode('utf-8')
+            self._buffer = None
+            self._scan()
+
+        except ValueError:
+            return False
+
+        if not is_fresh(self._fields.get('time_ms')):
+            return False
+
+        if self._replay_store is not None:
+            self.duplicate = not self._replay_store.add(self._signature)
+
+        return True
+
+
+    def _skip(self, pos):
+        return WHITESPACE.match(self._text, pos).end()
+
+
+    def _scan(self):
+        """Reads the top level fields of the body until both time_ms and the
+        start of the events array have been found, skipping over the events
+        only if time_ms comes after them.
+        """
+        text = self._text
+        self._fields = {}
+
+        pos = self._skip(0)
+        if text[pos:pos + 1] != '{':
+            raise ValueError("Expected a JSON object")
+
+        pos = self._skip(pos + 1)
+        if text[pos:pos + 1] == '}':
+            return
+
+        while True:
+            name, pos = self._decoder.raw_decode(text, pos)
+            pos = self._skip(pos)
+            if text[pos:pos + 1] != ':':
+                raise ValueError("Expected ':' at position %d" % pos)
+
+            pos = self._skip(pos + 1)
+
+            if name == 'events':
+                if text[pos:pos + 1] != '[':
+                    raise ValueError("Expected the events to be an array")
+
+                self._events_pos = pos
+                if 'time_ms' in self._fields:
+                    return
+
+                pos = self._skip_array(pos)
+
+            else:
+                self._fields[name], pos = self._decoder.raw_decode(text, pos)
+                if name == 'time_ms' and self._events_pos is not None:
+                    return
+
+            pos = self._skip(pos)
+            if text[pos:pos + 1] == '}':
+                return
+
+            if text[pos:pos + 1] != ',':
+                raise ValueError("Expected ',' or '}' at position %d" % pos)
+
+            pos = self._skip(pos + 1)
+
+
+    def _skip_array(self, pos):
+        """Returns the position following the array starting at pos."""
+        end = self._skip(pos + 1)
+        if self._text[end:end + 1] == ']':
+            return end + 1
+
+        for _, end in self._iter_array(pos):
+            pass
+
+        return end
+
+
+    def _iter_array(self, pos):
+        """Yields the items of the array starting at pos along with the
+        position following each of them, the last one being the position
+        after the array."""
+        text = self._text
+        pos = self._skip(pos + 1)
+        if text[pos:pos + 1] == ']':
+            return
+
+        while True:
+            item, pos = self._decoder.raw_decode(text, pos)
+            pos = self._skip(pos)
+
+            if text[pos:pos + 1] == ']':
+                yield item, pos + 1
+                return
+
+            if text[pos:pos + 1] != ',':
+                raise ValueError("Expected ',' or ']' at position %d" % pos)
+
+            yield item, pos
+            pos = self._skip(pos + 1)
+
+
+class WebhookDispatcher(object):
+    """Routes webhook events to the handlers registered for their name and,
+    optionally, a prefix of their channel.
+
+    The handlers are indexed by event name, then by prefix length and
+    prefix, so routing an event costs one lookup per distinct prefix length
+    registered for its name rather than a scan of all the handlers.
+    Handlers registered for the name None receive every event.
+    """
+    def __init__(self):
+        self._handlers = {}
+        self._table = None
+        self._lock = threading.Lock()
+
+
+    def on(self, event_name, handler=None, channel_prefix=''):
+        """Registers a handler called with each matching event. Used without
+        a handler, returns a decorator.
+
+        :param event_name: e.g. 'channel_occupied', or None for all events
+        :param channel_prefix: only route events whose channel starts with it
+        """
+        if handler is None:
+            return lambda handler: self.on(event_name, handler, channel_prefix)
+
+        channel_prefix = ensure_text(channel_prefix, "channel_prefix")
+        with self._lock:
+            self._handlers.setdefault(event_name, []).append((channel_prefix, handler))
+            self._table = None
+
+        return handler
+
+
+    def handlers_for(self, event):
+        """Returns the handlers of an event, in registration order within
+        each prefix, shorter prefixes first."""
+        table = self._table
+        if table is None:
+            table = self._compile()
+
+        entries = table.get(event.get('name'))
+        if entries is None:
+            entries = table.get(None)
+            if entries is None:
+                return []
+
+        channel = event.get('channel') or ''
+        handlers = []
+        for length, by_prefix in entries:
+            if length > len(channel):
+                break
+
+            handlers.extend(by_prefix.get(channel[:length], ()))
+
+        return handlers
+
+
+    def dispatch(self, events, executor=None, max_concurrency=None):
+        """Calls the handlers of every event and returns their results.
+
+        When an executor is given the handlers are run on it, with at most
+        max_concurrency of them submitted at once. The first exception
+        raised by a handler is raised once all the handlers have run.
+
+        :param events: an iterable of events, such as the 'events' of a
+          validated webhook or WebhookVerifier.events()
+        :param executor: a concurrent.futures.Executor, or None to run the
+          handlers in the calling thread
+        :param max_concurrency: the maximum number of handlers in flight
+        """
+        if executor is None:
+            return [
+                handler(event)
+                for event in events
+                for handler in self.handlers_for(event)]
+
+        semaphore = None
+        if max_concurrency is not None:
+            semaphore = threading.BoundedSemaphore(max_concurrency)
+
+        futures = []
+        for event in events:
+            for handler in self.handlers_for(event):
+                if semaphore is not None:
+                    semaphore.acquire()
+
+                future = executor.submit(handler, event)
+                if semaphore is not None:
+                    future.add_done_callback(lambda _: semaphore.release())
+
+                futures.append(future)
+
+        wait(futures)
+        return [future.result() for future in futures]
+
+
+    async def dispatch_async(self, events, max_concurrency=None):
+        """Runs the handlers of every event concurrently on the running event
+        loop and returns their results, awaiting the handlers which are
+        coroutine functions.
+
+        :param events: an iterable of events
+        :param max_concurrency: the maximum number of handlers in flight
+        """
+        semaphore = None
+        if max_concurrency is not None:
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(handler, event):
+            if semaphore is None:
+                return await _call(handler, event)
+
+            async with semaphore:
+                return await _call(handler, event)
+
+        return await asyncio.gather(*[
+            run(handler, event)
+            for event in events
+            for handler in self.handlers_for(event)])
+
+
+    def _compile(self):
+        with self._lock:
+            if self._table is not None:
+                return self._table
+
+            table = {}
+            for event_name in self._handlers:
+                registered = list(self._handlers[event_name])
+                if event_name is not None:
+                    registered.extend(self._handlers.get(None, ()))
+
+                by_length = {}
+                for prefix, handler in registered:
+                    by_length.setdefault(len(prefix), {}).setdefault(prefix, []).append(handler)
+
+                table[event_name] = sorted(by_length.items())
+
+            self._table = table
+            return table
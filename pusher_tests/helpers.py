@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import asyncio
+
+
+def run(coroutine):
+    """Runs a coroutine on a new event loop and returns its result, like
+    asyncio.run which is only available from Python 3.7."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+
+    finally:
+        loop.close()
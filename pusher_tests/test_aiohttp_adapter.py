@@ -1,4 +1,4 @@
 import sys
 
-if sys.version_info >= (3,5,3):
+if sys.version_info >= (3,8):
     from .aio.aiohttp_adapter_test import *
@@ -105,6 +105,48 @@ class TestAuthenticationClient(unittest.TestCase):
         self.assertEqual(actual, expected)
         dumps_mock.assert_called_once_with(custom_data, cls=None)
 
+    def test_authenticate_many_matches_authenticate(self):
+        authenticationClient = AuthenticationClient(
+            key=u'foo',
+            secret=u'bar',
+            host=u'host',
+            app_id=u'4',
+            encryption_master_key_base64=u'OHRXNUZRTG5pUTFzQlFGd3J3N3Q2VFZFc0paZDEweVk=',
+            ssl=True)
+
+        channels = [u'private-channel', u'private-encrypted-channel', u'presence-channel']
+
+        for custom_data in [None, {u'user_id': u'fred', u'user_info': {u'key': u'value'}}]:
+            expected = dict(
+                (channel, authenticationClient.authenticate(channel, u'345.23', custom_data))
+                for channel in channels)
+
+            self.assertEqual(authenticationClient.authenticate_many(u'345.23', channels, custom_data), expected)
+
+    def test_authenticate_many_serializes_custom_data_once(self):
+        authenticationClient = AuthenticationClient(
+            key=u'foo', secret=u'bar', host=u'host', app_id=u'4', ssl=True)
+
+        custom_data = {u'user_id': u'fred'}
+
+        with mock.patch('json.dumps', return_value=u'{"user_id":"fred"}') as dumps_mock:
+            actual = authenticationClient.authenticate_many(
+                u'345.43245', [u'presence-a', u'presence-b'], custom_data)
+
+        dumps_mock.assert_called_once_with(custom_data, cls=None)
+        self.assertEqual(sorted(actual), [u'presence-a', u'presence-b'])
+
+    def test_authenticate_many_types(self):
+        authenticationClient = AuthenticationClient(
+            key=u'foo', secret=u'bar', host=u'host', app_id=u'4', ssl=True)
+
+        self.assertEqual(
+            authenticationClient.authenticate_many(u'345.23', u'private-channel'),
+            {u'private-channel': authenticationClient.authenticate(u'private-channel', u'345.23')})
+        self.assertRaises(TypeError, lambda: authenticationClient.authenticate_many(u'345.23', [2423]))
+        self.assertRaises(TypeError, lambda: authenticationClient.authenticate_many(234234, [u'plah']))
+        self.assertRaises(ValueError, lambda: authenticationClient.authenticate_many(u'345.23', [u'plah', u'::']))
+
     def test_authenticate_for_user(self):
         authentication_client = AuthenticationClient(
             key=u'thisisaauthkey',
@@ -127,6 +169,45 @@ class TestAuthenticationClient(unittest.TestCase):
         self.assertEqual(actual, expected)
         dumps_mock.assert_called_once_with(user_data, cls=None)
 
+    def test_auth_cache_is_disabled_by_default(self):
+        authenticationClient = AuthenticationClient(
+            key=u'foo', secret=u'bar', host=u'host', app_id=u'4', ssl=True)
+
+        self.assertEqual(authenticationClient.auth_cache, None)
+
+    def test_auth_cache_returns_previous_results(self):
+        authenticationClient = AuthenticationClient(
+            key=u'foo', secret=u'bar', host=u'host', app_id=u'4', ssl=True, auth_cache_size=10)
+
+        first = authenticationClient.authenticate(u'private-channel', u'345.23')
+        first[u'extra'] = u'mutated by the caller'
+
+        with mock.patch.object(authenticationClient.signer, 'sign') as sign_mock:
+            second = authenticationClient.authenticate(u'private-channel', u'345.23')
+
+        sign_mock.assert_not_called()
+        self.assertEqual(second, {
+            u'auth': u"foo:89955e77e1b40e33df6d515a5ecbba86a01dc816a5b720da18a06fd26f7d92ff"
+        })
+
+        user_data = {u'id': u'123'}
+        first = authenticationClient.authenticate_user(u'12345.6789', user_data)
+        self.assertEqual(authenticationClient.authenticate_user(u'12345.6789', user_data), first)
+        self.assertNotEqual(authenticationClient.authenticate_user(u'12345.6789', {u'id': u'124'}), first)
+
+        stats = authenticationClient.auth_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (2, 3, 3))
+
+    def test_auth_cache_keys_on_custom_data(self):
+        authenticationClient = AuthenticationClient(
+            key=u'foo', secret=u'bar', host=u'host', app_id=u'4', ssl=True, auth_cache_size=10)
+
+        fred = authenticationClient.authenticate(u'presence-channel', u'345.23', {u'user_id': u'fred'})
+        bob = authenticationClient.authenticate(u'presence-channel', u'345.23', {u'user_id': u'bob'})
+
+        self.assertNotEqual(fred, bob)
+        self.assertEqual(authenticationClient.authenticate(u'presence-channel', u'345.23', {u'user_id': u'fred'}), fred)
+
     def test_validate_webhook_success_case(self):
         authenticationClient = AuthenticationClient(
             key=u'foo', secret=u'bar', host=u'host', app_id=u'4', ssl=True)
@@ -138,6 +219,22 @@ class TestAuthenticationClient(unittest.TestCase):
             self.assertEqual(authenticationClient.validate_webhook(authenticationClient.key, signature, body), {u'time_ms': 1000000})
 
 
+    def test_validate_webhook_raw_body(self):
+        authenticationClient = AuthenticationClient(
+            key=u'foo', secret=u'bar', host=u'host', app_id=u'4', ssl=True)
+
+        body = u'{"time_ms": 1000000, "events": [{"name": "vacated", "channel": "cé"}]}'.encode('utf8')
+        signature = six.text_type(hmac.new(b'bar', body, hashlib.sha256).hexdigest())
+
+        with mock.patch('time.time', return_value=1200):
+            for raw in [body, bytearray(body), memoryview(body)]:
+                self.assertEqual(
+                    authenticationClient.validate_webhook(u'foo', signature, raw),
+                    json.loads(body.decode('utf8')))
+
+            self.assertEqual(
+                authenticationClient.validate_webhook(u'foo', signature, bytearray(body) + b' '), None)
+
     def test_validate_webhook_bad_types(self):
         authenticationClient = AuthenticationClient(
             key=u'foo', secret=u'bar', host=u'host', app_id=u'4', ssl=True)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import unittest
+
+from pusher.cache import LRUCache, TTLCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_get_and_put(self):
+        cache = LRUCache(maxsize=2)
+
+        self.assertEqual(cache.get(u'a'), None)
+        cache.put(u'a', 1)
+        self.assertEqual(cache.get(u'a'), 1)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 2})
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(maxsize=2)
+        cache.put(u'a', 1)
+        cache.put(u'b', 2)
+        cache.get(u'a')
+        cache.put(u'c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get(u'b'), None)
+        self.assertEqual(cache.get(u'a'), 1)
+        self.assertEqual(cache.get(u'c'), 3)
+
+    def test_clear(self):
+        cache = LRUCache()
+        cache.put(u'a', 1)
+        cache.clear()
+
+        self.assertEqual(len(cache), 0)
+
+    def test_maxsize_should_be_positive(self):
+        self.assertRaises(ValueError, lambda: LRUCache(maxsize=0))
+
+
+class TestTTLCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.cache = TTLCache(maxsize=2, ttl=10, clock=lambda: self.now)
+
+    def test_entries_expire(self):
+        self.cache.put(u'a', 1)
+
+        self.now = 9
+        self.assertEqual(self.cache.get(u'a'), 1)
+
+        self.now = 10
+        self.assertEqual(self.cache.get(u'a'), None)
+        self.assertEqual(len(self.cache), 0)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['expirations']), (1, 1, 1))
+
+    def test_evictions_are_counted(self):
+        for key in [u'a', u'b', u'c']:
+            self.cache.put(key, key)
+
+        self.assertEqual(self.cache.get(u'a'), None)
+        self.assertEqual(self.cache.get(u'c'), u'c')
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_ttl_should_be_positive(self):
+        self.assertRaises(ValueError, lambda: TTLCache(ttl=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import asyncio
+import types
+import unittest
+
+from pusher.pusher_client import PusherClient
+from pusher.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from pusher.errors import PusherBadStatus, PusherBadRequest, PusherCircuitOpen
+
+from .helpers import run
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.breaker = CircuitBreaker(
+            failure_rate=0.5, min_calls=4, window=10, reset_timeout=30, half_open_max_calls=2)
+        self.pusher_client = PusherClient(
+            app_id=u'4', key=u'key', secret=u'secret', host=u'somehost', circuit_breaker=self.breaker)
+
+    def trigger(self, outcome):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=[outcome]):
+            return self.pusher_client.trigger(u'chan', u'event', u'data')
+
+    def fail(self, error=None):
+        self.assertRaises(Exception, lambda: self.trigger(error or PusherBadStatus(u'503: down', 503)))
+
+    def test_trips_on_failure_rate(self):
+        self.trigger({})
+        self.trigger({})
+        self.fail()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        self.fail()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertRaises(PusherCircuitOpen, lambda: self.trigger({}))
+
+    def test_client_errors_do_not_count(self):
+        for _ in range(4):
+            self.fail(PusherBadRequest(u'nope'))
+
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.breaker.stats(), {'state': CLOSED, 'calls': 4, 'failures': 0})
+
+    def test_old_calls_leave_the_window(self):
+        self.fail()
+        self.fail()
+        self.now += 11
+        self.trigger({})
+        self.trigger({})
+
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.breaker.stats()['failures'], 0)
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker(min_calls=1, slow_call_duration=1)
+
+        def slow_send(request):
+            self.now += 2
+            return {}
+
+        breaker.wrap(slow_send)(None)
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_half_open_probes(self):
+        for _ in range(4):
+            self.fail()
+
+        self.now += 30
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+
+        self.trigger({})
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.trigger({})
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_limits_probes_and_reopens_on_failure(self):
+        for _ in range(4):
+            self.fail()
+
+        self.now += 30
+        gate = self.breaker.wrap(lambda request: {})
+        self.breaker._acquire()
+        self.breaker._acquire()
+        self.assertRaises(PusherCircuitOpen, lambda: gate(None))
+
+        self.breaker.reset()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        for _ in range(4):
+            self.fail()
+        self.now += 30
+        self.fail()
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_cancelled_probes_free_their_slot(self):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=30)
+
+        async def hang(request):
+            await asyncio.Event().wait()
+
+        async def cancel():
+            probe = asyncio.ensure_future(breaker.wrap(hang)(None))
+            await asyncio.sleep(0)
+            probe.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await probe
+
+        self.assertRaises(PusherBadStatus, lambda: breaker.wrap(self.raise_bad_status)(None))
+        self.now += 30
+        run(cancel())
+
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertEqual(breaker.wrap(lambda request: {})(None), {})
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_stale_probes_are_replaced(self):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=30)
+
+        async def send(request):
+            return {}
+
+        @types.coroutine
+        def never_awaited(request):
+            yield
+
+        self.assertRaises(PusherBadStatus, lambda: breaker.wrap(self.raise_bad_status)(None))
+        self.now += 30
+        breaker.wrap(never_awaited)(None).close()
+        self.assertRaises(PusherCircuitOpen, lambda: breaker.wrap(send)(None))
+
+        self.now += 30
+        self.assertEqual(run(breaker.wrap(send)(None)), {})
+        self.assertEqual(breaker.state, CLOSED)
+
+    def raise_bad_status(self, request):
+        raise PusherBadStatus(u'503: down', 503)
+
+    def test_async_responses_are_recorded(self):
+        breaker = CircuitBreaker(min_calls=1)
+
+        async def send(request):
+            raise PusherBadStatus(u'500: oops', 500)
+
+        with self.assertRaises(PusherBadStatus):
+            run(breaker.wrap(send)(None))
+
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_for_host_shares_breakers(self):
+        first = PusherClient(app_id=u'4', key=u'key', secret=u'secret', host=u'shared', circuit_breaker=True)
+        second = PusherClient(app_id=u'5', key=u'key', secret=u'secret', host=u'shared', circuit_breaker=True)
+        other = PusherClient(app_id=u'4', key=u'key', secret=u'secret', host=u'other', circuit_breaker=True)
+
+        self.assertIs(first.circuit_breaker, second.circuit_breaker)
+        self.assertIsNot(first.circuit_breaker, other.circuit_breaker)
+
+
+if __name__ == '__main__':
+    unittest.main()
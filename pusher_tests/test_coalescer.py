@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import json
+import threading
+import time
+import unittest
+
+from pusher.pusher_client import PusherClient
+from pusher.errors import PusherBadStatus
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+class TestTriggerCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.pusher_client = PusherClient(app_id=u'4', key=u'key', secret=u'secret', host=u'somehost')
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def record(self, response=None):
+        def send_request(request):
+            with self.lock:
+                self.requests.append(request)
+            return response if response is not None else {}
+
+        return send_request
+
+    def test_triggers_are_sent_as_one_batch(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.record()):
+            with self.pusher_client.coalesce(max_batch_size=10, linger=10) as coalescer:
+                futures = [
+                    coalescer.trigger(u'chan-%d' % i, u'some_event', {u'n': i})
+                    for i in range(10)]
+
+                for future in futures:
+                    self.assertEqual(future.result(timeout=5), {})
+
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.requests[0].path, u'/apps/4/batch_events')
+
+        batch = json.loads(self.requests[0].body.decode('utf8'))['batch']
+        self.assertEqual([event['channel'] for event in batch], [u'chan-%d' % i for i in range(10)])
+        self.assertEqual(json.loads(batch[3]['data']), {u'n': 3})
+
+    def test_linger_deadline_flushes_partial_batch(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.record()):
+            coalescer = self.pusher_client.coalesce(max_batch_size=10, linger=0.01)
+            future = coalescer.trigger(u'some_channel', u'some_event', u'data')
+
+            self.assertEqual(future.result(timeout=5), {})
+            coalescer.close()
+
+        self.assertEqual(len(self.requests), 1)
+
+    def test_each_future_gets_its_own_batch_result(self):
+        response = {u'batch': [{u'event_id': u'a'}, {u'event_id': u'b'}]}
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.record(response)):
+            with self.pusher_client.coalesce(max_batch_size=2, linger=10) as coalescer:
+                first = coalescer.trigger(u'one', u'some_event', u'data')
+                second = coalescer.trigger(u'two', u'some_event', u'data')
+
+                self.assertEqual(first.result(timeout=5), {u'event_id': u'a'})
+                self.assertEqual(second.result(timeout=5), {u'event_id': u'b'})
+
+    def test_api_errors_are_set_on_every_future(self):
+        error = PusherBadStatus(u'500: oops')
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=error):
+            with self.pusher_client.coalesce(max_batch_size=2, linger=10) as coalescer:
+                futures = [coalescer.trigger(u'chan', u'some_event', u'data') for _ in range(2)]
+
+                for future in futures:
+                    self.assertIs(future.exception(timeout=5), error)
+
+    def test_invalid_events_raise_immediately(self):
+        with self.pusher_client.coalesce() as coalescer:
+            self.assertRaises(ValueError, lambda: coalescer.trigger(u'so/me_channel!', u'some_event', u'data'))
+            self.assertRaises(ValueError, lambda: coalescer.trigger(u'chan', u'some_event', u'data', u'not-a-socket'))
+
+    def test_multiple_channels_are_sent_on_their_own(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.record()):
+            with self.pusher_client.coalesce() as coalescer:
+                future = coalescer.trigger([u'one', u'two'], u'some_event', u'data')
+                self.assertEqual(future.result(timeout=5), {})
+
+        self.assertEqual(self.requests[0].path, u'/apps/4/events')
+
+    def test_close_without_waiting_sends_pending_events(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.record()):
+            coalescer = self.pusher_client.coalesce(max_batch_size=2, linger=10)
+            futures = [coalescer.trigger(u'chan', u'some_event', u'data') for _ in range(3)]
+            coalescer.close(wait=False)
+
+            for future in futures:
+                self.assertEqual(future.result(timeout=5), {})
+
+        self.assertEqual(len(self.requests), 2)
+
+    def test_events_left_after_a_full_batch_keep_their_deadline(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.record()):
+            with self.pusher_client.coalesce(max_batch_size=2, linger=0.2) as coalescer:
+                started = time.monotonic()
+                # keeps the flusher from taking the first batch for a while
+                with coalescer._condition:
+                    futures = [coalescer.trigger(u'chan', u'some_event', u'data') for _ in range(3)]
+                    time.sleep(0.15)
+
+                futures[2].result(timeout=5)
+                elapsed = time.monotonic() - started
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertLess(elapsed, 0.3)
+
+    def test_flush_sends_every_pending_batch(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.record()):
+            with self.pusher_client.coalesce(max_batch_size=2, linger=10) as coalescer:
+                with coalescer._condition:
+                    futures = [coalescer.trigger(u'chan', u'some_event', u'data') for _ in range(5)]
+                    coalescer.flush()
+
+                for future in futures:
+                    self.assertEqual(future.result(timeout=5), {})
+
+        self.assertEqual(len(self.requests), 3)
+
+    def test_async_backends_are_rejected(self):
+        async def send_request(request):
+            return {}
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', send_request):
+            self.assertRaises(TypeError, lambda: self.pusher_client.coalesce())
+
+    def test_closed_coalescer_refuses_triggers(self):
+        coalescer = self.pusher_client.coalesce()
+        coalescer.close()
+
+        self.assertRaises(RuntimeError, lambda: coalescer.trigger(u'chan', u'some_event', u'data'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import json
+import unittest
+from decimal import Decimal
+
+from pusher.codec import JSONCodec, CODECS, get_codec
+from pusher.pusher_client import PusherClient
+from pusher.authentication_client import AuthenticationClient
+
+
+def installed_codecs():
+    codecs = []
+    for name in sorted(CODECS):
+        try:
+            codecs.append(get_codec(name))
+        except ImportError:
+            pass
+
+    return codecs
+
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return str(o)
+
+        return super(DecimalEncoder, self).default(o)
+
+
+class TestCodec(unittest.TestCase):
+    data = {u'message': u'héllo wörld 你好', u'n': [1, 2.5, None, True], u'url': u'a/b'}
+
+    def test_default_codec_is_stdlib(self):
+        self.assertIs(type(get_codec()), JSONCodec)
+        self.assertIs(type(get_codec('json')), JSONCodec)
+
+    def test_codec_instances_are_returned(self):
+        codec = JSONCodec()
+        self.assertIs(get_codec(codec), codec)
+
+    def test_unknown_codec(self):
+        self.assertRaises(ValueError, lambda: get_codec('yaml'))
+
+    def test_auto_picks_an_installed_codec(self):
+        self.assertTrue(isinstance(get_codec('auto'), JSONCodec))
+        self.assertIn(get_codec('auto').name, (u'ujson', u'json'))
+
+    def test_big_integers(self):
+        data = {u'n': [2 ** 64, -2 ** 63 - 1, 2 ** 100]}
+        for codec in installed_codecs():
+            self.assertEqual(json.loads(codec.dumpb(data).decode('utf8')), data, codec.name)
+            self.assertEqual(json.loads(codec.dumps(data)), data, codec.name)
+
+    def test_nan_and_infinities(self):
+        data = [float('inf'), float('-inf')]
+        for codec in installed_codecs():
+            expected = [None, None] if codec.name in (u'orjson', u'msgspec') else data
+            self.assertEqual(json.loads(codec.dumps(data)), expected, codec.name)
+            self.assertEqual(json.loads(codec.dumpb(data).decode('utf8')), expected, codec.name)
+
+    def test_codecs_agree_with_stdlib(self):
+        for codec in installed_codecs():
+            text = codec.dumps(self.data, ensure_ascii=False)
+            body = codec.dumpb(self.data)
+
+            self.assertEqual(json.loads(text), self.data, codec.name)
+            self.assertEqual(json.loads(body.decode('utf8')), self.data, codec.name)
+            self.assertEqual(codec.loads(json.dumps(self.data)), self.data, codec.name)
+            self.assertEqual(codec.loads(body), self.data, codec.name)
+            self.assertEqual(codec.loads(bytearray(body)), self.data, codec.name)
+            self.assertEqual(codec.loads(memoryview(body)), self.data, codec.name)
+
+    def test_codecs_use_custom_encoder(self):
+        for name in sorted(CODECS):
+            try:
+                codec = get_codec(name, json_encoder=DecimalEncoder)
+            except ImportError:
+                continue
+
+            self.assertEqual(json.loads(codec.dumps({u'money': Decimal('1.32')})), {u'money': u'1.32'}, name)
+
+    def test_client_uses_codec(self):
+        for codec in installed_codecs():
+            pc = PusherClient(app_id=u'4', key=u'key', secret=u'secret', json_codec=codec)
+            request = pc.trigger.make_request(u'chan', u'event', self.data)
+
+            body = json.loads(request.body.decode('utf8'))
+            self.assertEqual(json.loads(body[u'data']), self.data, codec.name)
+
+    def test_authenticate_signs_codec_output(self):
+        for codec in installed_codecs():
+            client = AuthenticationClient(app_id=u'4', key=u'key', secret=u'secret', json_codec=codec)
+            auth = client.authenticate(u'presence-c1', u'1.1', {u'user_id': u'1'})
+
+            self.assertEqual(json.loads(auth[u'channel_data']), {u'user_id': u'1'})
+            self.assertEqual(
+                auth[u'auth'],
+                u'key:' + client.signer.sign(u'1.1:presence-c1:' + auth[u'channel_data']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 from __future__ import print_function, absolute_import
 
 import json
+import os
 import six
 import unittest
 
@@ -107,3 +108,92 @@ class TestCrypto(unittest.TestCase):
 
     def test_decrypt(self):
         self.assertEqual(True, True)
+
+    def test_encrypt_with_cache(self):
+        key = b"OTk5OTk5OTk5OTk5OTk5OTk5OTk5OTk5"
+        nonce = "XAJI0Y6DPBHSAHXTHV3A3ZMF"
+        cache = crypto.SecretBoxCache(maxsize=2)
+
+        expected = crypto.encrypt("private-encrypted-a", "payload", key, nonce)
+
+        self.assertEqual(crypto.encrypt("private-encrypted-a", "payload", key, nonce, cache=cache), expected)
+        self.assertEqual(crypto.encrypt("private-encrypted-a", "payload", key, nonce, cache=cache), expected)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_secret_box_cache_is_bounded(self):
+        key = b"OTk5OTk5OTk5OTk5OTk5OTk5OTk5OTk5"
+        cache = crypto.SecretBoxCache(maxsize=2)
+
+        for channel in [b"a", b"b", b"c"]:
+            cache.get(channel, key)
+
+        self.assertEqual(cache.stats()["size"], 2)
+
+        shared_secret, box = cache.get(b"c", key)
+        self.assertEqual(shared_secret, crypto.generate_shared_secret(b"c", key))
+
+    def test_secret_box_cache_is_invalidated_by_a_new_master_key(self):
+        cache = crypto.SecretBoxCache()
+        old_key = b"OTk5OTk5OTk5OTk5OTk5OTk5OTk5OTk5"
+        new_key = b"this is 32 bytes 123456789012345"
+
+        cache.get(b"a", old_key)
+        shared_secret, _ = cache.get(b"a", new_key)
+
+        self.assertEqual(shared_secret, crypto.generate_shared_secret(b"a", new_key))
+        self.assertEqual(cache.stats()["size"], 1)
+        self.assertEqual(cache.stats()["hits"], 0)
+
+    def test_buffered_nonce_source(self):
+        source = crypto.BufferedNonceSource(block_size=4)
+
+        nonces = [source() for _ in range(10)]
+
+        self.assertEqual(set(len(nonce) for nonce in nonces), set([24]))
+        self.assertEqual(len(set(nonces)), 10)
+
+    def test_buffered_nonce_source_checks_the_pid_without_register_at_fork(self):
+        source = crypto.BufferedNonceSource()
+        source()
+        remaining = list(source._nonces)
+
+        # simulate a fork on a python without register_at_fork
+        source._pid = -1
+        has_register_at_fork = crypto._has_register_at_fork
+        crypto._has_register_at_fork = False
+        try:
+            nonce = source()
+        finally:
+            crypto._has_register_at_fork = has_register_at_fork
+
+        self.assertNotIn(nonce, remaining)
+        self.assertEqual(source._pid, os.getpid())
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+    def test_buffered_nonce_source_is_not_shared_with_forked_children(self):
+        source = crypto.BufferedNonceSource()
+        source()
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            os.write(write_fd, source())
+            os._exit(0)
+
+        os.close(write_fd)
+        child_nonce = os.read(read_fd, 24)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+
+        self.assertEqual(len(child_nonce), 24)
+        self.assertNotEqual(child_nonce, source())
+
+    def test_encrypt_with_nonce_source(self):
+        key = b"OTk5OTk5OTk5OTk5OTk5OTk5OTk5OTk5"
+        nonce = b"XAJI0Y6DPBHSAHXTHV3A3ZMF"
+
+        self.assertEqual(
+            crypto.encrypt("private-encrypted-a", "payload", key, nonce_source=lambda: nonce),
+            crypto.encrypt("private-encrypted-a", "payload", key, nonce))
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import threading
+import time
+import unittest
+
+from pusher.pusher_client import PusherClient
+from pusher.dispatcher import BackgroundDispatcher, BLOCK, DROP_OLDEST, DROP_NEWEST, RAISE
+from pusher.errors import PusherBadStatus, PusherQueueFull, PusherEventDropped
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+class TestBackgroundDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.pusher_client = PusherClient(app_id=u'4', key=u'key', secret=u'secret', host=u'somehost')
+        self.release = threading.Event()
+        self.requests = []
+
+    def blocking_send(self, request):
+        self.release.wait(5)
+        self.requests.append(request)
+        return {}
+
+    def test_trigger_returns_future(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', return_value={}) as send_request:
+            with self.pusher_client.dispatcher(workers=2) as dispatcher:
+                future = dispatcher.trigger(u'some_channel', u'some_event', u'data')
+                batch_future = dispatcher.trigger_batch([{u'channel': u'c', u'name': u'e', u'data': u'd'}])
+
+                self.assertEqual(future.result(timeout=5), {})
+                self.assertEqual(batch_future.result(timeout=5), {})
+
+        self.assertEqual(send_request.call_count, 2)
+        self.assertEqual(dispatcher.stats(), {'queued': 2, 'sent': 2, 'dropped': 0, 'failed': 0, 'pending': 0})
+
+    def test_failures_are_counted_and_set_on_future(self):
+        error = PusherBadStatus(u'500: oops')
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=error):
+            with self.pusher_client.dispatcher(workers=1) as dispatcher:
+                future = dispatcher.trigger(u'some_channel', u'some_event', u'data')
+                invalid = dispatcher.trigger(u'so/me_channel!', u'some_event', u'data')
+
+                self.assertIs(future.exception(timeout=5), error)
+                self.assertIsInstance(invalid.exception(timeout=5), ValueError)
+
+        self.assertEqual(dispatcher.stats()['failed'], 2)
+
+    def fill(self, overflow):
+        dispatcher = BackgroundDispatcher(
+            self.pusher_client, workers=1, max_queue_size=1, overflow=overflow, block_timeout=0.01)
+        # the first call is taken by the worker, the second one fills the queue
+        first = dispatcher.trigger(u'chan', u'event', u'first')
+        while dispatcher.stats()['pending']:
+            time.sleep(0.001)
+        second = dispatcher.trigger(u'chan', u'event', u'second')
+        return dispatcher, first, second
+
+    def test_raise_policy(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.blocking_send):
+            dispatcher, _, _ = self.fill(RAISE)
+            self.assertRaises(PusherQueueFull, lambda: dispatcher.trigger(u'chan', u'event', u'third'))
+            self.release.set()
+            dispatcher.close()
+
+    def test_block_policy_times_out(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.blocking_send):
+            dispatcher, _, _ = self.fill(BLOCK)
+            self.assertRaises(PusherQueueFull, lambda: dispatcher.trigger(u'chan', u'event', u'third'))
+            self.release.set()
+            dispatcher.close()
+
+    def test_drop_newest_policy(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.blocking_send):
+            dispatcher, first, second = self.fill(DROP_NEWEST)
+            third = dispatcher.trigger(u'chan', u'event', u'third')
+            self.release.set()
+            dispatcher.close()
+
+        self.assertIsInstance(third.exception(timeout=5), PusherEventDropped)
+        self.assertEqual(second.result(timeout=5), {})
+        self.assertEqual(dispatcher.stats()['dropped'], 1)
+
+    def test_drop_oldest_policy(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.blocking_send):
+            dispatcher, first, second = self.fill(DROP_OLDEST)
+            third = dispatcher.trigger(u'chan', u'event', u'third')
+            self.release.set()
+            dispatcher.close()
+
+        self.assertIsInstance(second.exception(timeout=5), PusherEventDropped)
+        self.assertEqual(third.result(timeout=5), {})
+        self.assertEqual(dispatcher.stats()['sent'], 2)
+
+    def test_close_without_draining_drops_pending_calls(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.blocking_send):
+            dispatcher, first, second = self.fill(BLOCK)
+            dispatcher.close(drain=False, timeout=0)
+            self.release.set()
+
+        self.assertIsInstance(second.exception(timeout=5), PusherEventDropped)
+        self.assertEqual(first.result(timeout=5), {})
+        self.assertRaises(RuntimeError, lambda: dispatcher.trigger(u'chan', u'event', u'data'))
+
+    def test_invalid_overflow_policy(self):
+        self.assertRaises(ValueError, lambda: self.pusher_client.dispatcher(overflow=u'nope'))
+
+    def test_async_backends_are_rejected(self):
+        async def send_request(request):
+            return {}
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', send_request):
+            self.assertRaises(TypeError, lambda: self.pusher_client.dispatcher())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import base64
+import json
+import threading
+import unittest
+
+import nacl.secret
+
+from pusher.pusher_client import PusherClient
+from pusher.errors import PusherBadStatus
+from pusher.crypto import generate_shared_secret
+from pusher.fanout import chunked
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+class AsyncBackend(object):
+    def __init__(self, client, **options):
+        pass
+
+    async def send_request(self, request):
+        return {}
+
+
+class TestFanout(unittest.TestCase):
+    def setUp(self):
+        self.pusher_client = PusherClient(app_id=u'4', key=u'key', secret=u'secret', host=u'somehost')
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def send_request(self, request):
+        with self.lock:
+            self.requests.append(request)
+
+        channels = json.loads(request.body.decode('utf8'))['channels']
+        if u'chan-250' in channels:
+            raise PusherBadStatus(u'500: oops')
+
+        return {u'channels': len(channels)}
+
+    def test_chunked(self):
+        self.assertEqual(chunked([1, 2, 3, 4, 5], 2), [[1, 2], [3, 4], [5]])
+
+    def test_trigger_fanout_splits_channels_into_chunks(self):
+        channels = [u'chan-%d' % i for i in range(230)]
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request):
+            result = self.pusher_client.trigger_fanout(channels, u'some_event', {u'a': 1}, max_parallel=2)
+
+        self.assertTrue(result.ok)
+        self.assertEqual(sorted(r[u'channels'] for r in result.responses), [30, 100, 100])
+
+        sent = sorted(c for r in self.requests for c in json.loads(r.body.decode('utf8'))['channels'])
+        self.assertEqual(sent, sorted(channels))
+
+        for request in self.requests:
+            self.assertEqual(json.loads(request.body.decode('utf8'))['data'], u'{"a": 1}')
+
+    def test_trigger_fanout_reports_failed_chunks(self):
+        channels = [u'chan-%d' % i for i in range(300)]
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request):
+            result = self.pusher_client.trigger_fanout(channels, u'some_event', u'data')
+
+        self.assertFalse(result.ok)
+        self.assertEqual(len(result.responses), 2)
+        self.assertEqual(len(result.failures), 1)
+        self.assertEqual(result.failures[0].channels, channels[200:])
+        self.assertIsInstance(result.failures[0].error, PusherBadStatus)
+
+    def test_trigger_fanout_validates_channels_before_sending(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request):
+            self.assertRaises(ValueError, lambda: self.pusher_client.trigger_fanout(
+                [u'good', u'so/me_channel!'], u'some_event', u'data'))
+            self.assertRaises(ValueError, lambda: self.pusher_client.trigger_fanout(
+                [u'good', u'private-encrypted-chan'], u'some_event', u'data'))
+            self.assertRaises(ValueError, lambda: self.pusher_client.trigger_fanout(
+                [], u'some_event', u'data'))
+
+        self.assertEqual(self.requests, [])
+
+    def test_trigger_fanout_validates_events_before_sending(self):
+        channels = [u'channel-%d' % i for i in range(250)]
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request):
+            self.assertRaises(ValueError, lambda: self.pusher_client.trigger_fanout(
+                channels, u'e' * 201, u'data'))
+            self.assertRaises(ValueError, lambda: self.pusher_client.trigger_fanout(
+                channels, u'some_event', u'x' * 30720))
+            self.assertRaises(ValueError, lambda: self.pusher_client.trigger_fanout(
+                channels, u'some_event', u'data', socket_id=u'invalid'))
+
+        self.assertEqual(self.requests, [])
+
+    def test_fanouts_reject_async_backends(self):
+        client = PusherClient(app_id=u'4', key=u'key', secret=u'secret', host=u'somehost', backend=AsyncBackend)
+
+        self.assertRaises(TypeError, lambda: client.trigger_fanout([u'chan'], u'some_event', u'data'))
+        self.assertRaises(TypeError, lambda: client.trigger_encrypted_fanout(
+            [u'private-encrypted-chan'], u'some_event', u'data'))
+
+
+class TestEncryptedFanout(unittest.TestCase):
+    def setUp(self):
+        self.pusher_client = PusherClient(
+            app_id=u'4', key=u'key', secret=u'secret', host=u'somehost',
+            encryption_master_key_base64=u'OHRXNUZRTG5pUTFzQlFGd3J3N3Q2VFZFc0paZDEweVk=')
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def send_request(self, request):
+        with self.lock:
+            self.requests.append(request)
+
+        batch = json.loads(request.body.decode('utf8'))['batch']
+        if any(event[u'channel'] == u'private-encrypted-13' for event in batch):
+            raise PusherBadStatus(u'500: oops')
+
+        return {u'batch': [{} for _ in batch]}
+
+    def decrypt(self, channel, data):
+        payload = json.loads(data)
+        box = nacl.secret.SecretBox(generate_shared_secret(
+            channel.encode('utf8'), self.pusher_client._encryption_master_key))
+
+        return box.decrypt(
+            base64.b64decode(payload[u'ciphertext']), base64.b64decode(payload[u'nonce']))
+
+    def test_trigger_encrypted_fanout_encrypts_for_every_channel(self):
+        channels = [u'private-encrypted-%d' % i for i in range(25)]
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request):
+            result = self.pusher_client.trigger_encrypted_fanout(
+                channels, u'some_event', {u'a': 1}, socket_id=u'1.1', max_workers=3)
+
+        self.assertEqual(sorted(len(json.loads(r.body.decode('utf8'))['batch']) for r in self.requests), [5, 10, 10])
+        self.assertEqual(len(result.responses), 2)
+        self.assertEqual(result.failures[0].channels, channels[10:20])
+
+        events = [e for r in self.requests for e in json.loads(r.body.decode('utf8'))['batch']]
+        self.assertEqual(sorted(e[u'channel'] for e in events), sorted(channels))
+
+        nonces = set()
+        for event in events:
+            self.assertEqual(event[u'name'], u'some_event')
+            self.assertEqual(event[u'socket_id'], u'1.1')
+            self.assertEqual(self.decrypt(event[u'channel'], event[u'data']), b'{"a": 1}')
+            nonces.add(json.loads(event[u'data'])[u'nonce'])
+
+        self.assertEqual(len(nonces), len(channels))
+
+    def test_trigger_encrypted_fanout_rejects_unencrypted_channels(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request):
+            self.assertRaises(ValueError, lambda: self.pusher_client.trigger_encrypted_fanout(
+                [u'private-encrypted-1', u'public'], u'some_event', u'data'))
+            self.assertRaises(ValueError, lambda: self.pusher_client.trigger_encrypted_fanout(
+                [], u'some_event', u'data'))
+
+        self.assertEqual(self.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
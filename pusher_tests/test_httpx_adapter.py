@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import asyncio
+import json
+import ssl
+import unittest
+import warnings
+
+from pusher import Pusher
+from pusher.errors import PusherBadRequest
+
+from .helpers import run
+
+try:
+    import httpx
+    from pusher.httpx import HttpxBackend, AsyncHttpxBackend
+except ImportError:
+    httpx = None
+
+
+def mock_transport(requests, status=200, body=u'{}'):
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(status, text=body)
+
+    return httpx.MockTransport(handler)
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class TestHttpxBackend(unittest.TestCase):
+  def setUp(self):
+    self.requests = []
+
+  def pusher(self, backend, **options):
+    return Pusher(app_id=u'4', key=u'key', secret=u'secret', host=u'api.pusherapp.com',
+                  backend=backend, **options)
+
+  def test_ssl_verifies_with_bundled_certificates(self):
+    with warnings.catch_warnings(record=True) as caught:
+      warnings.simplefilter('always')
+      pusher = self.pusher(HttpxBackend, ssl=True)
+      pusher.http.close()
+
+    self.assertEqual([w for w in caught if issubclass(w.category, DeprecationWarning)], [])
+    self.assertTrue(isinstance(
+      self.pusher(AsyncHttpxBackend, ssl=True).http._client_options['verify'], ssl.SSLContext))
+
+  def test_trigger_httpx_success(self):
+    pusher = self.pusher(HttpxBackend, transport=mock_transport(self.requests))
+
+    with pusher.http:
+      response = pusher.trigger(u'test_channel', u'test', {u'data': u'yolo'})
+
+    self.assertEqual(response, {})
+    self.assertEqual(self.requests[0].url.path, u'/apps/4/events')
+    self.assertEqual(self.requests[0].headers['content-type'], u'application/json')
+    self.assertEqual(json.loads(self.requests[0].content)[u'channels'], [u'test_channel'])
+
+  def test_error_statuses_are_processed(self):
+    pusher = self.pusher(HttpxBackend, transport=mock_transport(self.requests, 400, u'nope'))
+
+    self.assertRaises(PusherBadRequest, lambda: pusher.trigger(u'test_channel', u'test', u'data'))
+
+  def test_trigger_async_httpx_success(self):
+    pusher = self.pusher(AsyncHttpxBackend, transport=mock_transport(self.requests))
+
+    async def trigger():
+      async with pusher.http:
+        return await pusher.trigger(u'test_channel', u'test', {u'data': u'yolo'})
+
+    self.assertEqual(run(trigger()), {})
+    self.assertEqual(self.requests[0].url.path, u'/apps/4/events')
+
+  def test_async_session_of_a_closed_loop_is_closed(self):
+    pusher = self.pusher(AsyncHttpxBackend, transport=mock_transport(self.requests))
+
+    async def session():
+      return pusher.http.session
+
+    async def trigger():
+      await pusher.trigger(u'test_channel', u'test', u'data')
+      await asyncio.sleep(0)
+      await pusher.http.aclose()
+
+    previous = run(session())
+    run(trigger())
+    self.assertTrue(previous.is_closed)
+
+  def test_async_session_of_an_idle_loop_is_closed(self):
+    pusher = self.pusher(AsyncHttpxBackend, transport=mock_transport(self.requests))
+
+    async def session():
+      return pusher.http.session
+
+    async def trigger():
+      await pusher.trigger(u'test_channel', u'test', u'data')
+      await asyncio.sleep(0)
+
+    loop, other = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+      previous = other.run_until_complete(session())
+      loop.run_until_complete(trigger())
+      self.assertTrue(previous.is_closed)
+      loop.run_until_complete(pusher.http.aclose())
+
+    finally:
+      loop.close()
+      other.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import asyncio
+import base64
+import json
+import threading
+import unittest
+
+from pusher import instrumentation
+from pusher.authentication_client import AuthenticationClient
+from pusher.errors import PusherBadStatus
+from pusher.http import process_response
+from pusher.instrumentation import HistogramRecorder
+from pusher.pusher_client import PusherClient
+from pusher.retry import RetryPolicy
+from pusher.signature import sign
+
+from .helpers import run
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.records = []
+        instrumentation.add_listener(self.records.append)
+        self.pusher_client = PusherClient(
+            app_id=u'4', key=u'key', secret=u'secret', host=u'somehost',
+            encryption_master_key_base64=u'OHRXNUZRTG5pUTFzQlFGd3J3N3Q2VFZFc0paZDEweVk=')
+
+    def tearDown(self):
+        instrumentation.remove_listener(self.records.append)
+
+    def send_request(self, request):
+        return process_response(200, u'{}')
+
+    def test_disabled_without_listeners(self):
+        instrumentation.remove_listener(self.records.append)
+        self.assertFalse(instrumentation.enabled)
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request):
+            self.pusher_client.trigger(u'chan', u'event', {u'a': 1})
+
+        self.assertEqual(self.records, [])
+        instrumentation.add_listener(self.records.append)
+        self.assertTrue(instrumentation.enabled)
+
+    def test_trigger_phases(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request):
+            self.pusher_client.trigger(u'private-encrypted-chan', u'event', {u'a': 1})
+
+        record, = self.records
+        self.assertEqual(record.operation, u'trigger')
+        self.assertEqual(
+            sorted(record.phases),
+            [u'encrypt', u'process_response', u'request', u'send', u'serialize'])
+        self.assertEqual(record.status, 200)
+        self.assertEqual(record.response_bytes, 2)
+        self.assertGreater(record.request_bytes, 0)
+        self.assertEqual((record.attempts, record.retries, record.error), (1, 0, None))
+        self.assertGreaterEqual(record.duration, sum(record.phases.values()))
+
+    def test_retries_and_errors(self):
+        client = PusherClient(
+            app_id=u'4', key=u'key', secret=u'secret', host=u'somehost',
+            retry=RetryPolicy(max_attempts=3, base_delay=0))
+
+        with mock.patch.object(client.http, 'send_request', side_effect=lambda request: process_response(503, u'busy')):
+            self.assertRaises(PusherBadStatus, lambda: client.channels_info())
+
+        record, = self.records
+        self.assertEqual((record.attempts, record.retries, record.status), (3, 2, 503))
+        self.assertIsInstance(record.error, PusherBadStatus)
+
+    def test_async_backends(self):
+        async def send_request(request):
+            await asyncio.sleep(0)
+            return process_response(200, u'{"channels": {}}')
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=send_request):
+            self.assertEqual(run(self.pusher_client.channels_info()), {u'channels': {}})
+
+        record, = self.records
+        self.assertEqual(record.status, 200)
+        self.assertIn(u'process_response', record.phases)
+        self.assertIn(u'send', record.phases)
+
+    def test_authentication_operations(self):
+        client = AuthenticationClient(app_id=u'4', key=u'key', secret=u'secret', host=u'somehost')
+        client.authenticate(u'private-chan', u'1.1')
+        client.authenticate_user(u'1.1', {u'id': u'1'})
+
+        body = json.dumps({u'time_ms': 1000000, u'events': []})
+        with mock.patch('time.time', return_value=1200):
+            client.validate_webhook(u'key', sign(u'secret', body), body)
+
+        self.assertEqual(
+            [record.operation for record in self.records],
+            [u'authenticate', u'authenticate_user', u'validate_webhook'])
+        self.assertEqual(sorted(self.records[2].phases), [u'parse', u'verify'])
+        self.assertEqual(self.records[2].request_bytes, len(body))
+
+    def test_thread_local_fallback(self):
+        current = instrumentation._ThreadLocalVar()
+        token = current.set(u'outer')
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(current.get()))
+        thread.start()
+        thread.join()
+
+        self.assertEqual((current.get(), seen), (u'outer', [None]))
+        current.reset(token)
+        self.assertEqual(current.get(), None)
+
+    def test_histogram_recorder(self):
+        recorder = HistogramRecorder(bounds=[0.001, 0.01])
+        for phases, duration in [({u'send': 0.0005}, 0.002), ({u'send': 0.005}, 0.02)]:
+            record = instrumentation.Record(u'trigger')
+            record.phases = phases
+            record.duration = duration
+            record.status = 200
+            record.attempts = 2
+            recorder(record)
+
+        snapshot = recorder.snapshot()[u'trigger']
+        self.assertEqual(snapshot[u'histograms'][u'send'][u'buckets'], [1, 1, 0])
+        self.assertEqual(snapshot[u'histograms'][u'total'][u'buckets'], [0, 1, 1])
+        self.assertEqual(snapshot[u'statuses'], {200: 2})
+        self.assertEqual(snapshot[u'retries'], 2)
+        self.assertEqual(recorder.percentile(u'trigger', u'send', 50), 0.001)
+        self.assertEqual(recorder.percentile(u'trigger', u'total', 99), float('inf'))
+        self.assertEqual(recorder.percentile(u'other', u'total', 99), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import json
+import threading
+import unittest
+
+from pusher.authentication_client import AuthenticationClient
+from pusher.occupancy import OccupancyIndex, OccupancyReconciler
+from pusher.signature import sign
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+class TestOccupancyIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = OccupancyIndex()
+
+    def test_channel_events(self):
+        for channel in [u'presence-room-2', u'private-a', u'presence-room-1', u'presence-lobby']:
+            self.index.apply({u'name': u'channel_occupied', u'channel': channel})
+
+        self.index.apply({u'name': u'channel_occupied', u'channel': u'private-a'})
+        self.index.apply({u'name': u'channel_vacated', u'channel': u'presence-lobby'})
+
+        self.assertEqual(self.index.channels(), [u'presence-room-1', u'presence-room-2', u'private-a'])
+        self.assertEqual(self.index.channels(u'presence-room-'), [u'presence-room-1', u'presence-room-2'])
+        self.assertEqual(self.index.channels(u'presence-x'), [])
+        self.assertTrue(self.index.is_occupied(u'private-a'))
+        self.assertFalse(self.index.is_occupied(u'presence-lobby'))
+
+    def test_member_events(self):
+        self.index.apply({u'name': u'member_added', u'channel': u'presence-a', u'user_id': u'1'})
+        self.index.apply({u'name': u'member_added', u'channel': u'presence-a', u'user_id': u'2'})
+        self.index.apply({u'name': u'member_removed', u'channel': u'presence-a', u'user_id': u'1'})
+        self.index.apply({u'name': u'member_removed', u'channel': u'presence-b', u'user_id': u'1'})
+
+        self.assertEqual(self.index.members(u'presence-a'), frozenset([u'2']))
+        self.assertEqual(self.index.user_count(u'presence-a'), 1)
+        self.assertTrue(self.index.is_occupied(u'presence-a'))
+
+        self.index.apply({u'name': u'channel_vacated', u'channel': u'presence-a'})
+        self.assertEqual(self.index.members(u'presence-a'), frozenset())
+
+    def test_register_handles_webhooks(self):
+        client = AuthenticationClient(app_id=u'4', key=u'key', secret=u'secret', host=u'somehost')
+        self.index.register(client)
+
+        body = json.dumps({u'time_ms': 1000000, u'events': [
+            {u'name': u'channel_occupied', u'channel': u'a'},
+            {u'name': u'member_added', u'channel': u'presence-b', u'user_id': u'1'},
+        ]})
+
+        with mock.patch('time.time', return_value=1200):
+            client.handle_webhook(u'key', sign(u'secret', body), body)
+
+        self.assertEqual(self.index.channels(), [u'a', u'presence-b'])
+
+    def test_reconcile_replaces_the_prefix_range(self):
+        for channel in [u'other', u'presence-room-1', u'presence-room-2']:
+            self.index.apply({u'name': u'channel_occupied', u'channel': channel})
+
+        self.index.apply({u'name': u'member_added', u'channel': u'presence-room-1', u'user_id': u'stale'})
+
+        client = mock.Mock()
+        client.channels_info.return_value = {u'channels': {u'presence-room-1': {}, u'presence-room-3': {}}}
+        client.users_info.side_effect = lambda channel: {u'users': [{u'id': channel[-1]}]}
+
+        self.index.reconcile(client, u'presence-room-')
+
+        client.channels_info.assert_called_once_with(prefix_filter=u'presence-room-')
+        self.assertEqual(self.index.channels(), [u'other', u'presence-room-1', u'presence-room-3'])
+        self.assertEqual(self.index.members(u'presence-room-1'), frozenset([u'1']))
+        self.assertEqual(self.index.members(u'presence-room-3'), frozenset([u'3']))
+
+    def test_reconciler(self):
+        reconciled = threading.Event()
+        client = mock.Mock()
+        client.channels_info.side_effect = lambda: reconciled.set() or {u'channels': {u'a': {}}}
+
+        with OccupancyReconciler(self.index, client, interval=60) as reconciler:
+            reconciled.wait(5)
+
+        self.assertEqual(self.index.channels(), [u'a'])
+        self.assertEqual(reconciler.failures, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
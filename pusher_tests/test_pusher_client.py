@@ -289,6 +289,24 @@ class TestPusherClient(unittest.TestCase):
         }
         self.assertEqual(request.params, expected_params)
 
+    def test_trigger_with_private_encrypted_channel_uses_nonce_source(self):
+        nonce = b'XAJI0Y6DPBHSAHXTHV3A3ZMF'
+        pc = PusherClient(
+            app_id=u'4',
+            key=u'key',
+            secret=u'secret',
+            encryption_master_key_base64=u'OHRXNUZRTG5pUTFzQlFGd3J3N3Q2VFZFc0paZDEweVk=',
+            nonce_source=lambda: nonce)
+
+        request = pc.trigger.make_request(u'private-encrypted-tst', u'some_event', {u'message': u'hello worlds'})
+
+        self.assertEqual(json.loads(request.params[u'data'])[u'nonce'], base64.b64encode(nonce).decode('utf-8'))
+
+    def test_nonce_source_true_uses_a_buffered_nonce_source(self):
+        pc = PusherClient(app_id=u'4', key=u'key', secret=u'secret', nonce_source=True)
+
+        self.assertIsInstance(pc.nonce_source, BufferedNonceSource)
+
     def test_trigger_disallow_non_string_or_list_channels(self):
         self.assertRaises(TypeError, lambda:
             self.pusher_client.trigger.make_request({u'channels': u'test_channel'}, u'some_event', {u'message': u'hello world'}))
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pusher.authentication_client import AuthenticationClient
+from pusher.replay import MemoryReplayStore, SQLiteReplayStore
+from pusher.signature import sign
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+class TestMemoryReplayStore(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.store = MemoryReplayStore(window=100, buckets=10, max_entries=5, clock=lambda: self.now)
+
+    def test_duplicates_are_flagged(self):
+        self.assertTrue(self.store.add(u'a'))
+        self.assertFalse(self.store.add(u'a'))
+        self.assertTrue(self.store.add(u'b'))
+        self.assertEqual(self.store.stats()['duplicates'], 1)
+
+    def test_entries_are_remembered_for_the_window(self):
+        self.store.add(u'a')
+
+        self.now = 105
+        self.assertFalse(self.store.add(u'a'))
+
+        self.now = 115
+        self.assertTrue(self.store.add(u'a'))
+
+    def test_expired_buckets_are_cleared(self):
+        self.store.add(u'a')
+        self.store.add(u'b')
+
+        self.now = 1000
+        self.store.add(u'c')
+        self.assertEqual(len(self.store), 1)
+
+    def test_memory_is_bounded(self):
+        for i in range(7):
+            self.now = i * 10
+            self.store.add(u'key-%d' % i)
+
+        self.assertLessEqual(len(self.store), 5)
+        self.assertEqual(self.store.stats()['dropped'], 2)
+        self.assertTrue(self.store.add(u'key-0'))
+        self.assertFalse(self.store.add(u'key-6'))
+
+
+class TestSQLiteReplayStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, u'webhooks.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_duplicates_are_flagged_across_stores(self):
+        first = SQLiteReplayStore(self.path)
+        second = SQLiteReplayStore(self.path)
+
+        self.assertTrue(first.add(u'a'))
+        self.assertFalse(second.add(u'a'))
+        self.assertTrue(second.add(u'b'))
+        self.assertEqual(len(first), 2)
+
+        first.close()
+        second.close()
+
+    def test_expired_entries_are_purged(self):
+        store = SQLiteReplayStore(self.path, window=10, purge_interval=2)
+
+        with mock.patch('time.time', return_value=1000):
+            store.add(u'a')
+
+        with mock.patch('time.time', return_value=1011):
+            self.assertTrue(store.add(u'a'))
+            store.add(u'b')
+            self.assertEqual(store._connection().execute(
+                u'SELECT COUNT(*) FROM pusher_webhooks').fetchone()[0], 2)
+
+        store.close()
+
+
+class TestWebhookReplay(unittest.TestCase):
+    def test_validate_webhook_flags_duplicates(self):
+        client = AuthenticationClient(
+            app_id=u'4', key=u'key', secret=u'secret', host=u'somehost',
+            webhook_replay_store=MemoryReplayStore())
+        events = []
+        client.on_webhook(None, events.append)
+
+        body = json.dumps({u'time_ms': 1000000, u'events': [{u'name': u'channel_occupied', u'channel': u'a'}]})
+        signature = sign(u'secret', body)
+
+        with mock.patch('time.time', return_value=1200):
+            self.assertFalse(client.handle_webhook(u'key', signature, body)[u'duplicate'])
+            self.assertTrue(client.handle_webhook(u'key', signature, body)[u'duplicate'])
+
+            verifier = client.webhook_verifier(u'key', signature)
+            verifier.update(body.encode('utf8'))
+            self.assertTrue(verifier.finalize())
+            self.assertTrue(verifier.duplicate)
+
+        self.assertEqual(len(events), 1)
+
+    def test_invalid_webhooks_are_not_recorded(self):
+        store = MemoryReplayStore()
+        client = AuthenticationClient(
+            app_id=u'4', key=u'key', secret=u'secret', host=u'somehost', webhook_replay_store=store)
+
+        body = json.dumps({u'time_ms': 1000000, u'events': []})
+
+        with mock.patch('time.time', return_value=1301):
+            self.assertEqual(client.validate_webhook(u'key', sign(u'secret', body), body), None)
+
+        self.assertEqual(len(store), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import asyncio
+import threading
+import time
+import unittest
+
+from pusher.pusher_client import PusherClient
+from pusher.response_cache import ResponseCache
+
+from .helpers import run
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.cache = ResponseCache(ttls={'users_info': 0, 'channels_info': 5}, clock=lambda: self.now)
+        self.pusher_client = PusherClient(
+            app_id=u'4', key=u'key', secret=u'secret', host=u'somehost', response_cache=self.cache)
+        self.requests = []
+
+    def send_request(self, request):
+        self.requests.append(request)
+        return {u'path': request.path, u'n': len(self.requests)}
+
+    def test_responses_are_cached_per_path_and_params(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request):
+            first = self.pusher_client.channel_info(u'chan', [u'user_count'])
+            self.assertEqual(self.pusher_client.channel_info(u'chan', [u'user_count']), first)
+            self.pusher_client.channel_info(u'chan')
+            self.pusher_client.channel_info(u'other', [u'user_count'])
+
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 3)
+
+    def test_hits_do_not_build_requests(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request), \
+                mock.patch('pusher.http.Request._sign', autospec=True) as sign:
+            for _ in range(5):
+                self.pusher_client.channels_info()
+
+        self.assertEqual(sign.call_count, 1)
+        self.assertEqual(self.cache.stats()['hits'], 4)
+
+    def test_equivalent_calls_share_an_entry(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request):
+            self.pusher_client.channel_info(u'chan', [u'user_count'])
+            self.pusher_client.channel_info(u'chan', attributes=(u'user_count',))
+            self.pusher_client.channel_info(channel=u'chan', attributes=[u'user_count'])
+            self.pusher_client.channels_info(None, [])
+            self.pusher_client.channels_info()
+
+        self.assertEqual(len(self.requests), 2)
+
+    def test_per_method_ttls(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request):
+            self.pusher_client.channels_info()
+            self.pusher_client.channel_info(u'chan')
+
+            self.now = 2
+            self.pusher_client.channels_info()
+            self.pusher_client.channel_info(u'chan')
+            self.assertEqual(len(self.requests), 3)
+
+            self.now = 5
+            self.pusher_client.channels_info()
+            self.assertEqual(len(self.requests), 4)
+
+    def test_disabled_and_uncacheable_methods(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request):
+            self.pusher_client.users_info(u'presence-chan')
+            self.pusher_client.users_info(u'presence-chan')
+            self.pusher_client.trigger(u'chan', u'event', u'data')
+            self.pusher_client.trigger(u'chan', u'event', u'data')
+
+        self.assertEqual(len(self.requests), 4)
+
+    def test_errors_are_not_cached(self):
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=RuntimeError(u'boom')):
+            self.assertRaises(RuntimeError, lambda: self.pusher_client.channel_info(u'chan'))
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=self.send_request):
+            self.pusher_client.channel_info(u'chan')
+
+        self.assertEqual(len(self.requests), 1)
+
+    def test_concurrent_misses_are_coalesced(self):
+        started = threading.Event()
+
+        def send_request(request):
+            started.set()
+            time.sleep(0.05)
+            return self.send_request(request)
+
+        results = []
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=send_request):
+            threads = [
+                threading.Thread(target=lambda: results.append(self.pusher_client.channel_info(u'chan')))
+                for _ in range(5)]
+
+            threads[0].start()
+            started.wait()
+            for thread in threads[1:]:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(self.cache.stats()['coalesced'], 4)
+
+    def test_asyncio_misses_are_coalesced(self):
+        async def send_request(request):
+            await asyncio.sleep(0.01)
+            return self.send_request(request)
+
+        async def main():
+            results = await asyncio.gather(*[self.pusher_client.channel_info(u'chan') for _ in range(5)])
+            cached = await self.pusher_client.channel_info(u'chan')
+            return results, cached
+
+        self.pusher_client.http.is_async = True
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=send_request):
+            results, cached = run(main())
+
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(results, [cached] * 5)
+        self.assertEqual(self.cache.stats()['coalesced'], 4)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_asyncio_fetches_are_lazy(self):
+        async def send_request(request):
+            return self.send_request(request)
+
+        self.pusher_client.http.is_async = True
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=send_request):
+            self.pusher_client.channel_info(u'unused').close()
+            self.assertEqual(self.requests, [])
+
+            # created outside of the loop it is awaited on
+            call = self.pusher_client.channel_info(u'chan')
+            loop = asyncio.new_event_loop()
+            try:
+                result = loop.run_until_complete(call)
+                self.assertEqual(loop.run_until_complete(self.pusher_client.channel_info(u'chan')), result)
+
+            finally:
+                loop.close()
+
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import asyncio
+import base64
+import email.utils
+import json
+import time
+import unittest
+
+import nacl.secret
+
+from pusher.crypto import generate_shared_secret
+from pusher.pusher_client import PusherClient
+from pusher.errors import PusherBadStatus, PusherBadRequest
+from pusher.http import process_response
+from pusher.retry import RetryPolicy, parse_retry_after
+from pusher.testing import StandInServer
+
+from .helpers import run
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+try:
+    from pusher.tornado import TornadoBackend
+except ImportError:
+    TornadoBackend = None
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.retry = RetryPolicy(max_attempts=3, base_delay=0.1, max_delay=1, deadline=10)
+        self.pusher_client = PusherClient(
+            app_id=u'4', key=u'key', secret=u'secret', host=u'somehost', retry=self.retry)
+        self.requests = []
+
+    def responses(self, *outcomes):
+        outcomes = list(outcomes)
+
+        def send_request(request):
+            self.requests.append(request)
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        return send_request
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after(None), None)
+        self.assertEqual(parse_retry_after(u'3'), 3.0)
+        self.assertEqual(parse_retry_after(u'nonsense'), None)
+
+        date = email.utils.formatdate(time.time() + 60, usegmt=True)
+        self.assertTrue(55 < parse_retry_after(date) <= 60)
+
+    def test_process_response_keeps_status_and_retry_after(self):
+        with self.assertRaises(PusherBadStatus) as cm:
+            process_response(429, u'slow down', {u'Retry-After': u'2'})
+
+        self.assertEqual(cm.exception.status, 429)
+        self.assertEqual(cm.exception.retry_after, u'2')
+
+    def test_is_retryable(self):
+        self.assertTrue(self.retry.is_retryable(PusherBadStatus(u'', 503), None))
+        self.assertTrue(self.retry.is_retryable(PusherBadStatus(u'', 429), None))
+        self.assertTrue(self.retry.is_retryable(ConnectionResetError(), None))
+        self.assertFalse(self.retry.is_retryable(PusherBadStatus(u'', 404), None))
+        self.assertFalse(self.retry.is_retryable(PusherBadRequest(u''), None))
+        self.assertFalse(self.retry.is_retryable(ValueError(), None))
+
+    def test_backoff_is_capped(self):
+        for attempt in range(1, 10):
+            self.assertTrue(0 <= self.retry.backoff(attempt) <= 1)
+
+    @mock.patch('time.sleep')
+    def test_retries_until_success_and_resigns(self, sleep):
+        send_request = self.responses(PusherBadStatus(u'503: down', 503), ConnectionResetError(), {})
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=send_request):
+            with mock.patch('time.time', side_effect=[1000, 1001, 1002]):
+                self.assertEqual(self.pusher_client.trigger(u'chan', u'event', u'data'), {})
+
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(len(self.requests), 3)
+        timestamps = [r.query_params['auth_timestamp'] for r in self.requests]
+        self.assertEqual(timestamps, [u'1000', u'1001', u'1002'])
+
+    @mock.patch('time.sleep')
+    def test_gives_up_after_max_attempts(self, sleep):
+        error = PusherBadStatus(u'500: oops', 500)
+        send_request = self.responses(error, error, error)
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=send_request):
+            self.assertRaises(PusherBadStatus, lambda: self.pusher_client.trigger(u'chan', u'event', u'data'))
+
+        self.assertEqual(len(self.requests), 3)
+
+    @mock.patch('time.sleep')
+    def test_does_not_retry_client_errors(self, sleep):
+        send_request = self.responses(PusherBadRequest(u'nope'))
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=send_request):
+            self.assertRaises(PusherBadRequest, lambda: self.pusher_client.trigger(u'chan', u'event', u'data'))
+
+        sleep.assert_not_called()
+
+    @mock.patch('time.sleep')
+    def test_retried_encrypted_batches_are_not_encrypted_again(self, sleep):
+        client = PusherClient(
+            app_id=u'4', key=u'key', secret=u'secret', host=u'somehost', retry=self.retry,
+            encryption_master_key_base64=u'OHRXNUZRTG5pUTFzQlFGd3J3N3Q2VFZFc0paZDEweVk=')
+        batch = [{u'channel': u'private-encrypted-chan', u'name': u'event', u'data': {u'a': 1}}]
+        send_request = self.responses(PusherBadStatus(u'500: error', 500), {})
+
+        with mock.patch.object(client.http, 'send_request', side_effect=send_request):
+            self.assertEqual(client.trigger_batch(batch), {})
+
+        first, second = self.requests
+        self.assertEqual(first.body, second.body)
+        self.assertEqual(batch, [{u'channel': u'private-encrypted-chan', u'name': u'event', u'data': {u'a': 1}}])
+
+        data = json.loads(json.loads(second.body)[u'batch'][0][u'data'])
+        box = nacl.secret.SecretBox(generate_shared_secret(b'private-encrypted-chan', client._encryption_master_key))
+        plaintext = box.decrypt(base64.b64decode(data[u'ciphertext']), base64.b64decode(data[u'nonce']))
+        self.assertEqual(json.loads(plaintext), {u'a': 1})
+
+    @mock.patch('time.sleep')
+    def test_honours_retry_after(self, sleep):
+        send_request = self.responses(PusherBadStatus(u'429: slow down', 429, u'3'), {})
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=send_request):
+            self.pusher_client.trigger(u'chan', u'event', u'data')
+
+        sleep.assert_called_once_with(3.0)
+
+    @mock.patch('time.sleep')
+    def test_retry_after_beyond_deadline_is_raised(self, sleep):
+        send_request = self.responses(PusherBadStatus(u'429: slow down', 429, u'60'), {})
+
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=send_request):
+            self.assertRaises(PusherBadStatus, lambda: self.pusher_client.trigger(u'chan', u'event', u'data'))
+
+        sleep.assert_not_called()
+
+    def test_retries_async_backends(self):
+        outcomes = [PusherBadStatus(u'502: bad gateway', 502), {}]
+
+        async def send_request(request):
+            self.requests.append(request)
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        self.retry.base_delay = 0.001
+        with mock.patch.object(self.pusher_client.http, 'send_request', side_effect=send_request):
+            result = run(self.pusher_client.trigger(u'chan', u'event', u'data'))
+
+        self.assertEqual(result, {})
+        self.assertEqual(len(self.requests), 2)
+
+    @unittest.skipIf(TornadoBackend is None, "tornado is not installed")
+    def test_retries_tornado_backend(self):
+        with StandInServer(app_id=u'4', key=u'key', secret=u'secret') as server:
+            server.inject(500)
+            server.inject(429, retry_after=0)
+
+            async def trigger():
+                client = PusherClient(
+                    backend=TornadoBackend, retry=RetryPolicy(max_attempts=3, base_delay=0),
+                    **server.client_options())
+                return await asyncio.wait_for(client.trigger(u'chan', u'event', u'data'), 10)
+
+            self.assertEqual(run(trigger()), {})
+            self.assertEqual([r.status for r in server.requests], [500, 429, 200])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import unittest
+
+from pusher.signature import Signer, sign, verify
+
+
+class TestSigner(unittest.TestCase):
+    def setUp(self):
+        self.signer = Signer(u'secret')
+
+    def test_sign_matches_sign_function(self):
+        for string_to_sign in [u'', u'345.23:private-channel', u'你好']:
+            self.assertEqual(self.signer.sign(string_to_sign), sign(u'secret', string_to_sign))
+
+    def test_signer_is_reusable(self):
+        first = self.signer.sign(u'one')
+        self.signer.sign(u'two')
+
+        self.assertEqual(self.signer.sign(u'one'), first)
+
+    def test_sign_many(self):
+        strings = [u'one', u'two', u'three']
+
+        self.assertEqual(self.signer.sign_many(strings), [sign(u'secret', s) for s in strings])
+        self.assertEqual(self.signer.sign_many([]), [])
+
+    def test_sign_many_with_prefix(self):
+        strings = [u'one', u'two']
+
+        self.assertEqual(
+            self.signer.sign_many(strings, prefix=u'1.1:'),
+            [sign(u'secret', u'1.1:' + s) for s in strings])
+
+    def test_sign_bytes(self):
+        data = u'body 你好'.encode('utf8')
+        expected = sign(u'secret', u'body 你好')
+
+        for buffer in [data, bytearray(data), memoryview(data)]:
+            self.assertEqual(self.signer.sign_bytes(buffer), expected)
+            self.assertTrue(self.signer.verify(buffer, expected))
+
+    def test_verify(self):
+        signature = sign(u'secret', u'body')
+
+        self.assertTrue(self.signer.verify(u'body', signature))
+        self.assertTrue(verify(u'secret', u'body', signature))
+        self.assertFalse(self.signer.verify(u'other body', signature))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import time
+import unittest
+
+import requests
+
+from pusher.aiohttp import AsyncIOBackend
+from pusher.errors import PusherBadAuth, PusherBadRequest, PusherBadStatus
+from pusher.http import POST, Request
+from pusher.pusher_client import PusherClient
+from pusher.retry import RetryPolicy
+from pusher.testing import RESET, RecordedEvent, StandInServer
+
+from .helpers import run
+
+
+class TestStandInServer(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer(app_id=u'4', key=u'key', secret=u'secret').start()
+        self.client = PusherClient(**self.server.client_options())
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_records_events(self):
+        self.assertEqual(self.client.trigger([u'a', u'b'], u'my-event', {u'x': 1}, socket_id=u'1.2'), {})
+        self.client.trigger_batch([
+            {u'channel': u'c', u'name': u'other-event', u'data': u'text'}])
+
+        self.assertEqual(self.server.events, [
+            RecordedEvent(u'a', u'my-event', u'{"x": 1}', u'1.2'),
+            RecordedEvent(u'b', u'my-event', u'{"x": 1}', u'1.2'),
+            RecordedEvent(u'c', u'other-event', u'text', None)])
+        self.assertEqual(
+            [(r.method, r.path, r.status) for r in self.server.requests],
+            [(u'POST', u'/apps/4/events', 200), (u'POST', u'/apps/4/batch_events', 200)])
+        self.assertEqual(self.server.stats(), {u'requests': 2, u'statuses': {200: 2}, u'events': 3})
+
+        self.server.clear()
+        self.assertEqual((self.server.events, self.server.requests), ([], []))
+
+    def test_application_state(self):
+        self.server.occupy(u'presence-room', [u'1', u'2'])
+        self.server.occupy(u'private-chat', subscription_count=3)
+
+        self.assertEqual(self.client.channels_info(), {u'channels': {u'presence-room': {}, u'private-chat': {}}})
+        self.assertEqual(
+            self.client.channels_info(u'presence-', [u'user_count']),
+            {u'channels': {u'presence-room': {u'user_count': 2}}})
+        self.assertEqual(
+            self.client.channel_info(u'private-chat', [u'subscription_count']),
+            {u'occupied': True, u'subscription_count': 3})
+        self.assertEqual(self.client.users_info(u'presence-room'), {u'users': [{u'id': u'1'}, {u'id': u'2'}]})
+        self.assertEqual(self.client.terminate_user_connections(u'1'), {})
+
+        self.server.vacate(u'private-chat')
+        self.assertEqual(self.client.channel_info(u'private-chat'), {u'occupied': False})
+        self.assertRaises(PusherBadRequest, lambda: self.client.users_info(u'private-chat'))
+
+    def test_authentication(self):
+        options = dict(self.server.client_options(), secret=u'other')
+        self.assertRaises(PusherBadAuth, lambda: PusherClient(**options).trigger(u'a', u'e', u'd'))
+
+        options = dict(self.server.client_options(), key=u'other')
+        self.assertRaises(PusherBadAuth, lambda: PusherClient(**options).channels_info())
+
+        request = Request(self.client, POST, u'/apps/4/events', {u'name': u'e', u'channels': [u'a'], u'data': u'd'})
+        self.assertEqual(self.server.handle(u'POST', request.signed_path, request.body)[0], 200)
+        self.assertEqual(self.server.handle(u'POST', request.signed_path, request.body + b' ')[0], 401)
+        self.assertEqual(self.server.handle(u'POST', request.signed_path + u'&a=b', request.body)[0], 401)
+
+    def test_stale_timestamps(self):
+        server = StandInServer(app_id=u'4', clock=lambda: time.time() + 601)
+        request = Request(self.client, POST, u'/apps/4/events', {u'name': u'e', u'channels': [u'a'], u'data': u'd'})
+
+        status, body, _ = server.handle(u'POST', request.signed_path, request.body)
+
+        self.assertEqual(status, 401)
+        self.assertIn(u'Timestamp expired', body)
+
+    def test_invalid_requests(self):
+        request = Request(self.client, POST, u'/apps/4/batch_events', {u'batch': [{u'channel': u'a', u'name': u'e'}]})
+        self.assertEqual(
+            self.server.handle(u'POST', request.signed_path, request.body)[:2],
+            (400, u'The event data should be a string'))
+        self.assertEqual(self.server.handle(u'GET', u'/apps/5/channels')[0], 404)
+        self.assertEqual(self.server.handle(u'GET', u'/unknown')[0], 404)
+
+    def test_injected_errors(self):
+        self.server.inject(503)
+        self.assertRaises(PusherBadStatus, lambda: self.client.channels_info())
+
+        self.server.inject(429, times=2, retry_after=0)
+        client = PusherClient(retry=RetryPolicy(max_attempts=3, base_delay=0), **self.server.client_options())
+        self.assertEqual(client.channels_info(), {u'channels': {}})
+        self.assertEqual([r.status for r in self.server.requests], [503, 429, 429, 200])
+
+        self.server.inject(RESET)
+        self.assertRaises(requests.exceptions.ConnectionError, lambda: self.client.channels_info())
+        self.assertEqual(self.client.channels_info(), {u'channels': {}})
+
+    def test_random_errors_are_reproducible(self):
+        statuses = []
+        for _ in range(2):
+            server = StandInServer(error_rate=0.5, errors=(500, 502), seed=7)
+            statuses.append([server.handle(u'GET', u'/unknown')[0] for _ in range(20)])
+
+        self.assertEqual(statuses[0], statuses[1])
+        self.assertEqual(set(statuses[0]), set([404, 500, 502]))
+        self.assertRaises(ValueError, lambda: StandInServer(error_rate=2))
+
+    def test_latency(self):
+        self.server.latency = 0.05
+
+        started = time.time()
+        self.client.channels_info()
+
+        self.assertGreaterEqual(time.time() - started, 0.05)
+
+    def test_async_backend(self):
+        client = PusherClient(backend=AsyncIOBackend, **self.server.client_options())
+
+        async def trigger():
+            try:
+                return await client.trigger(u'a', u'my-event', u'data')
+
+            finally:
+                await client.http.aclose()
+
+        self.assertEqual(run(trigger()), {})
+        self.assertEqual(self.server.events, [RecordedEvent(u'a', u'my-event', u'data', None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,11 @@ import unittest
 
 import pusher.util
 
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
 
 class TestUtil(unittest.TestCase):
     def test_validate_user_id(self):
@@ -37,6 +42,52 @@ class TestUtil(unittest.TestCase):
             pusher.util.validate_channel("#server-to-user1234")
             pusher.util.validate_channel("#server-to-users")
 
+    def test_validate_channels_reports_all_invalid_channels(self):
+        self.assertEqual(pusher.util.validate_channels([u"a", b"b"]), [u"a", u"b"])
+
+        with self.assertRaises(ValueError) as context:
+            pusher.util.validate_channels([u"a", u"abc%&*", u"b", u"#123"])
+
+        self.assertIn(u"abc%&*", str(context.exception))
+        self.assertIn(u"#123", str(context.exception))
+
+        self.assertRaises(TypeError, lambda: pusher.util.validate_channels([u"a", 4]))
+
+
+class TestValidationCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = pusher.util.enable_validation_cache(maxsize=2)
+
+    def tearDown(self):
+        pusher.util.disable_validation_cache()
+
+    def test_valid_names_are_cached(self):
+        self.assertEqual(pusher.util.validate_channel(u"chan"), u"chan")
+        self.assertEqual(pusher.util.validate_user_id(u"user"), u"user")
+        self.assertEqual(pusher.util.validate_socket_id(u"1.1"), u"1.1")
+
+        self.assertEqual(self.cache.channels, set([u"chan"]))
+        self.assertEqual(self.cache.user_ids, set([u"user"]))
+        self.assertEqual(self.cache.socket_ids, set([u"1.1"]))
+
+        with mock.patch.object(pusher.util, 'channel_name_re') as regex_mock:
+            self.assertEqual(pusher.util.validate_channel(u"chan"), u"chan")
+
+        regex_mock.match.assert_not_called()
+
+    def test_invalid_names_are_not_cached(self):
+        for channel in [u"abc%&*", u"#server-to-users"]:
+            self.assertRaises(ValueError, lambda: pusher.util.validate_channel(channel))
+
+        self.assertRaises(ValueError, lambda: pusher.util.validate_socket_id(u"1"))
+        self.assertEqual(self.cache.channels, set())
+        self.assertEqual(self.cache.socket_ids, set())
+
+    def test_cache_is_bounded(self):
+        pusher.util.validate_channels([u"a", u"b", u"c"])
+
+        self.assertEqual(self.cache.channels, set([u"c"]))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, absolute_import, division
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from pusher.authentication_client import AuthenticationClient
+from pusher.signature import sign
+from pusher.webhooks import WebhookDispatcher
+
+from .helpers import run
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+class TestWebhookVerifier(unittest.TestCase):
+    def setUp(self):
+        self.client = AuthenticationClient(app_id=u'4', key=u'key', secret=u'secret', host=u'somehost')
+        self.events = [
+            {u'name': u'channel_occupied', u'channel': u'chan-%d' % i, u'data': u'é [],{}'}
+            for i in range(5)]
+
+    def verify(self, body, chunk_size=7, signature=None, key=u'key', max_size=None):
+        if signature is None:
+            signature = sign(u'secret', body)
+
+        verifier = self.client.webhook_verifier(key, signature, max_size=max_size)
+        raw = body.encode('utf8')
+        for i in range(0, len(raw), chunk_size):
+            verifier.update(raw[i:i + chunk_size])
+
+        return verifier
+
+    def test_events_are_yielded_after_verification(self):
+        body = json.dumps({u'time_ms': 1000000, u'events': self.events}, ensure_ascii=False)
+
+        with mock.patch('time.time', return_value=1200):
+            verifier = self.verify(body)
+            self.assertTrue(verifier.finalize())
+
+        self.assertEqual(verifier.time_ms, 1000000)
+        self.assertEqual(list(verifier.events()), self.events)
+
+    def test_time_ms_after_events(self):
+        body = u'{"events" : [ %s ] , "time_ms":1000000}' % u' , '.join(json.dumps(e) for e in self.events)
+
+        with mock.patch('time.time', return_value=1200):
+            verifier = self.verify(body)
+            self.assertTrue(verifier.finalize())
+
+        self.assertEqual(list(verifier.events()), self.events)
+
+    def test_no_events(self):
+        for body in [u'{"time_ms": 1000000, "events": []}', u'{"time_ms": 1000000}']:
+            with mock.patch('time.time', return_value=1200):
+                verifier = self.verify(body)
+                self.assertTrue(verifier.finalize())
+
+            self.assertEqual(list(verifier.events()), [])
+
+    def test_invalid_webhooks(self):
+        body = json.dumps({u'time_ms': 1000000, u'events': self.events})
+
+        with mock.patch('time.time', return_value=1200):
+            self.assertFalse(self.verify(body, key=u'other').finalize())
+            self.assertFalse(self.verify(body, signature=sign(u'secret', body + u' ')).finalize())
+            self.assertFalse(self.verify(body, max_size=10).finalize())
+            self.assertFalse(self.verify(u'{"time_ms": 1000000, "events": 4}').finalize())
+            self.assertFalse(self.verify(u'[1000000]').finalize())
+            self.assertFalse(self.verify(u'{"events": []}').finalize())
+
+        with mock.patch('time.time', return_value=1301):
+            self.assertFalse(self.verify(body).finalize())
+
+    def test_events_require_verification(self):
+        verifier = self.verify(u'{"time_ms": 1000000, "events": []}', signature=u'bad')
+
+        self.assertRaises(ValueError, verifier.events)
+        self.assertFalse(verifier.finalize())
+        self.assertRaises(ValueError, verifier.events)
+        self.assertRaises(ValueError, lambda: verifier.update(b'more'))
+
+    def test_malformed_events_raise_when_reached(self):
+        body = u'{"time_ms": 1000000, "events": [{"name": "a"}, {"name": ]}'
+
+        with mock.patch('time.time', return_value=1200):
+            verifier = self.verify(body)
+            self.assertTrue(verifier.finalize())
+
+        events = verifier.events()
+        self.assertEqual(next(events), {u'name': u'a'})
+        self.assertRaises(ValueError, lambda: next(events))
+
+
+class TestWebhookDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.dispatcher = WebhookDispatcher()
+        self.calls = []
+
+    def handler(self, label):
+        def handle(event):
+            self.calls.append((label, event[u'channel']))
+            return label
+
+        return handle
+
+    def test_routes_by_name_and_channel_prefix(self):
+        self.dispatcher.on(u'member_added', self.handler(u'presence'), channel_prefix=u'presence-')
+        self.dispatcher.on(u'member_added', self.handler(u'games'), channel_prefix=u'presence-games-')
+        self.dispatcher.on(u'channel_occupied', self.handler(u'occupied'))
+        self.dispatcher.on(None, self.handler(u'all'))
+
+        results = self.dispatcher.dispatch([
+            {u'name': u'member_added', u'channel': u'presence-games-1', u'user_id': u'1'},
+            {u'name': u'member_added', u'channel': u'presence-chat', u'user_id': u'1'},
+            {u'name': u'channel_occupied', u'channel': u'private-a'},
+            {u'name': u'cache_miss', u'channel': u'cache-a'},
+        ])
+
+        self.assertEqual(self.calls, [
+            (u'all', u'presence-games-1'),
+            (u'presence', u'presence-games-1'),
+            (u'games', u'presence-games-1'),
+            (u'all', u'presence-chat'),
+            (u'presence', u'presence-chat'),
+            (u'occupied', u'private-a'),
+            (u'all', u'private-a'),
+            (u'all', u'cache-a'),
+        ])
+        self.assertEqual(results, [label for label, _ in self.calls])
+
+    def test_on_is_a_decorator(self):
+        @self.dispatcher.on(u'channel_vacated')
+        def vacated(event):
+            return event[u'channel']
+
+        self.assertEqual(self.dispatcher.dispatch([{u'name': u'channel_vacated', u'channel': u'a'}]), [u'a'])
+        self.assertEqual(self.dispatcher.dispatch([{u'name': u'channel_occupied', u'channel': u'a'}]), [])
+
+    def test_dispatch_on_an_executor_bounds_concurrency(self):
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def handler(event):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+
+            time.sleep(0.005)
+            with lock:
+                in_flight[0] -= 1
+
+            return event[u'channel']
+
+        self.dispatcher.on(u'client_event', handler)
+        events = [{u'name': u'client_event', u'channel': u'c%d' % i} for i in range(12)]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = self.dispatcher.dispatch(events, executor=executor, max_concurrency=2)
+
+        self.assertEqual(results, [e[u'channel'] for e in events])
+        self.assertLessEqual(in_flight[1], 2)
+
+    def test_dispatch_raises_handler_errors(self):
+        def fail(event):
+            raise RuntimeError(u'boom')
+
+        self.dispatcher.on(u'client_event', fail)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertRaises(RuntimeError, lambda: self.dispatcher.dispatch(
+                [{u'name': u'client_event', u'channel': u'a'}], executor=executor))
+
+    def test_dispatch_async(self):
+        async def handler(event):
+            await asyncio.sleep(0)
+            return event[u'channel']
+
+        self.dispatcher.on(u'client_event', handler)
+        self.dispatcher.on(u'client_event', self.handler(u'sync'))
+        events = [{u'name': u'client_event', u'channel': u'c%d' % i} for i in range(3)]
+
+        results = run(self.dispatcher.dispatch_async(events, max_concurrency=2))
+
+        self.assertEqual(results, [u'c0', u'sync', u'c1', u'sync', u'c2', u'sync'])
+
+
+class TestHandleWebhook(unittest.TestCase):
+    def test_handle_webhook_dispatches_valid_webhooks(self):
+        client = AuthenticationClient(app_id=u'4', key=u'key', secret=u'secret', host=u'somehost')
+        events = []
+        client.on_webhook(u'channel_occupied', events.append)
+
+        body = json.dumps({u'time_ms': 1000000, u'events': [{u'name': u'channel_occupied', u'channel': u'a'}]})
+
+        with mock.patch('time.time', return_value=1200):
+            self.assertEqual(client.handle_webhook(u'key', sign(u'secret', body), body)[u'time_ms'], 1000000)
+            self.assertEqual(client.handle_webhook(u'key', u'bad', body), None)
+            run(client.handle_webhook_async(u'key', sign(u'secret', body), body))
+
+        self.assertEqual(events, [{u'name': u'channel_occupied', u'channel': u'a'}] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -49,8 +49,12 @@ setup(
     tests_require=['nose', 'mock', 'HTTPretty'],
 
     extras_require={
-        'aiohttp': ['aiohttp>=0.20.0'],
-        'tornado': ['tornado>=5.0.0']
+        'aiohttp': ['aiohttp>=3.3.0'],
+        'tornado': ['tornado>=5.0.0'],
+        'httpx': ['httpx[http2]>=0.18.0'],
+        'orjson': ['orjson>=3.0.0'],
+        'msgspec': ['msgspec>=0.16.0'],
+        'ujson': ['ujson>=5.0.0']
     },
 
     package_data={